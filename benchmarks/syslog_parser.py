@@ -0,0 +1,75 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import List, Callable, Any, Optional
+
+from foxy_gh_farmer.syslog_server import Parser, map_priority_to_log_level
+
+_corpus_path = Path(__file__).parent / "data" / "gigahorse_syslog.txt"
+
+
+def load_corpus(corpus_path: Path) -> List[bytes]:
+    with open(corpus_path, "rb") as f:
+        lines = [line.rstrip(b"\n") for line in f if line.strip() != b""]
+
+    # Multi-line messages are stored with escaped newlines, Gigahorse terminates every datagram with a NUL byte
+    return [line.replace(b"\\n", b"\n") + b"\x00" for line in lines]
+
+
+def make_legacy_parser() -> Optional[Callable[[bytes], Any]]:
+    try:
+        from pyparsing import Word, alphas, Suppress, nums, Regex
+    except ImportError:
+        return None
+
+    pattern = (
+        (Suppress("<") + Word(nums) + Suppress(">")) + Word(alphas + nums + "_" + "-" + ".") + Regex("(.|\n)*\x00")
+    )
+
+    def parse(line: bytes):
+        parsed = pattern.parseString(bytes.decode(line))
+
+        return {
+            "log_level": map_priority_to_log_level(int(parsed[0])),
+            "service": parsed[1],
+            "message": parsed[2].rstrip("\x00"),
+        }
+
+    return parse
+
+
+def measure(parse: Callable[[bytes], Any], corpus: List[bytes], iterations: int) -> float:
+    start = perf_counter()
+    for _ in range(iterations):
+        for line in corpus:
+            parse(line)
+    duration = perf_counter() - start
+
+    return (iterations * len(corpus)) / duration
+
+
+def main():
+    argument_parser = ArgumentParser(description="Measure the syslog parser throughput over a Gigahorse syslog corpus")
+    argument_parser.add_argument("--corpus", type=Path, default=_corpus_path)
+    argument_parser.add_argument("--iterations", type=int, default=2000)
+    args = argument_parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    parser = Parser()
+    legacy_parse = make_legacy_parser()
+    if legacy_parse is not None:
+        for line in corpus:
+            assert legacy_parse(line) == parser.parse(line), f"Parser output differs for {line!r}"
+        legacy_lines_per_second = measure(legacy_parse, corpus, args.iterations)
+        print(f"pyparsing parser: {legacy_lines_per_second:,.0f} lines/sec")
+    else:
+        print("pyparsing parser: skipped, pyparsing is not installed")
+
+    lines_per_second = measure(parser.parse, corpus, args.iterations)
+    print(f"   regex parser: {lines_per_second:,.0f} lines/sec")
+    if legacy_parse is not None:
+        print(f"        speedup: {lines_per_second / legacy_lines_per_second:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
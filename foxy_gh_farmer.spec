@@ -14,6 +14,7 @@ else:
 
 hiddenimports = [
     *collect_submodules("chia"),
+    *collect_submodules("watchdog.observers"),
     *hidden_imports_for_windows,
 ]
 
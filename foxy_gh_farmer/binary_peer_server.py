@@ -0,0 +1,48 @@
+from logging import getLogger
+from typing import Optional
+
+from aiohttp import web
+
+from foxy_gh_farmer.gigahorse_binary_manager import GigahorseBinaryManager
+
+
+class BinaryPeerServer:
+    """
+    Serves the verified gigahorse archives of the binary cache to other nodes on the LAN, which verify them against the
+    upstream manifest themselves. Range requests are supported, so peers can download in segments.
+    """
+
+    _host: str
+    _port: int
+    _binary_manager: GigahorseBinaryManager
+    _runner: Optional[web.AppRunner] = None
+    _logger = getLogger("binary_peer_server")
+
+    def __init__(self, host: str, port: int, binary_manager: GigahorseBinaryManager):
+        self._host = host
+        self._port = port
+        self._binary_manager = binary_manager
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/gigahorse/{release}/{archive_file_name}", self._handle_archive)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self._host, port=self._port).start()
+        self._logger.info(f"Serving gigahorse archives to peers on http://{self._host}:{self._port}/gigahorse")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_archive(self, request: web.Request) -> web.StreamResponse:
+        release = request.match_info["release"]
+        archive_file_name = request.match_info["archive_file_name"]
+        archive_path = self._binary_manager.get_archive_path(release, archive_file_name)
+        if archive_path is None:
+            raise web.HTTPNotFound()
+        self._logger.debug(f"Serving {archive_file_name} to {request.remote}")
+
+        # Never let aiohttp set a gzip content encoding based on the file extension
+        return web.FileResponse(archive_path, headers={"Content-Type": "application/octet-stream"})
@@ -5,12 +5,12 @@ from typing import Dict, Any, Optional
 
 import click
 from chia.daemon.keychain_proxy import connect_to_keychain_and_validate, KeychainProxy
-from chia.util.config import load_config
 
 from foxy_gh_farmer.foundation.keychain.generate_login_links import generate_login_links
 from foxy_gh_farmer.foxy_chia_config_manager import FoxyChiaConfigManager
 from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
 from foxy_gh_farmer.gigahorse_launcher import ensure_daemon_running_and_unlocked
+from foxy_gh_farmer.util.chia_config import load_chia_config
 from foxy_gh_farmer.util.daemon import shutdown_daemon
 
 
@@ -22,7 +22,7 @@ def authenticate_cmd(ctx) -> None:
     foxy_chia_config_manager = FoxyChiaConfigManager(foxy_root)
     foxy_chia_config_manager.ensure_foxy_config(config_path)
 
-    config = load_config(foxy_root, "config.yaml")
+    config = load_chia_config(foxy_root)
     foxy_config_manager = FoxyConfigManager(config_path)
     foxy_config = foxy_config_manager.load_config()
 
@@ -0,0 +1,29 @@
+from asyncio import run
+from pathlib import Path
+
+import click
+
+from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
+from foxy_gh_farmer.gigahorse_binary_manager import create_binary_manager
+
+
+@click.command("gc", short_help="Remove unused gigahorse releases from the binary cache")
+@click.option(
+    "--max-unused-days",
+    default=30,
+    help="Remove releases which were not used for this many days",
+    type=click.IntRange(min=0),
+    show_default=True,
+)
+@click.pass_context
+def binary_cache_gc_cmd(ctx, max_unused_days: int) -> None:
+    config_path: Path = ctx.obj["config_path"]
+    foxy_config = FoxyConfigManager(config_path).load_config()
+    binary_manager = create_binary_manager(foxy_config)
+
+    removed_releases, freed_bytes = run(
+        binary_manager.collect_garbage(max_unused_seconds=max_unused_days * 24 * 60 * 60)
+    )
+    for release in removed_releases:
+        print(f"Removed Gigahorse {release}")
+    print(f"Freed {freed_bytes / 2 ** 20:.2f} MiB")
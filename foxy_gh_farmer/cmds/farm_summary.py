@@ -1,76 +1,200 @@
-from asyncio import run
+import json
+from asyncio import run, sleep
+from dataclasses import asdict
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from sys import stderr
+from time import strftime, localtime
+from typing import Dict, Any, List, Optional, Tuple
 
 import click
-from chia.cmds.cmds_util import get_any_service_client
-from chia.cmds.farm_funcs import get_harvesters_summary
-from chia.cmds.peer_funcs import print_connections
 from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.server.outbound_message import NodeType
 from chia.util.misc import format_bytes
-from chia.util.network import is_localhost
+
+from foxy_gh_farmer.util.chia_config import load_chia_config
+from foxy_gh_farmer.util.farm_summary import FarmSummary, HarvesterSummary, fetch_farm_summary
+from foxy_gh_farmer.util.farmer_control import create_service_rpc_client
 
 
 @click.command("summary", short_help="Summary of farming information")
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print the summary as JSON",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="Keep refreshing the summary and only print the harvesters which changed",
+)
+@click.option(
+    "--interval",
+    default=10,
+    help="The refresh interval in seconds when watching",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
 @click.pass_context
-def summary_cmd(ctx) -> None:
+def summary_cmd(ctx, as_json: bool, watch: bool, interval: int) -> None:
     foxy_root: Path = ctx.obj["root_path"]
 
-    run(print_farm_summary(foxy_root))
+    try:
+        run(print_farm_summary(foxy_root, as_json=as_json, watch_interval_seconds=interval if watch else None))
+    except KeyboardInterrupt:
+        pass
+
+
+async def print_farm_summary(root_path: Path, as_json: bool = False, watch_interval_seconds: Optional[int] = None):
+    config = load_chia_config(root_path)
+    farmer_client = await create_service_rpc_client(FarmerRpcClient, root_path, config)
+    try:
+        if watch_interval_seconds is not None:
+            await _watch_farm_summary(farmer_client, as_json, watch_interval_seconds)
 
+            return
+        farm_summary = await fetch_farm_summary(farmer_client)
+        if as_json:
+            print(json.dumps(_farm_summary_to_json_dict(farm_summary), indent=2))
+        else:
+            _print_farm_summary(farm_summary)
+    finally:
+        farmer_client.close()
+        await farmer_client.await_closed()
 
-async def print_farm_summary(root_path: Path):
-    harvesters_summary = await get_harvesters_summary(farmer_rpc_port=None, root_path=root_path)
 
+def _print_farm_summary(farm_summary: FarmSummary):
     print("Farming status: Farming")
 
-    class PlotStats:
-        total_plot_size = 0
-        total_effective_plot_size = 0
-        total_plots = 0
-
-    harvesters_local: Dict[str, Dict[str, Any]] = {}
-    harvesters_remote: Dict[str, Dict[str, Any]] = {}
-    for harvester in harvesters_summary["harvesters"]:
-        ip = harvester["connection"]["host"]
-        if is_localhost(ip):
-            harvesters_local[harvester["connection"]["node_id"]] = harvester
-        else:
-            if ip not in harvesters_remote:
-                harvesters_remote[ip] = {}
-            harvesters_remote[ip][harvester["connection"]["node_id"]] = harvester
-
-    def process_harvesters(harvester_peers_in: Dict[str, Dict[str, Any]]) -> None:
-        for harvester_peer_id, harvester_dict in harvester_peers_in.items():
-            syncing = harvester_dict["syncing"]
-            if syncing is not None and syncing["initial"]:
-                print(f"   Loading plots: {syncing['plot_files_processed']} / {syncing['plot_files_total']}")
+    local_harvesters = [harvester for harvester in farm_summary.harvesters if harvester.is_local]
+    remote_harvesters_by_host: Dict[str, List[HarvesterSummary]] = {}
+    for harvester in farm_summary.harvesters:
+        if not harvester.is_local:
+            remote_harvesters_by_host.setdefault(harvester.host, []).append(harvester)
+
+    if len(local_harvesters) > 0:
+        print(f"Local Harvester{'s' if len(local_harvesters) > 1 else ''}")
+        for harvester in local_harvesters:
+            print(f"   {_format_harvester(harvester)}")
+    for host, harvesters in remote_harvesters_by_host.items():
+        print(f"Remote Harvester{'s' if len(harvesters) > 1 else ''} for IP: {host}")
+        for harvester in harvesters:
+            print(f"   {_format_harvester(harvester)}")
+
+    print(f"Plot count for all harvesters: {farm_summary.total_plots}")
+
+    print(
+        f"Total size of plots: {format_bytes(farm_summary.total_plot_size)}, "
+        f"{format_bytes(farm_summary.total_effective_plot_size)}e (effective)"
+    )
+
+    print()
+    _print_connections(farm_summary.connections)
+
+
+def _print_connections(connections: List[Dict[str, Any]]):
+    """
+    Renders the connections like `chia peer -c`.
+    """
+    print("Connections:")
+    print("Type      IP                                      Ports       NodeID      Last Connect      MiB Up|Dwn")
+    for connection in connections:
+        node_type = NodeType(connection["type"])
+        last_connect = strftime("%b %d %T", localtime(connection["last_message_time"]))
+        print(
+            f"{node_type.name:9} {connection['peer_host'].strip('[]'):39} "
+            f"{connection['peer_port']:5}/{connection['peer_server_port']:<5} "
+            f"{connection['node_id'].hex()[:8]}... "
+            f"{last_connect}  "
+            f"{connection['bytes_written'] / 2 ** 20:7.1f}|{connection['bytes_read'] / 2 ** 20:<7.1f}"
+        )
+        if node_type is not NodeType.FULL_NODE:
+            continue
+        peak_height = connection.get("peak_height")
+        peak_hash = connection.get("peak_hash")
+        if peak_hash is not None:
+            peak_hash = f"{peak_hash.removeprefix('0x').removeprefix('0X')[:8]}..."
+        print(
+            f"{'':50}-Height: {f'{peak_height:8.0f}' if peak_height is not None else 'No Info'}    "
+            f"-Hash: {peak_hash or 'No Info'}"
+        )
+
+
+async def _watch_farm_summary(farmer_client: FarmerRpcClient, as_json: bool, interval_seconds: int):
+    previous_states: Dict[str, Tuple[bool, int, int, int, int, int]] = {}
+    previous_totals: Optional[Tuple[int, int, int]] = None
+    while True:
+        try:
+            # The connections are not printed when watching
+            farm_summary = await fetch_farm_summary(farmer_client, include_connections=False)
+        except Exception as e:
+            print(
+                f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Could not refresh the summary, retrying: {e}",
+                file=stderr,
+                flush=True,
+            )
+            await sleep(interval_seconds)
+
+            continue
+        changed_harvesters = [
+            harvester
+            for harvester in farm_summary.harvesters
+            if previous_states.get(harvester.node_id) != harvester.state
+        ]
+        current_node_ids = {harvester.node_id for harvester in farm_summary.harvesters}
+        removed_node_ids = [node_id for node_id in previous_states.keys() if node_id not in current_node_ids]
+        totals = (farm_summary.total_plots, farm_summary.total_plot_size, farm_summary.total_effective_plot_size)
+        previous_states = {harvester.node_id: harvester.state for harvester in farm_summary.harvesters}
+        if len(changed_harvesters) > 0 or len(removed_node_ids) > 0 or totals != previous_totals:
+            previous_totals = totals
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if as_json:
+                print(
+                    json.dumps(
+                        {
+                            "timestamp": timestamp,
+                            "changed_harvesters": [asdict(harvester) for harvester in changed_harvesters],
+                            "removed_harvesters": removed_node_ids,
+                            "total_plots": farm_summary.total_plots,
+                            "total_plot_size": farm_summary.total_plot_size,
+                            "total_effective_plot_size": farm_summary.total_effective_plot_size,
+                        }
+                    ),
+                    flush=True,
+                )
             else:
-                total_plot_size_harvester = harvester_dict["total_plot_size"]
-                total_effective_plot_size_harvester = harvester_dict["total_effective_plot_size"]
-                plot_count_harvester = harvester_dict["plots"]
-                PlotStats.total_plot_size += total_plot_size_harvester
-                PlotStats.total_effective_plot_size += total_effective_plot_size_harvester
-                PlotStats.total_plots += plot_count_harvester
+                for harvester in changed_harvesters:
+                    print(
+                        f"[{timestamp}] {harvester.host} ({harvester.node_id[:8]}...): {_format_harvester(harvester)}"
+                    )
+                for node_id in removed_node_ids:
+                    print(f"[{timestamp}] Harvester {node_id[:8]}... disconnected")
                 print(
-                    f"   {plot_count_harvester} plots of size: {format_bytes(total_plot_size_harvester)} on-disk, "
-                    f"{format_bytes(total_effective_plot_size_harvester)}e (effective)"
+                    f"[{timestamp}] Plot count for all harvesters: {farm_summary.total_plots}, total size of plots: "
+                    f"{format_bytes(farm_summary.total_plot_size)}, "
+                    f"{format_bytes(farm_summary.total_effective_plot_size)}e (effective)",
+                    flush=True,
                 )
+        await sleep(interval_seconds)
 
-    if len(harvesters_local) > 0:
-        print(f"Local Harvester{'s' if len(harvesters_local) > 1 else ''}")
-        process_harvesters(harvesters_local)
-    for harvester_ip, harvester_peers in harvesters_remote.items():
-        print(f"Remote Harvester{'s' if len(harvester_peers) > 1 else ''} for IP: {harvester_ip}")
-        process_harvesters(harvester_peers)
 
-    print(f"Plot count for all harvesters: {PlotStats.total_plots}")
+def _format_harvester(harvester: HarvesterSummary) -> str:
+    if harvester.is_syncing:
+        return f"Loading plots: {harvester.plot_files_processed} / {harvester.plot_files_total}"
 
-    print(
-        f"Total size of plots: {format_bytes(PlotStats.total_plot_size)}, "
-        f"{format_bytes(PlotStats.total_effective_plot_size)}e (effective)"
+    return (
+        f"{harvester.plots} plots of size: {format_bytes(harvester.total_plot_size)} on-disk, "
+        f"{format_bytes(harvester.total_effective_plot_size)}e (effective)"
     )
 
-    async with get_any_service_client(FarmerRpcClient, root_path=root_path) as (farmer_client, _):
-        print()
-        await print_connections(farmer_client, {})
+
+def _farm_summary_to_json_dict(farm_summary: FarmSummary) -> Dict[str, Any]:
+    json_dict = asdict(farm_summary)
+    json_dict["connections"] = [
+        {**connection, "node_id": connection["node_id"].hex()} for connection in farm_summary.connections
+    ]
+
+    return json_dict
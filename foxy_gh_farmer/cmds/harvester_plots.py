@@ -0,0 +1,235 @@
+import json
+from asyncio import run, gather, create_task, as_completed, Semaphore
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, AsyncIterator, Optional
+
+import click
+from chia.rpc.farmer_rpc_api import PlotInfoRequestData, PlotPathRequestData
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.ints import uint32
+
+from foxy_gh_farmer.util.chia_config import load_chia_config
+from foxy_gh_farmer.util.farmer_control import create_service_rpc_client
+
+
+@dataclass
+class HarvesterPlotReport:
+    node_id: str
+    host: str
+    valid_plots: int = 0
+    invalid_plots: List[str] = field(default_factory=list)
+    keys_missing_plots: List[str] = field(default_factory=list)
+    duplicate_plots: List[str] = field(default_factory=list)
+    # Set when the plots of the harvester could not be fetched, e.g. because it disconnected meanwhile
+    error: Optional[str] = None
+
+
+@dataclass
+class PlotReport:
+    harvesters: List[HarvesterPlotReport] = field(default_factory=list)
+    # Plots with the same plot ID on more than one harvester, by plot ID
+    duplicates_across_harvesters: Dict[str, List[str]] = field(default_factory=dict)
+
+
+@click.command("harvester-plots", short_help="Report invalid, duplicate and keys missing plots of all harvesters")
+@click.option(
+    "--page-size",
+    default=500,
+    help="The amount of plots to request per page",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    default=8,
+    help="The maximum amount of concurrent page requests",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
+@click.option(
+    "--list",
+    "list_plots",
+    is_flag=True,
+    default=False,
+    help="List the paths of the affected plots",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print the report as JSON",
+)
+@click.pass_context
+def harvester_plots_cmd(ctx, page_size: int, concurrency: int, list_plots: bool, as_json: bool) -> None:
+    foxy_root: Path = ctx.obj["root_path"]
+
+    run(print_harvester_plots(foxy_root, page_size, concurrency, list_plots, as_json))
+
+
+async def print_harvester_plots(root_path: Path, page_size: int, concurrency: int, list_plots: bool, as_json: bool):
+    config = load_chia_config(root_path)
+    farmer_client = await create_service_rpc_client(FarmerRpcClient, root_path, config)
+    try:
+        plot_report = await fetch_plot_report(farmer_client, page_size, concurrency)
+    finally:
+        farmer_client.close()
+        await farmer_client.await_closed()
+
+    if as_json:
+        print(json.dumps(asdict(plot_report), indent=2))
+    else:
+        _print_plot_report(plot_report, list_plots)
+    if any(harvester.error is not None for harvester in plot_report.harvesters):
+        exit(1)
+
+
+async def fetch_plot_report(farmer_client: FarmerRpcClient, page_size: int, concurrency: int) -> PlotReport:
+    """
+    Streams the paginated plot lists of all harvesters with at most `concurrency` requests in flight. Each page is
+    aggregated and dropped as soon as it arrives, only the plot IDs and the paths of affected plots are kept.
+    """
+    harvesters_summary = await farmer_client.get_harvesters_summary()
+    semaphore = Semaphore(concurrency)
+    plot_report = PlotReport()
+    # The first harvester and filename seen for every plot ID
+    plot_locations: Dict[str, Tuple[int, str]] = {}
+    # All harvesters and filenames of plot IDs seen on more than one harvester
+    duplicate_locations: Dict[str, List[Tuple[int, str]]] = {}
+
+    async def collect_harvester_plots(harvester_index: int, harvester_report: HarvesterPlotReport):
+        node_id = bytes32.from_hexstr(harvester_report.node_id)
+
+        async def fetch_valid(page: int) -> Dict[str, Any]:
+            return await farmer_client.get_harvester_plots_valid(
+                PlotInfoRequestData(node_id=node_id, page=uint32(page), page_size=uint32(page_size))
+            )
+
+        def make_fetch_paths(fetch: Callable[[PlotPathRequestData], Awaitable[Dict[str, Any]]]):
+            async def fetch_paths(page: int) -> Dict[str, Any]:
+                return await fetch(PlotPathRequestData(node_id=node_id, page=uint32(page), page_size=uint32(page_size)))
+
+            return fetch_paths
+
+        async def collect_valid():
+            async for response in _stream_pages(fetch_valid, semaphore):
+                for plot in response["plots"]:
+                    harvester_report.valid_plots += 1
+                    plot_id: str = plot["plot_id"]
+                    location = plot_locations.setdefault(plot_id, (harvester_index, plot["filename"]))
+                    if location[0] == harvester_index:
+                        continue
+                    duplicate_locations.setdefault(plot_id, [location]).append((harvester_index, plot["filename"]))
+
+        async def collect_paths(fetch: Callable[[PlotPathRequestData], Awaitable[Dict[str, Any]]], paths: List[str]):
+            async for response in _stream_pages(make_fetch_paths(fetch), semaphore):
+                paths.extend(response["plots"])
+
+        tasks = [
+            create_task(collect_valid()),
+            create_task(collect_paths(farmer_client.get_harvester_plots_invalid, harvester_report.invalid_plots)),
+            create_task(
+                collect_paths(farmer_client.get_harvester_plots_keys_missing, harvester_report.keys_missing_plots)
+            ),
+            create_task(collect_paths(farmer_client.get_harvester_plots_duplicates, harvester_report.duplicate_plots)),
+        ]
+        try:
+            await gather(*tasks)
+        except Exception as e:
+            # A single failing harvester should not fail the report of all the others
+            for task in tasks:
+                task.cancel()
+            harvester_report.error = f"{type(e).__name__}: {e}"
+            remove_harvester_plot_locations(harvester_index)
+
+    def remove_harvester_plot_locations(harvester_index: int):
+        # The plots of a failed harvester are incomplete, they must not show up as duplicates of other harvesters
+        for plot_id, locations in list(duplicate_locations.items()):
+            locations = [location for location in locations if location[0] != harvester_index]
+            plot_locations[plot_id] = locations[0]
+            if len({index for index, _ in locations}) > 1:
+                duplicate_locations[plot_id] = locations
+            else:
+                del duplicate_locations[plot_id]
+        for plot_id, location in list(plot_locations.items()):
+            if location[0] == harvester_index:
+                del plot_locations[plot_id]
+
+    for harvester in harvesters_summary["harvesters"]:
+        plot_report.harvesters.append(
+            HarvesterPlotReport(
+                node_id=harvester["connection"]["node_id"],
+                host=harvester["connection"]["host"],
+            )
+        )
+    await gather(
+        *[
+            collect_harvester_plots(index, harvester_report)
+            for index, harvester_report in enumerate(plot_report.harvesters)
+        ]
+    )
+    plot_report.duplicates_across_harvesters = {
+        plot_id: [f"{plot_report.harvesters[index].host}:{filename}" for index, filename in locations]
+        for plot_id, locations in duplicate_locations.items()
+    }
+
+    return plot_report
+
+
+async def _stream_pages(
+    fetch_page: Callable[[int], Awaitable[Dict[str, Any]]], semaphore: Semaphore
+) -> AsyncIterator[Dict[str, Any]]:
+    async def fetch_page_bounded(page: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_page(page)
+
+    first_page = await fetch_page_bounded(0)
+    yield first_page
+    tasks = [create_task(fetch_page_bounded(page)) for page in range(1, first_page["page_count"])]
+    try:
+        for next_page in as_completed(tasks):
+            yield await next_page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _print_plot_report(plot_report: PlotReport, list_plots: bool):
+    for harvester in plot_report.harvesters:
+        if harvester.error is not None:
+            print(
+                f"Harvester {harvester.host} ({harvester.node_id[:8]}...): failed to fetch the plots: {harvester.error}"
+            )
+
+            continue
+        print(
+            f"Harvester {harvester.host} ({harvester.node_id[:8]}...): {harvester.valid_plots} valid, "
+            f"{len(harvester.invalid_plots)} invalid, {len(harvester.keys_missing_plots)} keys missing, "
+            f"{len(harvester.duplicate_plots)} duplicates"
+        )
+        if not list_plots:
+            continue
+        for reason, paths in [
+            ("invalid", harvester.invalid_plots),
+            ("keys missing", harvester.keys_missing_plots),
+            ("duplicate", harvester.duplicate_plots),
+        ]:
+            for path in sorted(paths):
+                print(f"   {reason}: {path}")
+
+    # The plots of harvesters which failed are incomplete
+    harvesters = [harvester for harvester in plot_report.harvesters if harvester.error is None]
+    print(
+        f"All harvesters: {sum(harvester.valid_plots for harvester in harvesters)} valid, "
+        f"{sum(len(harvester.invalid_plots) for harvester in harvesters)} invalid, "
+        f"{sum(len(harvester.keys_missing_plots) for harvester in harvesters)} keys missing, "
+        f"{sum(len(harvester.duplicate_plots) for harvester in harvesters)} duplicates, "
+        f"{len(plot_report.duplicates_across_harvesters)} plots on more than one harvester"
+    )
+    if list_plots:
+        for plot_id, locations in plot_report.duplicates_across_harvesters.items():
+            print(f"{plot_id}:")
+            for location in locations:
+                print(f"   {location}")
@@ -0,0 +1,71 @@
+import json
+from asyncio import run, wait_for, TimeoutError
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import click
+
+from foxy_gh_farmer.foundation.control.control_client import ControlRequestError
+from foxy_gh_farmer.foundation.control.control_server import is_control_socket_supported
+from foxy_gh_farmer.util.farmer_control import connect_to_running_farmer
+
+
+@click.command("health", short_help="Check the health of the running farmer, exits with 1 when unhealthy")
+@click.option(
+    "--timeout",
+    default=5,
+    help="The time in seconds to wait for the running farmer to respond",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print the health as JSON",
+)
+@click.pass_context
+def health_cmd(ctx, timeout: int, as_json: bool) -> None:
+    foxy_root: Path = ctx.obj["root_path"]
+    if not is_control_socket_supported():
+        print("The health command is not supported on Windows")
+        exit(1)
+
+    health = run(fetch_health(foxy_root, timeout))
+    if as_json:
+        print(json.dumps(health if health is not None else {"healthy": False, "running": False}, indent=2))
+    elif health is None:
+        print("Foxy-GH-Farmer is not running or not responding")
+    else:
+        _print_health(health)
+    if health is None or not health["healthy"]:
+        exit(1)
+
+
+async def fetch_health(root_path: Path, timeout_seconds: float) -> Optional[Dict[str, Any]]:
+    control_client = await connect_to_running_farmer(root_path)
+    if control_client is None:
+        return None
+    try:
+        health: Dict[str, Any] = await wait_for(control_client.request("health", {}), timeout=timeout_seconds)
+
+        return {**health, "running": True}
+    except (TimeoutError, ConnectionError, ControlRequestError):
+        return None
+    finally:
+        control_client.close()
+        await control_client.await_closed()
+
+
+def _print_health(health: Dict[str, Any]):
+    if not health["daemon_running"]:
+        print("The daemon is not running")
+    for alert in health["alerts"]:
+        note = "" if alert["is_unhealthy"] else " (informational)"
+        print(
+            f"[since {datetime.fromtimestamp(alert['since']).strftime('%Y-%m-%d %H:%M:%S')}] {alert['message']}{note}"
+        )
+    if health["healthy"]:
+        print("Healthy")
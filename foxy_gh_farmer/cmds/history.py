@@ -0,0 +1,167 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from time import time
+from typing import Optional, List
+
+import click
+from chia.util.misc import format_bytes
+
+from foxy_gh_farmer.farm_history_recorder import get_farm_history_path
+from foxy_gh_farmer.foundation.history.time_series_store import TimeSeriesStore, TimeSeriesPoint
+
+_farm_series_names = [
+    "farm.harvesters",
+    "farm.syncing_harvesters",
+    "farm.plots",
+    "farm.plot_size_bytes",
+    "farm.effective_plot_size_bytes",
+    "eligible_plots.mean",
+    "proof_lookup.p50_seconds",
+    "proof_lookup.p95_seconds",
+    "proof_lookup.p99_seconds",
+    "proof_lookup.max_seconds",
+]
+_harvester_series_suffixes = [
+    "sync_progress",
+    "plots",
+    "plot_size_bytes",
+    "effective_plot_size_bytes",
+]
+
+
+@click.command("history", short_help="Show the recorded plot counts, sizes, sync progress and proof lookup times")
+@click.option("--hours", default=24, help="The amount of hours to show", type=click.IntRange(min=1), show_default=True)
+@click.option(
+    "--resolution",
+    default=60,
+    help="The length in minutes of the intervals the samples are averaged over",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
+@click.option(
+    "--harvester",
+    "harvester_node_id",
+    default=None,
+    help="Show the history of the harvester with this node ID (prefix) instead of the whole farm",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print the history as JSON",
+)
+@click.pass_context
+def history_cmd(ctx, hours: int, resolution: int, harvester_node_id: Optional[str], as_json: bool) -> None:
+    foxy_root: Path = ctx.obj["root_path"]
+    history_path = get_farm_history_path(foxy_root)
+    if not history_path.exists():
+        print("No farm history was recorded yet, it is recorded while foxy-gh-farmer is running")
+
+        return
+
+    store = TimeSeriesStore(history_path)
+    try:
+        series_prefix = ""
+        series_names = _farm_series_names
+        if harvester_node_id is not None:
+            node_ids = {name.split(".")[1] for name in store.get_series_names(prefix=f"harvester.{harvester_node_id}")}
+            if len(node_ids) != 1:
+                print(
+                    f"{'No' if len(node_ids) == 0 else 'More than one'} harvester matches the node ID "
+                    f"{harvester_node_id}"
+                )
+                exit(1)
+            series_prefix = f"harvester.{node_ids.pop()}."
+            series_names = [f"{series_prefix}{suffix}" for suffix in _harvester_series_suffixes]
+        points = store.query(
+            series_names,
+            since=int(time()) - hours * 60 * 60,
+            resolution_seconds=resolution * 60,
+        )
+    finally:
+        store.close()
+
+    if as_json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "timestamp": point.timestamp,
+                        **{name[len(series_prefix) :]: value for name, value in point.values.items()},
+                    }
+                    for point in points
+                ],
+                indent=2,
+            )
+        )
+
+        return
+    if len(points) == 0:
+        print(f"No samples were recorded in the last {hours} hours")
+
+        return
+    if harvester_node_id is not None:
+        _print_harvester_history(points, series_prefix)
+    else:
+        _print_farm_history(points)
+
+
+def _print_farm_history(points: List[TimeSeriesPoint]):
+    print(
+        f"{'Time':<16}  {'Plots':>8}  {'Size':>12}  {'Effective':>12}  {'Syncing':>7}  {'Eligible':>8}  "
+        f"{'Lookup p50':>10}  {'p95':>8}  {'max':>8}"
+    )
+    for point in points:
+        values = point.values
+        print(
+            f"{_format_timestamp(point.timestamp):<16}  "
+            f"{_format_count(values.get('farm.plots')):>8}  "
+            f"{_format_size(values.get('farm.plot_size_bytes')):>12}  "
+            f"{_format_size(values.get('farm.effective_plot_size_bytes')):>12}  "
+            f"{_format_count(values.get('farm.syncing_harvesters')):>7}  "
+            f"{_format_count(values.get('eligible_plots.mean')):>8}  "
+            f"{_format_seconds(values.get('proof_lookup.p50_seconds')):>10}  "
+            f"{_format_seconds(values.get('proof_lookup.p95_seconds')):>8}  "
+            f"{_format_seconds(values.get('proof_lookup.max_seconds')):>8}"
+        )
+
+
+def _print_harvester_history(points: List[TimeSeriesPoint], series_prefix: str):
+    print(f"{'Time':<16}  {'Plots':>8}  {'Size':>12}  {'Effective':>12}  {'Synced':>7}")
+    for point in points:
+        values = point.values
+        sync_progress = values.get(f"{series_prefix}sync_progress")
+        print(
+            f"{_format_timestamp(point.timestamp):<16}  "
+            f"{_format_count(values.get(f'{series_prefix}plots')):>8}  "
+            f"{_format_size(values.get(f'{series_prefix}plot_size_bytes')):>12}  "
+            f"{_format_size(values.get(f'{series_prefix}effective_plot_size_bytes')):>12}  "
+            f"{f'{sync_progress:.0%}' if sync_progress is not None else '-':>7}"
+        )
+
+
+def _format_timestamp(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def _format_count(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+
+    return f"{value:.0f}"
+
+
+def _format_size(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+
+    return format_bytes(int(value))
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+
+    return f"{value:.2f}s"
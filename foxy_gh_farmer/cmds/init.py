@@ -1,28 +1,47 @@
 from asyncio import run
 from pathlib import Path
+from typing import Dict, Any
 
 import click
 from yaspin import yaspin
 
 from foxy_gh_farmer.foxy_chia_config_manager import FoxyChiaConfigManager
-from foxy_gh_farmer.gigahorse_binary_manager import GigahorseBinaryManager
+from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
+from foxy_gh_farmer.gigahorse_binary_manager import create_binary_manager
 
 
 @click.command("init", short_help="Ensure the configurations and gigahorse binary are available")
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only print the config changes which would be made, without writing them",
+)
 @click.pass_context
-def init_cmd(ctx) -> None:
+def init_cmd(ctx, dry_run: bool) -> None:
     foxy_root: Path = ctx.obj["root_path"]
     config_path: Path = ctx.obj["config_path"]
 
     foxy_chia_config_manager = FoxyChiaConfigManager(foxy_root)
-    foxy_chia_config_manager.ensure_foxy_config(config_path)
+    config_patch_result = foxy_chia_config_manager.ensure_foxy_config(config_path, dry_run=dry_run)
+    if dry_run:
+        if len(config_patch_result.changes) == 0:
+            print("The configs are up to date")
+
+            return
+        for change in config_patch_result.changes:
+            print(change)
+
+        return
+
+    foxy_config = FoxyConfigManager(config_path).load_config()
 
     with yaspin(text="Ensuring the gigahorse binary is available"):
-        run(_init_gigahorse())
+        run(_init_gigahorse(foxy_config))
 
     print("Init done")
 
 
-async def _init_gigahorse():
-    binary_manager = GigahorseBinaryManager()
+async def _init_gigahorse(foxy_config: Dict[str, Any]):
+    binary_manager = create_binary_manager(foxy_config)
     await binary_manager.get_binary_directory_path()
@@ -8,8 +8,7 @@ from chia.cmds.cmds_util import get_wallet, cli_confirm
 from chia.cmds.units import units
 from chia.daemon.client import DaemonProxy
 from chia.rpc.wallet_rpc_client import WalletRpcClient
-from chia.util.config import load_config
-from chia.util.ints import uint16, uint64
+from chia.util.ints import uint64
 from yaspin import yaspin
 
 from foxy_gh_farmer.foundation.wallet.pool_join import get_plot_nft_not_pooling_with_foxy, join_plot_nfts_to_pool, \
@@ -18,8 +17,9 @@ from foxy_gh_farmer.foundation.wallet.sync import wait_for_wallet_sync
 from foxy_gh_farmer.foxy_chia_config_manager import FoxyChiaConfigManager
 from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
 from foxy_gh_farmer.gigahorse_launcher import ensure_daemon_running_and_unlocked, async_start
+from foxy_gh_farmer.util.chia_config import load_chia_config
 from foxy_gh_farmer.util.daemon import shutdown_daemon
-
+from foxy_gh_farmer.util.farmer_control import create_service_rpc_client
 
 @click.command("join-pool", short_help="Join your PlotNFTs to the pool")
 @click.option(
@@ -50,18 +50,13 @@ async def join_pool(
     config_path: Path,
     fee: uint64,
 ):
-    config = load_config(foxy_root, "config.yaml")
+    config = load_chia_config(foxy_root)
     foxy_config_manager = FoxyConfigManager(config_path)
     foxy_config = foxy_config_manager.load_config()
 
     (daemon_proxy, close_daemon_on_exit) = await start_wallet(foxy_root, config, foxy_config)
 
-    wallet_rpc = await WalletRpcClient.create(
-        config["self_hostname"],
-        uint16(config["wallet"]["rpc_port"]),
-        foxy_root,
-        config,
-    )
+    wallet_rpc = await create_service_rpc_client(WalletRpcClient, foxy_root, config)
 
     async def is_wallet_reachable() -> bool:
         try:
@@ -107,7 +102,7 @@ async def join_pool(
 
 
 def update_foxy_config_plot_nfts_if_required(foxy_root: Path, foxy_config: Dict[str, Any], foxy_config_manager: FoxyConfigManager):
-    config = load_config(foxy_root, "config.yaml")
+    config = load_chia_config(foxy_root)
     pool_list: Optional[List[Dict[str, Any]]] = config["pool"].get("pool_list")
     if pool_list is None:
         return
@@ -0,0 +1,109 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import click
+from chia.util.misc import format_bytes
+
+from foxy_gh_farmer.foundation.plots.plot_inventory import PlotInventory
+from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
+
+
+def get_plot_inventory_path(root_path: Path) -> Path:
+    return root_path / "db" / "plot_inventory.sqlite"
+
+
+@click.command("plots", short_help="Index the plots in the plot directories and report missing or duplicate plots")
+@click.option(
+    "--duplicates",
+    is_flag=True,
+    default=False,
+    help="List the paths of plots which exist more than once",
+)
+@click.option(
+    "--missing",
+    is_flag=True,
+    default=False,
+    help="List plots of directories which became unreadable",
+)
+@click.option(
+    "--invalid",
+    is_flag=True,
+    default=False,
+    help="List plot files whose header could not be read",
+)
+@click.option(
+    "--forget-missing",
+    is_flag=True,
+    default=False,
+    help="Remove the missing plots from the index",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    default=False,
+    help="List all plot directories again, instead of only the changed ones",
+)
+@click.pass_context
+def plots_cmd(ctx, duplicates: bool, missing: bool, invalid: bool, forget_missing: bool, full: bool) -> None:
+    foxy_root: Path = ctx.obj["root_path"]
+    config_path: Path = ctx.obj["config_path"]
+    foxy_config = FoxyConfigManager(config_path).load_config()
+
+    plot_inventory = PlotInventory(get_plot_inventory_path(foxy_root))
+    try:
+        result = plot_inventory.refresh(
+            plot_directories=foxy_config.get("plot_directories") or [],
+            recursive=foxy_config.get("recursive_plot_scan", False),
+            full=full,
+        )
+        print(
+            f"Refreshed the plot index in {result.duration_seconds:.2f}s: {result.scanned_directories} directories "
+            f"scanned, {result.unchanged_directories} unchanged, {result.added_plots} plots added, "
+            f"{result.updated_plots} updated, {result.removed_plots} removed"
+        )
+        for directory in result.unreadable_directories:
+            print(f"Unreadable directory: {directory}")
+
+        total_plots = 0
+        total_size = 0
+        for group in plot_inventory.get_summary():
+            total_plots += group.plot_count
+            total_size += group.total_size
+            compression = (
+                f"C{group.compression_level}" if group.compression_level is not None else "unknown compression"
+            )
+            print(
+                f"   {group.plot_count} k{group.k_size} {compression} plots of size: {format_bytes(group.total_size)}"
+            )
+        print(f"Plot count: {total_plots}")
+        print(f"Total size of plots: {format_bytes(total_size)}")
+
+        duplicate_plots = plot_inventory.get_duplicate_plots()
+        missing_plots = plot_inventory.get_missing_plots()
+        invalid_plots = plot_inventory.get_invalid_plots()
+        print(f"Duplicate plots: {len(duplicate_plots)}")
+        print(f"Missing plots: {len(missing_plots)}")
+        print(f"Invalid plots: {len(invalid_plots)}")
+        if duplicates:
+            for plot_id, paths in duplicate_plots.items():
+                print(f"{plot_id}:")
+                for path in paths:
+                    print(f"   {path}")
+        if missing:
+            for plot in missing_plots:
+                print(f"{plot.path} (missing since {_format_timestamp(plot.missing_since)})")
+        if invalid:
+            for plot in invalid_plots:
+                print(plot.path)
+        if forget_missing:
+            print(f"Removed {plot_inventory.forget_missing_plots()} missing plots from the index")
+    finally:
+        plot_inventory.close()
+
+
+def _format_timestamp(timestamp: Optional[int]) -> str:
+    if timestamp is None:
+        return "unknown"
+
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,227 @@
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Any, List, Set, Optional
+
+from chia.rpc.harvester_rpc_client import HarvesterRpcClient
+from chia.util.ints import uint16
+from yaml import YAMLError
+
+from foxy_gh_farmer.daemon_supervisor import DaemonSupervisor
+from foxy_gh_farmer.foundation.config.config_file_watcher import ConfigFileWatcher
+from foxy_gh_farmer.foundation.config.config_patch_plan import ConfigPatchResult, chia_config_name
+from foxy_gh_farmer.foundation.config.yaml_file import load_cached_yaml
+from foxy_gh_farmer.foundation.proxy.tcp_load_balancer import TcpLoadBalancer
+from foxy_gh_farmer.foxy_chia_config_manager import get_config_patch_plan
+from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
+from foxy_gh_farmer.recompute_proxy import get_recompute_hosts, parse_recompute_host
+from foxy_gh_farmer.util.chia_config import load_chia_config, save_chia_config
+
+# These are only read on startup by foxy-gh-farmer itself or change how it connects to the services
+_process_restart_keys = {
+    "enable_harvester",
+    "listen_host",
+    "chia_daemon_port",
+    "chia_farmer_rpc_port",
+    "chia_harvester_rpc_port",
+    "chia_wallet_rpc_port",
+    "syslog_port",
+    "syslog_receive_buffer_size",
+    "syslog_queue_size",
+    "metrics_host",
+    "metrics_port",
+    "binary_cache_path",
+    "binary_peers",
+    "binary_peer_host",
+    "binary_peer_port",
+    "history_sample_interval_seconds",
+    "history_retention_days",
+    "alert_webhook_url",
+    "alert_command",
+    "proof_lookup_p95_threshold_seconds",
+    "proof_lookup_window_seconds",
+    "harvester_report_timeout_seconds",
+    "recompute_proxy_host",
+    "recompute_proxy_port",
+    "recompute_health_check_interval",
+    # Passed to gigahorse via environment variables when the daemon is started
+    "recompute_connect_timeout",
+    "recompute_retry_interval",
+    "chiapos_max_cores",
+    "chiapos_max_cuda_devices",
+    "chiapos_max_opencl_devices",
+    "chiapos_max_gpu_devices",
+    "chiapos_opencl_platform",
+    "chiapos_min_gpu_log_entries",
+    "cuda_visible_devices",
+}
+# The harvester reads these from the chia config on every plot refresh
+_live_chia_config_key_paths = {
+    "harvester.plot_directories",
+    "harvester.recursive_plot_scan",
+}
+_ignored_chia_config_key_prefixes = ("daemon_port", "wallet.")
+_harvester_services = ["chia_harvester"]
+_farmer_services = ["chia_farmer"]
+
+
+class ConfigReloader:
+    """
+    Watches the foxy-gh-farmer config and applies changes to the running services. Plot directory changes are pushed
+    via the harvester RPC and recompute host changes to the recompute proxy, both do not require a restart. Other
+    changes of the chia config restart the affected services only.
+    """
+
+    _root_path: Path
+    _config_path: Path
+    _foxy_config: Dict[str, Any]
+    _daemon_supervisor: DaemonSupervisor
+    _recompute_proxy: Optional[TcpLoadBalancer]
+    _watcher: ConfigFileWatcher
+    _logger = getLogger("config_reloader")
+
+    def __init__(
+        self,
+        root_path: Path,
+        config_path: Path,
+        foxy_config: Dict[str, Any],
+        daemon_supervisor: DaemonSupervisor,
+        recompute_proxy: Optional[TcpLoadBalancer] = None,
+    ):
+        self._root_path = root_path
+        self._config_path = config_path
+        self._foxy_config = foxy_config
+        self._daemon_supervisor = daemon_supervisor
+        self._recompute_proxy = recompute_proxy
+        self._watcher = ConfigFileWatcher(config_path, self._reload)
+
+    def start(self):
+        self._watcher.start()
+
+    async def stop(self):
+        await self._watcher.stop()
+
+    async def _reload(self):
+        try:
+            foxy_config = load_cached_yaml(self._config_path)
+        except YAMLError as e:
+            self._logger.error(f"Failed to parse {self._config_path}, ignoring the changes: {e}")
+
+            return
+        if not isinstance(foxy_config, dict):
+            return
+        changed_keys = sorted(
+            key
+            for key in foxy_config.keys() | self._foxy_config.keys()
+            if foxy_config.get(key) != self._foxy_config.get(key)
+        )
+        if len(changed_keys) == 0:
+            return
+        self._logger.info(f"Applying config changes of: {', '.join(changed_keys)}")
+        process_restart_keys = [key for key in changed_keys if key in _process_restart_keys]
+        if "recompute_hosts" in changed_keys:
+            if self._recompute_proxy is not None:
+                self._update_recompute_hosts(foxy_config)
+            else:
+                process_restart_keys.append("recompute_hosts")
+        if len(process_restart_keys) > 0:
+            self._logger.warning(f"Changes to {', '.join(process_restart_keys)} require restarting foxy-gh-farmer")
+
+        is_harvester_enabled = self._foxy_config.get("enable_harvester") is True
+        did_update_plot_directories_fail = False
+        if is_harvester_enabled and "plot_directories" in changed_keys:
+            try:
+                await self._update_plot_directories(
+                    previous_plot_directories=self._foxy_config.get("plot_directories") or [],
+                    plot_directories=foxy_config.get("plot_directories") or [],
+                )
+            except Exception as e:
+                # The harvester picks the plot directories up from the patched chia config when it is restarted
+                self._logger.warning(
+                    f"Could not update the plot directories via the harvester RPC, restarting the harvester "
+                    f"instead: {e}"
+                )
+                did_update_plot_directories_fail = True
+
+        config = load_chia_config(self._root_path)
+        config_patch_result = get_config_patch_plan().apply(foxy_farmer_config=foxy_config, chia_config=config)
+        if config_patch_result.foxy_farmer_config_was_updated:
+            FoxyConfigManager(self._config_path).save_config(foxy_config)
+        if config_patch_result.chia_config_was_updated:
+            save_chia_config(self._root_path, config)
+        self._foxy_config = foxy_config
+
+        services_to_restart = self._get_services_to_restart(config_patch_result)
+        if did_update_plot_directories_fail:
+            services_to_restart = sorted(set(services_to_restart) | set(_harvester_services))
+        if len(services_to_restart) > 0:
+            await self._daemon_supervisor.restart_services(services_to_restart, config)
+        elif is_harvester_enabled and any(
+            change.key_path in _live_chia_config_key_paths for change in config_patch_result.changes
+        ):
+            await self._refresh_plots(config)
+
+    def _update_recompute_hosts(self, foxy_config: Dict[str, Any]):
+        assert self._recompute_proxy is not None
+        try:
+            recompute_hosts = [parse_recompute_host(host) for host in get_recompute_hosts(foxy_config)]
+        except ValueError as e:
+            self._logger.error(f"Invalid recompute host, ignoring the changes: {e}")
+
+            return
+        if len(recompute_hosts) == 0:
+            self._logger.error("The recompute proxy requires at least one recompute host, ignoring the changes")
+
+            return
+        self._recompute_proxy.set_backends(recompute_hosts)
+        self._logger.info(
+            f"Updated the recompute hosts to: {', '.join(f'{host}:{port}' for host, port in recompute_hosts)}"
+        )
+
+    async def _update_plot_directories(self, previous_plot_directories: List[str], plot_directories: List[str]):
+        config = load_chia_config(self._root_path)
+        harvester_rpc_client = await self._create_harvester_rpc_client(config)
+        try:
+            for plot_directory in set(previous_plot_directories) - set(plot_directories):
+                await harvester_rpc_client.remove_plot_directory(plot_directory)
+                self._logger.info(f"Removed plot directory {plot_directory}")
+            for plot_directory in set(plot_directories) - set(previous_plot_directories):
+                try:
+                    await harvester_rpc_client.add_plot_directory(plot_directory)
+                    self._logger.info(f"Added plot directory {plot_directory}")
+                except ValueError as e:
+                    self._logger.warning(f"Could not add plot directory {plot_directory}: {e}")
+        finally:
+            harvester_rpc_client.close()
+            await harvester_rpc_client.await_closed()
+
+    async def _refresh_plots(self, config: Dict[str, Any]):
+        harvester_rpc_client = await self._create_harvester_rpc_client(config)
+        try:
+            await harvester_rpc_client.refresh_plots()
+        finally:
+            harvester_rpc_client.close()
+            await harvester_rpc_client.await_closed()
+
+    async def _create_harvester_rpc_client(self, config: Dict[str, Any]) -> HarvesterRpcClient:
+        return await HarvesterRpcClient.create(
+            config["self_hostname"],
+            uint16(config["harvester"]["rpc_port"]),
+            self._root_path,
+            config,
+        )
+
+    def _get_services_to_restart(self, config_patch_result: ConfigPatchResult) -> List[str]:
+        services: Set[str] = set()
+        for change in config_patch_result.changes:
+            if change.config_name != chia_config_name or change.key_path in _live_chia_config_key_paths:
+                continue
+            if change.key_path.startswith(_ignored_chia_config_key_prefixes):
+                continue
+            if change.key_path.startswith("harvester."):
+                services.update(_harvester_services)
+            elif change.key_path.startswith(("farmer.", "pool.")):
+                services.update(_farmer_services)
+            else:
+                services.update(_harvester_services + _farmer_services)
+
+        return sorted(services)
@@ -0,0 +1,241 @@
+from asyncio import create_task, sleep, wait, FIRST_COMPLETED, Task, CancelledError, Lock
+from logging import getLogger
+from pathlib import Path
+from subprocess import Popen
+from time import monotonic
+from typing import Dict, Any, List, Optional
+
+from chia.daemon.client import DaemonProxy
+from chia.util.service_groups import services_for_groups
+from psutil import Process, NoSuchProcess
+
+from foxy_gh_farmer.foundation.util.process import wait_for_process_exit, wait_for_pid_exit
+from foxy_gh_farmer.gigahorse_launcher import (
+    ensure_daemon_process_running_and_unlocked,
+    async_start,
+    await_services_ready,
+)
+from foxy_gh_farmer.util.daemon import shutdown_daemon
+
+_initial_restart_backoff_seconds = 5
+_max_restart_backoff_seconds = 5 * 60
+# Reset the backoff once the daemon stayed up for this long
+_stable_uptime_seconds = 10 * 60
+# Used when the daemon was not started by us and its processes can not be watched
+_service_check_interval_seconds = 60
+
+
+class DaemonSupervisor:
+    """
+    Starts the daemon and the given services, watches them and restarts them with an exponential backoff when they
+    exit unexpectedly.
+    """
+
+    _root_path: Path
+    _config: Dict[str, Any]
+    _foxy_config: Dict[str, Any]
+    _service_groups: List[str]
+    _daemon_proxy: Optional[DaemonProxy] = None
+    _daemon_process: Optional[Popen] = None
+    _supervise_task: Optional[Task] = None
+    _started_at: Optional[float] = None
+    _consecutive_failures: int = 0
+    _restart_lock: Lock
+    _logger = getLogger("daemon_supervisor")
+    daemon_restarts: int = 0
+    service_restarts: int = 0
+    downtime_seconds: float = 0
+
+    def __init__(self, root_path: Path, config: Dict[str, Any], foxy_config: Dict[str, Any], service_groups: List[str]):
+        self._root_path = root_path
+        self._config = config
+        self._foxy_config = foxy_config
+        self._service_groups = service_groups
+        self._restart_lock = Lock()
+
+    @property
+    def daemon_proxy(self) -> Optional[DaemonProxy]:
+        return self._daemon_proxy
+
+    @property
+    def supervise_task(self) -> Optional[Task]:
+        return self._supervise_task
+
+    @property
+    def is_supervising(self) -> bool:
+        """
+        Whether the daemon is watched and restarted, also while waiting for or running a restart.
+        """
+        return self._supervise_task is not None and not self._supervise_task.done()
+
+    async def start(self):
+        await self._start_daemon_and_services()
+        self._supervise_task = create_task(self._supervise())
+
+    async def stop(self):
+        if self._supervise_task is not None:
+            self._supervise_task.cancel()
+            try:
+                await self._supervise_task
+            except CancelledError:
+                pass
+            self._supervise_task = None
+        daemon_proxy = self._daemon_proxy
+        if daemon_proxy is None:
+            return
+        self._daemon_proxy = None
+        await shutdown_daemon(daemon_proxy)
+        await daemon_proxy.close()
+
+    async def restart_services(self, services: List[str], config: Dict[str, Any]):
+        """
+        Restarts the given services on purpose, e.g. to apply config changes, without treating their exit as a failure.
+        """
+        services = [service for service in services if service in services_for_groups(self._service_groups)]
+        if len(services) == 0 or self._daemon_proxy is None:
+            return
+        async with self._restart_lock:
+            self._config = config
+            self._logger.info(f"Restarting {', '.join(services)} to apply the config changes")
+            for service in services:
+                await self._daemon_proxy.stop_service(service_name=service)
+            await async_start(self._daemon_proxy, self._service_groups)
+            await await_services_ready(self._root_path, self._config, self._service_groups)
+            self._started_at = monotonic()
+
+    async def _start_daemon_and_services(self):
+        self._daemon_proxy, self._daemon_process = await ensure_daemon_process_running_and_unlocked(
+            self._root_path,
+            self._config,
+            self._foxy_config,
+            quiet=True,
+        )
+        assert self._daemon_proxy is not None
+        await async_start(self._daemon_proxy, self._service_groups)
+        await await_services_ready(self._root_path, self._config, self._service_groups)
+        self._started_at = monotonic()
+
+    async def _supervise(self):
+        while True:
+            is_daemon_running = await self._wait_for_exit()
+            if is_daemon_running and await self._were_services_restarted_on_purpose():
+                continue
+            down_since = monotonic()
+            if self._started_at is not None and down_since - self._started_at >= _stable_uptime_seconds:
+                self._consecutive_failures = 0
+            backoff_seconds = min(
+                _initial_restart_backoff_seconds * 2**self._consecutive_failures, _max_restart_backoff_seconds
+            )
+            self._consecutive_failures += 1
+            self._logger.warning(
+                f"Restarting in {backoff_seconds} seconds (restart #{self._consecutive_failures} in a row)"
+            )
+            await sleep(backoff_seconds)
+            try:
+                if is_daemon_running:
+                    await self._restart_stopped_services()
+                else:
+                    await self._restart_daemon()
+            except Exception as e:
+                self._logger.error(f"Restart failed: {e}")
+            self.downtime_seconds += monotonic() - down_since
+            self._logger.info(
+                f"Restarts so far: daemon={self.daemon_restarts}, services={self.service_restarts}, "
+                f"total downtime={self.downtime_seconds:.0f}s"
+            )
+
+    async def _wait_for_exit(self) -> bool:
+        """
+        Waits until the daemon or one of its services exits. Returns whether the daemon is still running.
+        """
+        if self._daemon_proxy is None:
+            return False
+        try:
+            stopped_services = await self._get_stopped_services()
+        except Exception as e:
+            self._logger.error(f"The daemon is not reachable: {e}")
+
+            return False
+        if len(stopped_services) > 0:
+            self._logger.error(f"Services are not running: {', '.join(stopped_services)}")
+
+            return True
+        if self._daemon_process is None:
+            return await self._poll_for_exit()
+
+        daemon_exit_task = create_task(wait_for_process_exit(self._daemon_process))
+        tasks: List[Task] = [daemon_exit_task]
+        try:
+            service_processes = Process(self._daemon_process.pid).children()
+        except NoSuchProcess:
+            service_processes = []
+        tasks.extend(create_task(wait_for_pid_exit(process.pid)) for process in service_processes)
+        try:
+            done, _ = await wait(tasks, return_when=FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if daemon_exit_task in done:
+            self._logger.error(f"The daemon exited unexpectedly with exit code {daemon_exit_task.result()}")
+            # Orphaned services would block the ports of the restarted ones
+            for process in service_processes:
+                try:
+                    process.kill()
+                except NoSuchProcess:
+                    pass
+
+            return False
+        self._logger.error("A service exited unexpectedly")
+
+        return True
+
+    async def _were_services_restarted_on_purpose(self) -> bool:
+        async with self._restart_lock:
+            if self._daemon_proxy is None:
+                return False
+            try:
+                return len(await self._get_stopped_services()) == 0
+            except Exception:
+                return False
+
+    async def _poll_for_exit(self) -> bool:
+        while True:
+            await sleep(_service_check_interval_seconds)
+            if self._daemon_proxy is None:
+                return False
+            try:
+                stopped_services = await self._get_stopped_services()
+            except Exception as e:
+                self._logger.error(f"The daemon is not reachable anymore: {e}")
+
+                return False
+            if len(stopped_services) > 0:
+                self._logger.error(f"Services exited unexpectedly: {', '.join(stopped_services)}")
+
+                return True
+
+    async def _get_stopped_services(self) -> List[str]:
+        assert self._daemon_proxy is not None
+
+        return [
+            service
+            for service in services_for_groups(self._service_groups)
+            if not await self._daemon_proxy.is_running(service_name=service)
+        ]
+
+    async def _restart_stopped_services(self):
+        assert self._daemon_proxy is not None
+        stopped_services = await self._get_stopped_services()
+        await async_start(self._daemon_proxy, self._service_groups)
+        self.service_restarts += len(stopped_services)
+        self._started_at = monotonic()
+        if len(stopped_services) > 0:
+            self._logger.info(f"Restarted {', '.join(stopped_services)}")
+
+    async def _restart_daemon(self):
+        if self._daemon_proxy is not None:
+            await self._daemon_proxy.close()
+            self._daemon_proxy = None
+        await self._start_daemon_and_services()
+        self.daemon_restarts += 1
+        self._logger.info("Restarted the daemon")
@@ -0,0 +1,151 @@
+from asyncio import create_task, sleep, shield, to_thread, Task, CancelledError
+from logging import getLogger
+from pathlib import Path
+from time import time
+from typing import Dict, Any, Optional
+
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.util.ints import uint16
+
+from foxy_gh_farmer.foundation.history.time_series_store import TimeSeriesStore
+from foxy_gh_farmer.foundation.syslog.farming_metrics_extractor import FarmingMetricsExtractor
+from foxy_gh_farmer.util.farm_summary import fetch_farm_summary
+
+_compact_interval_seconds = 60 * 60
+
+
+def get_farm_history_path(root_path: Path) -> Path:
+    return root_path / "db" / "farm_history.sqlite"
+
+
+class FarmHistoryRecorder:
+    """
+    Periodically samples the plot counts, plot sizes and sync progress of all harvesters together with the proof lookup
+    times of the local harvester into the farm history.
+    """
+
+    _root_path: Path
+    _config: Dict[str, Any]
+    _farming_metrics: FarmingMetricsExtractor
+    _sample_interval_seconds: int
+    _retention_days: int
+    _store: Optional[TimeSeriesStore] = None
+    _farmer_rpc_client: Optional[FarmerRpcClient] = None
+    _record_task: Optional[Task] = None
+    _write_task: Optional[Task] = None
+    _logger = getLogger("farm_history_recorder")
+
+    def __init__(
+        self,
+        root_path: Path,
+        config: Dict[str, Any],
+        farming_metrics: FarmingMetricsExtractor,
+        sample_interval_seconds: int = 60,
+        retention_days: int = 30,
+    ):
+        self._root_path = root_path
+        self._config = config
+        self._farming_metrics = farming_metrics
+        self._sample_interval_seconds = sample_interval_seconds
+        self._retention_days = retention_days
+
+    def start(self):
+        self._store = TimeSeriesStore(
+            get_farm_history_path(self._root_path),
+            retention_seconds=self._retention_days * 24 * 60 * 60,
+        )
+        self._record_task = create_task(self._record_periodically())
+
+    async def stop(self):
+        if self._record_task is not None:
+            self._record_task.cancel()
+            try:
+                await self._record_task
+            except CancelledError:
+                pass
+            self._record_task = None
+        # A write running on a worker thread can not be cancelled, the store must only be closed once it finished
+        if self._write_task is not None:
+            try:
+                await self._write_task
+            except Exception:
+                pass
+            self._write_task = None
+        if self._farmer_rpc_client is not None:
+            self._farmer_rpc_client.close()
+            await self._farmer_rpc_client.await_closed()
+            self._farmer_rpc_client = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    async def _record_periodically(self):
+        assert self._store is not None
+        last_compacted_at = 0.0
+        while True:
+            await sleep(self._sample_interval_seconds)
+            now = time()
+            try:
+                samples = await self._sample()
+                should_compact = now - last_compacted_at >= _compact_interval_seconds
+                # Compacting a month of samples takes a while, keep the event loop responsive
+                self._write_task = create_task(to_thread(self._write, int(now), samples, should_compact))
+                await shield(self._write_task)
+                if should_compact:
+                    last_compacted_at = now
+            except CancelledError:
+                raise
+            except Exception as e:
+                self._logger.warning(f"Could not record the farm history: {e}")
+
+    def _write(self, timestamp: int, samples: Dict[str, float], should_compact: bool):
+        assert self._store is not None
+        self._store.append(timestamp, samples)
+        if should_compact:
+            self._store.compact(timestamp)
+
+    async def _sample(self) -> Dict[str, float]:
+        samples: Dict[str, float] = {}
+        proof_lookup_times = self._farming_metrics.proof_lookup_times
+        proof_lookup_time_quantiles = proof_lookup_times.quantiles(
+            [0.5, 0.95, 0.99, 1], max_age_seconds=self._sample_interval_seconds
+        )
+        for name, q in [("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1)]:
+            if proof_lookup_time_quantiles[q] is not None:
+                samples[f"proof_lookup.{name}_seconds"] = proof_lookup_time_quantiles[q]
+        eligible_plots_mean = self._farming_metrics.eligible_plots.mean(max_age_seconds=self._sample_interval_seconds)
+        if eligible_plots_mean is not None:
+            samples["eligible_plots.mean"] = eligible_plots_mean
+
+        try:
+            if self._farmer_rpc_client is None:
+                self._farmer_rpc_client = await FarmerRpcClient.create(
+                    self._config["self_hostname"],
+                    uint16(self._config["farmer"]["rpc_port"]),
+                    self._root_path,
+                    self._config,
+                )
+            farm_summary = await fetch_farm_summary(self._farmer_rpc_client, include_connections=False)
+        except CancelledError:
+            raise
+        except Exception as e:
+            self._logger.debug(f"Could not fetch the farm summary: {e}")
+
+            return samples
+        samples["farm.harvesters"] = len(farm_summary.harvesters)
+        samples["farm.syncing_harvesters"] = sum(1 for harvester in farm_summary.harvesters if harvester.is_syncing)
+        samples["farm.plots"] = farm_summary.total_plots
+        samples["farm.plot_size_bytes"] = farm_summary.total_plot_size
+        samples["farm.effective_plot_size_bytes"] = farm_summary.total_effective_plot_size
+        for harvester in farm_summary.harvesters:
+            prefix = f"harvester.{harvester.node_id}"
+            if harvester.is_syncing:
+                samples[f"{prefix}.sync_progress"] = harvester.plot_files_processed / max(1, harvester.plot_files_total)
+
+                continue
+            samples[f"{prefix}.sync_progress"] = 1
+            samples[f"{prefix}.plots"] = harvester.plots
+            samples[f"{prefix}.plot_size_bytes"] = harvester.total_plot_size
+            samples[f"{prefix}.effective_plot_size_bytes"] = harvester.total_effective_plot_size
+
+        return samples
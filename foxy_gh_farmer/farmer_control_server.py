@@ -0,0 +1,95 @@
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from chia.rpc.rpc_client import RpcClient
+from chia.util.ints import uint16
+
+from foxy_gh_farmer.daemon_supervisor import DaemonSupervisor
+from foxy_gh_farmer.foundation.control.control_server import ControlServer
+from foxy_gh_farmer.health_monitor import HealthMonitor
+from foxy_gh_farmer.util.farmer_control import get_control_socket_path, rpc_client_classes_by_config_section
+
+
+class FarmerControlServer:
+    """
+    Lets CLI commands reuse the daemon connection and the RPC clients of the running farmer via a local control socket.
+    """
+
+    _root_path: Path
+    _config: Dict[str, Any]
+    _daemon_supervisor: DaemonSupervisor
+    _health_monitor: HealthMonitor
+    _control_server: ControlServer
+    _rpc_clients: Dict[str, RpcClient]
+    _logger = getLogger("farmer_control_server")
+
+    def __init__(
+        self,
+        root_path: Path,
+        config: Dict[str, Any],
+        daemon_supervisor: DaemonSupervisor,
+        health_monitor: HealthMonitor,
+    ):
+        self._root_path = root_path
+        self._config = config
+        self._daemon_supervisor = daemon_supervisor
+        self._health_monitor = health_monitor
+        self._rpc_clients = {}
+        self._control_server = ControlServer(
+            get_control_socket_path(root_path),
+            {
+                "daemon": self._forward_daemon_request,
+                "rpc": self._forward_rpc_request,
+                "health": self._get_health,
+            },
+        )
+
+    async def start(self):
+        if await self._control_server.start():
+            self._logger.debug(f"Serving the control socket at {get_control_socket_path(self._root_path)}")
+
+    async def stop(self):
+        await self._control_server.stop()
+        for rpc_client in self._rpc_clients.values():
+            rpc_client.close()
+            await rpc_client.await_closed()
+        self._rpc_clients = {}
+
+    async def _get_health(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        return self._health_monitor.get_health()
+
+    async def _forward_daemon_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        daemon_proxy = self._daemon_supervisor.daemon_proxy
+        if daemon_proxy is None:
+            raise ConnectionError("The daemon is not running")
+
+        return await daemon_proxy._get(params["request"])
+
+    async def _forward_rpc_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        rpc_client = await self._get_rpc_client(params["service"])
+        try:
+            return await rpc_client.fetch(params["endpoint"], params["data"])
+        except ValueError as e:
+            # Unsuccessful responses are raised by the RPC client, return them as is so the caller can raise them again
+            if len(e.args) == 1 and isinstance(e.args[0], dict):
+                return e.args[0]
+
+            raise
+
+    async def _get_rpc_client(self, config_section: str) -> RpcClient:
+        rpc_client: Optional[RpcClient] = self._rpc_clients.get(config_section)
+        if rpc_client is not None:
+            return rpc_client
+        rpc_client_class = rpc_client_classes_by_config_section.get(config_section)
+        if rpc_client_class is None:
+            raise ValueError(f"Unknown service: {config_section}")
+        rpc_client = await rpc_client_class.create(
+            self._config["self_hostname"],
+            uint16(self._config[config_section]["rpc_port"]),
+            self._root_path,
+            self._config,
+        )
+        self._rpc_clients[config_section] = rpc_client
+
+        return rpc_client
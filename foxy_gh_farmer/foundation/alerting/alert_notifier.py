@@ -0,0 +1,86 @@
+import os
+from asyncio import create_subprocess_shell, wait_for, TimeoutError
+from dataclasses import dataclass
+from logging import getLogger
+from time import time
+from typing import Optional, Dict, Any
+
+from aiohttp import ClientSession, ClientTimeout
+
+
+@dataclass(frozen=True)
+class Alert:
+    name: str
+    # What the alert is about, e.g. a harvester
+    subject: str
+    message: str
+    # Informational alerts are reported and notified about, but do not make the farm unhealthy
+    is_unhealthy: bool = True
+
+
+class AlertNotifier:
+    """
+    Notifies about alerts which started or stopped firing by posting them as JSON to a webhook and/or running a shell
+    command with the alert in its environment (`FOXY_GH_FARMER_ALERT`, `_SUBJECT`, `_STATE` and `_MESSAGE`).
+    """
+
+    _webhook_url: Optional[str]
+    _command: Optional[str]
+    _timeout_seconds: float
+    _logger = getLogger("alert_notifier")
+
+    def __init__(self, webhook_url: Optional[str] = None, command: Optional[str] = None, timeout_seconds: float = 10):
+        self._webhook_url = webhook_url
+        self._command = command
+        self._timeout_seconds = timeout_seconds
+
+    async def notify(self, alert: Alert, is_firing: bool):
+        payload: Dict[str, Any] = {
+            "alert": alert.name,
+            "subject": alert.subject,
+            "state": "firing" if is_firing else "resolved",
+            "message": alert.message,
+            "timestamp": int(time()),
+        }
+        if self._webhook_url is not None:
+            await self._post_webhook(payload)
+        if self._command is not None:
+            await self._run_command(payload)
+
+    async def _post_webhook(self, payload: Dict[str, Any]):
+        assert self._webhook_url is not None
+        try:
+            async with ClientSession(timeout=ClientTimeout(total=self._timeout_seconds)) as client:
+                async with client.post(self._webhook_url, json=payload) as res:
+                    if res.status >= 400:
+                        self._logger.warning(f"The alert webhook responded with status {res.status}")
+        except Exception as e:
+            self._logger.warning(f"Could not post the alert to the webhook: {e}")
+
+    async def _run_command(self, payload: Dict[str, Any]):
+        assert self._command is not None
+        try:
+            process = await create_subprocess_shell(
+                self._command,
+                env={
+                    **os.environ,
+                    "FOXY_GH_FARMER_ALERT": payload["alert"],
+                    "FOXY_GH_FARMER_ALERT_SUBJECT": payload["subject"],
+                    "FOXY_GH_FARMER_ALERT_STATE": payload["state"],
+                    "FOXY_GH_FARMER_ALERT_MESSAGE": payload["message"],
+                },
+            )
+        except OSError as e:
+            self._logger.warning(f"Could not run the alert command: {e}")
+
+            return
+        try:
+            exit_code = await wait_for(process.wait(), timeout=self._timeout_seconds)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+            self._logger.warning(f"The alert command did not finish within {self._timeout_seconds:.0f}s and was killed")
+
+            return
+        if exit_code != 0:
+            self._logger.warning(f"The alert command exited with code {exit_code}")
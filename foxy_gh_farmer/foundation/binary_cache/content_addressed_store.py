@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+from foxy_gh_farmer.foundation.download.checksum import file_sha256
+
+
+class ContentAddressedStore:
+    """
+    Stores files by the SHA-256 of their contents, identical files in different directories are hard-linked to a single
+    copy in the store.
+    """
+
+    _objects_path: Path
+
+    def __init__(self, objects_path: Path):
+        self._objects_path = objects_path
+
+    def deduplicate(self, directory: Path) -> int:
+        """
+        Replaces all files in the directory which are already stored with hard links and adds the others to the store.
+        Returns the amount of bytes saved.
+        """
+        saved_bytes = 0
+        for path in directory.rglob("*"):
+            if path.is_symlink() or not path.is_file():
+                continue
+            stat = path.stat()
+            object_path = self._get_object_path(file_sha256(path), is_executable=stat.st_mode & 0o111 != 0)
+            if object_path.exists():
+                if object_path.samefile(path):
+                    continue
+                link_path = path.with_name(f"{path.name}.link")
+                try:
+                    os.link(object_path, link_path)
+                except OSError:
+                    # Hard links are not supported, e.g. because the store is on another file system
+                    continue
+                os.replace(link_path, path)
+                saved_bytes += stat.st_size
+
+                continue
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, object_path)
+            except OSError:
+                continue
+
+        return saved_bytes
+
+    def prune(self) -> int:
+        """
+        Removes all stored files which are not linked from anywhere else. Returns the amount of bytes freed.
+        """
+        freed_bytes = 0
+        if not self._objects_path.exists():
+            return freed_bytes
+        for object_path in self._objects_path.glob("*/*"):
+            stat = object_path.stat()
+            if stat.st_nlink > 1:
+                continue
+            object_path.unlink()
+            freed_bytes += stat.st_size
+
+        return freed_bytes
+
+    def _get_object_path(self, sha256: str, is_executable: bool) -> Path:
+        # Files only differing in their mode can not share an inode
+        file_name = f"{sha256}.x" if is_executable else sha256
+
+        return self._objects_path / sha256[:2] / file_name
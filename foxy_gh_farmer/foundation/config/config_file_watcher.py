@@ -0,0 +1,107 @@
+from asyncio import AbstractEventLoop, Event, Task, create_task, get_running_loop, sleep, CancelledError
+from logging import getLogger
+from pathlib import Path
+from typing import Optional, Callable, Awaitable, Tuple
+
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from watchdog.observers.polling import PollingObserver
+
+
+class _FileEventHandler(FileSystemEventHandler):
+    _file_path: Path
+    _on_event: Callable[[], None]
+
+    def __init__(self, file_path: Path, on_event: Callable[[], None]):
+        self._file_path = file_path
+        self._on_event = on_event
+
+    def on_any_event(self, event: FileSystemEvent):
+        # Editors and atomic saves replace the file, so moves onto the file count as well
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(path != "" and Path(path) == self._file_path for path in paths):
+            self._on_event()
+
+
+class ConfigFileWatcher:
+    """
+    Calls `on_change` once the file settled after it was modified. Uses the native file system events (e.g. inotify)
+    where available and falls back to polling otherwise.
+    """
+
+    _file_path: Path
+    _on_change: Callable[[], Awaitable[None]]
+    _debounce_seconds: float
+    _observer: Optional[BaseObserver] = None
+    _changed: Event
+    _watch_task: Optional[Task] = None
+    _loop: Optional[AbstractEventLoop] = None
+    _logger = getLogger("config_file_watcher")
+
+    def __init__(self, file_path: Path, on_change: Callable[[], Awaitable[None]], debounce_seconds: float = 1):
+        self._file_path = file_path.resolve()
+        self._on_change = on_change
+        self._debounce_seconds = debounce_seconds
+        self._changed = Event()
+
+    def start(self):
+        self._loop = get_running_loop()
+        event_handler = _FileEventHandler(self._file_path, self._notify_changed)
+        try:
+            self._observer = self._start_observer(Observer(), event_handler)
+        except OSError as e:
+            # e.g. when the inotify watch limit is reached or the file is on a network share
+            self._logger.warning(f"Watching {self._file_path} for changes failed ({e}), falling back to polling")
+            self._observer = self._start_observer(PollingObserver(timeout=5), event_handler)
+        self._watch_task = create_task(self._watch())
+
+    async def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except CancelledError:
+                pass
+            self._watch_task = None
+
+    def _start_observer(self, observer: BaseObserver, event_handler: FileSystemEventHandler) -> BaseObserver:
+        # Watch the directory, the file itself is replaced on every atomic save
+        observer.schedule(event_handler, str(self._file_path.parent), recursive=False)
+        observer.daemon = True
+        observer.start()
+
+        return observer
+
+    def _notify_changed(self):
+        # Called on the observer thread
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def _watch(self):
+        last_file_state = self._get_file_state()
+        while True:
+            await self._changed.wait()
+            # Wait for the writes to settle, editors often save in several steps
+            while self._changed.is_set():
+                self._changed.clear()
+                await sleep(self._debounce_seconds)
+            file_state = self._get_file_state()
+            if file_state is None or file_state == last_file_state:
+                continue
+            last_file_state = file_state
+            try:
+                await self._on_change()
+            except Exception as e:
+                self._logger.error(f"Applying the changes of {self._file_path} failed: {e}")
+
+    def _get_file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            file_stat = self._file_path.stat()
+        except FileNotFoundError:
+            return None
+
+        return file_stat.st_mtime_ns, file_stat.st_size
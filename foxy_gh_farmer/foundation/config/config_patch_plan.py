@@ -0,0 +1,357 @@
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Tuple, Set, Iterable
+
+from chia.util.bech32m import decode_puzzle_hash
+
+KeyPath = Tuple[str, ...]
+
+chia_config_name = "chia"
+foxy_farmer_config_name = "foxy_farmer"
+
+
+@dataclass
+class ConfigChange:
+    config_name: str
+    key_path: str
+    old_value: Any
+    new_value: Any
+    is_removal: bool = False
+
+    def __str__(self) -> str:
+        if self.is_removal:
+            return f"{self.config_name}: {self.key_path}: {self.old_value!r} -> (removed)"
+
+        return f"{self.config_name}: {self.key_path}: {self.old_value!r} -> {self.new_value!r}"
+
+
+@dataclass
+class ConfigPatchResult:
+    changes: List[ConfigChange] = field(default_factory=list)
+
+    @property
+    def foxy_farmer_config_was_updated(self) -> bool:
+        return any(change.config_name == foxy_farmer_config_name for change in self.changes)
+
+    @property
+    def chia_config_was_updated(self) -> bool:
+        return any(change.config_name == chia_config_name for change in self.changes)
+
+
+def _split_key_path(key_path: str) -> KeyPath:
+    return tuple(key_path.split("."))
+
+
+def _get_value(dic: Dict[str, Any], key_path: KeyPath) -> Any:
+    value: Any = dic
+    for key in key_path:
+        if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+        if value is None:
+            return None
+
+    return value
+
+
+def _get_or_create_parent(dic: Dict[str, Any], key_path: KeyPath) -> Dict[str, Any]:
+    for key in key_path[:-1]:
+        dic = dic.setdefault(key, {})
+
+    return dic
+
+
+class _Rule:
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]): ...
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]: ...
+
+
+@dataclass(frozen=True)
+class _PatchRule(_Rule):
+    foxy_farmer_config_key_path: KeyPath
+    chia_config_key_path: KeyPath
+
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]):
+        foxy_farmer_config_value = _get_value(foxy_farmer_config, self.foxy_farmer_config_key_path)
+        if foxy_farmer_config_value is None:
+            return
+        _set_chia_config_value(chia_config, self.chia_config_key_path, foxy_farmer_config_value, changes)
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]:
+        return [self.chia_config_key_path]
+
+
+@dataclass(frozen=True)
+class _PatchValueRule(_Rule):
+    chia_config_key_path: KeyPath
+    resolve_value: Callable[[Dict[str, Any]], Any]
+
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]):
+        _set_chia_config_value(chia_config, self.chia_config_key_path, self.resolve_value(foxy_farmer_config), changes)
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]:
+        return [self.chia_config_key_path]
+
+
+@dataclass(frozen=True)
+class _RemoveKeyRule(_Rule):
+    chia_config_key_path: KeyPath
+
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]):
+        parent = _get_value(chia_config, self.chia_config_key_path[:-1])
+        if not isinstance(parent, dict):
+            return
+        old_value = parent.get(self.chia_config_key_path[-1])
+        if old_value is None:
+            return
+        del parent[self.chia_config_key_path[-1]]
+        changes.append(
+            ConfigChange(
+                config_name=chia_config_name,
+                key_path=".".join(self.chia_config_key_path),
+                old_value=old_value,
+                new_value=None,
+                is_removal=True,
+            )
+        )
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]:
+        return [self.chia_config_key_path]
+
+
+@dataclass(frozen=True)
+class _PatchPoolListRule(_Rule):
+    closure: Callable[[Dict[str, Any]], bool]
+
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]):
+        pool_list = chia_config["pool"].get("pool_list")
+        if pool_list is None:
+            return
+        for index, pool in enumerate(pool_list):
+            old_pool = deepcopy(pool)
+            if self.closure(pool):
+                _append_dict_changes(chia_config_name, f"pool.pool_list.{index}", old_pool, pool, changes)
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]:
+        return [("pool", "pool_list")]
+
+
+@dataclass(frozen=True)
+class _SyncPoolPayoutAddressRule(_Rule):
+    def apply(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any], changes: List[ConfigChange]):
+        pool_payout_address_ph = decode_puzzle_hash(foxy_farmer_config["pool_payout_address"]).hex()
+        if foxy_farmer_config.get("plot_nfts") is not None:
+            for index, pool in enumerate(foxy_farmer_config["plot_nfts"]):
+                if pool["payout_instructions"] != pool_payout_address_ph:
+                    changes.append(
+                        ConfigChange(
+                            config_name=foxy_farmer_config_name,
+                            key_path=f"plot_nfts.{index}.payout_instructions",
+                            old_value=pool["payout_instructions"],
+                            new_value=pool_payout_address_ph,
+                        )
+                    )
+                    pool["payout_instructions"] = pool_payout_address_ph
+
+        _PatchRule(("plot_nfts",), ("pool", "pool_list")).apply(foxy_farmer_config, chia_config, changes)
+
+        def patch_payout_instructions(pool: Dict[str, Any]) -> bool:
+            if pool.get("payout_instructions") == pool_payout_address_ph:
+                return False
+            pool["payout_instructions"] = pool_payout_address_ph
+
+            return True
+
+        _PatchPoolListRule(patch_payout_instructions).apply(foxy_farmer_config, chia_config, changes)
+
+    def get_written_chia_config_key_paths(self) -> List[KeyPath]:
+        return [("pool", "pool_list")]
+
+
+def _set_chia_config_value(chia_config: Dict[str, Any], key_path: KeyPath, value: Any, changes: List[ConfigChange]):
+    parent = _get_or_create_parent(chia_config, key_path)
+    old_value = parent.get(key_path[-1])
+    if old_value == value:
+        return
+    # Never share mutable values between configs or between applications of the plan
+    parent[key_path[-1]] = deepcopy(value)
+    changes.append(
+        ConfigChange(
+            config_name=chia_config_name,
+            key_path=".".join(key_path),
+            old_value=old_value,
+            new_value=value,
+        )
+    )
+
+
+def _append_dict_changes(
+    config_name: str,
+    key_path: str,
+    old_dict: Dict[str, Any],
+    new_dict: Dict[str, Any],
+    changes: List[ConfigChange],
+):
+    for key in old_dict.keys() | new_dict.keys():
+        old_value = old_dict.get(key)
+        new_value = new_dict.get(key)
+        if old_value == new_value:
+            continue
+        changes.append(
+            ConfigChange(
+                config_name=config_name,
+                key_path=f"{key_path}.{key}",
+                old_value=old_value,
+                new_value=new_value,
+                is_removal=key not in new_dict,
+            )
+        )
+
+
+def get_config_changes(
+    config_name: str,
+    key_paths: Iterable[str],
+    old_config: Dict[str, Any],
+    new_config: Dict[str, Any],
+) -> List[ConfigChange]:
+    """
+    The changes of the given keys between two versions of a config, for changes which were not made by a plan.
+    """
+    changes: List[ConfigChange] = []
+    for key_path in sorted(key_paths):
+        old_value = _get_value(old_config, _split_key_path(key_path))
+        new_value = _get_value(new_config, _split_key_path(key_path))
+        if old_value == new_value:
+            continue
+        changes.append(
+            ConfigChange(
+                config_name=config_name,
+                key_path=key_path,
+                old_value=old_value,
+                new_value=new_value,
+                is_removal=new_value is None,
+            )
+        )
+
+    return changes
+
+
+def _merge_changes(changes: List[ConfigChange], configs: Dict[str, Dict[str, Any]]) -> List[ConfigChange]:
+    """
+    Merges changes of a key and of its children, which were recorded after it, into a single change from the original
+    to the final value. Keys which ended up with their original value are dropped.
+    """
+    merged_changes: Dict[Tuple[str, str], ConfigChange] = {}
+    for change in changes:
+        is_merged = any(
+            config_name == change.config_name
+            and (change.key_path == key_path or change.key_path.startswith(f"{key_path}."))
+            for config_name, key_path in merged_changes.keys()
+        )
+        if not is_merged:
+            merged_changes[(change.config_name, change.key_path)] = change
+
+    result: List[ConfigChange] = []
+    for (config_name, key_path), change in merged_changes.items():
+        final_value = _get_value(configs[config_name], _split_key_path(key_path))
+        if final_value == change.old_value:
+            continue
+        result.append(
+            ConfigChange(
+                config_name=config_name,
+                key_path=key_path,
+                old_value=change.old_value,
+                new_value=final_value,
+                is_removal=final_value is None,
+            )
+        )
+
+    return result
+
+
+class ConfigPatchPlan:
+    """
+    A declarative list of patch rules which is built once, with the key paths split upfront, and can then be applied to
+    any pair of configs. Applying the plan returns every change made, so the same plan can be used for a dry run.
+    """
+
+    _rules: List[_Rule]
+
+    def __init__(self):
+        self._rules = []
+
+    def patch(self, foxy_farmer_config_key_path: str, chia_config_key_path: Optional[str] = None) -> "ConfigPatchPlan":
+        """
+        Copies the value of the foxy-farmer config to the chia config, if it is set.
+        """
+        if chia_config_key_path is None:
+            chia_config_key_path = foxy_farmer_config_key_path
+        self._rules.append(
+            _PatchRule(_split_key_path(foxy_farmer_config_key_path), _split_key_path(chia_config_key_path))
+        )
+
+        return self
+
+    def patch_value(self, chia_config_key_path: str, value: Any) -> "ConfigPatchPlan":
+        self._rules.append(_PatchValueRule(_split_key_path(chia_config_key_path), lambda _: value))
+
+        return self
+
+    def patch_resolved_value(
+        self, chia_config_key_path: str, resolve_value: Callable[[Dict[str, Any]], Any]
+    ) -> "ConfigPatchPlan":
+        """
+        Sets the value resolved from the foxy-farmer config when the plan is applied.
+        """
+        self._rules.append(_PatchValueRule(_split_key_path(chia_config_key_path), resolve_value))
+
+        return self
+
+    def remove_config_key(self, chia_config_key_path: str) -> "ConfigPatchPlan":
+        self._rules.append(_RemoveKeyRule(_split_key_path(chia_config_key_path)))
+
+        return self
+
+    def sync_pool_payout_address(self) -> "ConfigPatchPlan":
+        self._rules.append(_SyncPoolPayoutAddressRule())
+
+        return self
+
+    def patch_pool_list_closure(self, closure: Callable[[Dict[str, Any]], bool]) -> "ConfigPatchPlan":
+        self._rules.append(_PatchPoolListRule(closure))
+
+        return self
+
+    @property
+    def written_chia_config_keys(self) -> Set[str]:
+        """
+        The dotted key paths of the chia config this plan sets or removes.
+        """
+        return {".".join(key_path) for rule in self._rules for key_path in rule.get_written_chia_config_key_paths()}
+
+    def apply(
+        self,
+        foxy_farmer_config: Dict[str, Any],
+        chia_config: Dict[str, Any],
+        previous_changes: Optional[List[ConfigChange]] = None,
+    ) -> ConfigPatchResult:
+        """
+        The `previous_changes` made to the configs before, like by migrations, are merged into the returned result.
+        """
+        changes: List[ConfigChange] = list(previous_changes or [])
+        for rule in self._rules:
+            rule.apply(foxy_farmer_config, chia_config, changes)
+
+        return ConfigPatchResult(
+            changes=_merge_changes(
+                changes,
+                {
+                    foxy_farmer_config_name: foxy_farmer_config,
+                    chia_config_name: chia_config,
+                },
+            )
+        )
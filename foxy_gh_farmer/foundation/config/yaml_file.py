@@ -0,0 +1,96 @@
+import os
+import stat
+from copy import deepcopy
+from pathlib import Path
+from shutil import move
+from tempfile import mkstemp
+from typing import Any, Dict, Tuple, IO, Optional
+
+from yaml import load, dump
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# Parsed files keyed by path, valid as long as their (mtime, size) did not change
+_cache: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+
+def load_yaml(stream: IO[str]) -> Any:
+    return load(stream, Loader=SafeLoader)
+
+
+def dump_yaml(data: Any, stream: IO[str]):
+    dump(data, stream, Dumper=SafeDumper)
+
+
+def load_cached_yaml(path: Path) -> Any:
+    """
+    Parses the yaml file only if it changed since it was last loaded or saved. Returns a copy of the parsed content, so
+    callers can freely mutate it.
+    """
+    path = path.resolve()
+    file_stat = path.stat()
+    cache_key = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == cache_key:
+        return deepcopy(cached[1])
+    with open(path, "r") as file:
+        data = load_yaml(file)
+    # An empty result most likely means the file was read while being written, do not cache it
+    if data is not None:
+        _cache[path] = (cache_key, data)
+
+    return deepcopy(data)
+
+
+def serialize_yaml(data: Any) -> str:
+    return dump(data, Dumper=SafeDumper)
+
+
+def save_cached_yaml(path: Path, data: Any, serialized: Optional[str] = None):
+    """
+    Atomically replaces the file, so readers never see a partially written config even if the process crashes.
+    """
+    if serialized is None:
+        serialized = serialize_yaml(data)
+    file_mode = stat.S_IMODE(path.stat().st_mode) if path.exists() else 0o644
+    file_descriptor, temp_path = mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        os.chmod(temp_path, file_mode)
+        with os.fdopen(file_descriptor, "w") as file:
+            file.write(serialized)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.replace(temp_path, path)
+        except PermissionError:
+            # Replacing a file which is open elsewhere is not permitted on Windows
+            move(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        raise
+    _fsync_directory(path.parent)
+    _remember_saved_yaml(path, data)
+
+
+def _remember_saved_yaml(path: Path, data: Any):
+    """
+    Caches data which was just written to the path, so the next load does not need to parse it again.
+    """
+    path = path.resolve()
+    file_stat = path.stat()
+    _cache[path] = ((file_stat.st_mtime_ns, file_stat.st_size), deepcopy(data))
+
+
+def _fsync_directory(path: Path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    directory_descriptor = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(directory_descriptor)
+    finally:
+        os.close(directory_descriptor)
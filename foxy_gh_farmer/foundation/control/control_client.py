@@ -0,0 +1,102 @@
+import json
+from asyncio import (
+    open_unix_connection,
+    create_task,
+    get_running_loop,
+    Future,
+    StreamReader,
+    StreamWriter,
+    Task,
+    IncompleteReadError,
+    LimitOverrunError,
+    CancelledError,
+)
+from itertools import count
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterator
+
+from chia.util.json_util import dict_to_json_str
+
+from foxy_gh_farmer.foundation.control.control_server import is_control_socket_supported, control_message_size_limit
+
+
+class ControlRequestError(Exception):
+    pass
+
+
+class ControlClient:
+    """
+    Sends requests to a `ControlServer`, multiple requests can be in flight on the same connection.
+    """
+
+    _reader: StreamReader
+    _writer: StreamWriter
+    _request_ids: Iterator[int]
+    _pending_responses: Dict[int, Future]
+    _read_task: Task
+
+    @staticmethod
+    async def connect(socket_path: Path) -> Optional["ControlClient"]:
+        if not is_control_socket_supported() or not socket_path.exists():
+            return None
+        try:
+            reader, writer = await open_unix_connection(str(socket_path), limit=control_message_size_limit)
+        except OSError:
+            return None
+
+        return ControlClient(reader, writer)
+
+    def __init__(self, reader: StreamReader, writer: StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._request_ids = count(1)
+        self._pending_responses = {}
+        self._read_task = create_task(self._read_responses())
+
+    async def request(self, command: str, params: Dict[str, Any]) -> Any:
+        if self._read_task.done():
+            raise ConnectionError("The control connection is closed")
+        request_id = next(self._request_ids)
+        response_future = get_running_loop().create_future()
+        self._pending_responses[request_id] = response_future
+        try:
+            self._writer.write(
+                dict_to_json_str({"id": request_id, "command": command, "params": params}).encode("utf-8") + b"\n"
+            )
+            await self._writer.drain()
+            response = await response_future
+        finally:
+            self._pending_responses.pop(request_id, None)
+        if "error" in response:
+            raise ControlRequestError(response["error"])
+
+        return response.get("result")
+
+    def close(self):
+        self._read_task.cancel()
+        self._writer.close()
+
+    async def await_closed(self):
+        try:
+            await self._read_task
+        except CancelledError:
+            pass
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _read_responses(self):
+        try:
+            while True:
+                line = await self._reader.readuntil(b"\n")
+                response = json.loads(line)
+                response_future = self._pending_responses.get(response.get("id"))
+                if response_future is not None and not response_future.done():
+                    response_future.set_result(response)
+        except (IncompleteReadError, LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            for response_future in self._pending_responses.values():
+                if not response_future.done():
+                    response_future.set_exception(ConnectionError("The control connection was closed"))
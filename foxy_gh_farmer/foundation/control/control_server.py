@@ -0,0 +1,151 @@
+import json
+import os
+import socket
+from asyncio import (
+    start_unix_server,
+    create_task,
+    open_unix_connection,
+    Lock,
+    StreamReader,
+    StreamWriter,
+    Task,
+    AbstractServer,
+    IncompleteReadError,
+    LimitOverrunError,
+    CancelledError,
+)
+from logging import getLogger
+from pathlib import Path
+from sys import platform
+from typing import Dict, Any, Callable, Awaitable, Optional, Set
+
+from chia.util.json_util import dict_to_json_str
+
+ControlRequestHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Harvester plot lists can get large
+control_message_size_limit = 64 * 2**20
+
+
+def is_control_socket_supported() -> bool:
+    return platform != "win32" and platform != "cygwin"
+
+
+class ControlServer:
+    """
+    Serves newline delimited JSON requests on a unix socket which is only accessible by the current user. Each request
+    is handled concurrently and answered with a response carrying the same id.
+    """
+
+    _socket_path: Path
+    _handlers: Dict[str, ControlRequestHandler]
+    _server: Optional[AbstractServer] = None
+    _connection_tasks: Set[Task]
+    _logger = getLogger("control_server")
+
+    def __init__(self, socket_path: Path, handlers: Dict[str, ControlRequestHandler]):
+        self._socket_path = socket_path
+        self._handlers = handlers
+        self._connection_tasks = set()
+
+    async def start(self) -> bool:
+        if not is_control_socket_supported():
+            return False
+        if self._socket_path.exists():
+            if await self._is_socket_in_use():
+                self._logger.warning(f"The control socket {self._socket_path} is already in use, not serving it")
+
+                return False
+            self._socket_path.unlink()
+        self._server = await start_unix_server(
+            self._handle_connection,
+            sock=self._bind_socket(),
+            limit=control_message_size_limit,
+        )
+
+        return True
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._connection_tasks):
+            task.cancel()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            self._socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _bind_socket(self) -> socket.socket:
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket file accessible by the current user only, chmod after binding would leave a window where
+        # other users could connect
+        previous_umask = os.umask(0o077)
+        try:
+            server_socket.bind(str(self._socket_path))
+        except OSError:
+            server_socket.close()
+            raise
+        finally:
+            os.umask(previous_umask)
+
+        return server_socket
+
+    async def _is_socket_in_use(self) -> bool:
+        try:
+            _, writer = await open_unix_connection(str(self._socket_path))
+        except OSError:
+            return False
+        writer.close()
+
+        return True
+
+    async def _handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        write_lock = Lock()
+        request_tasks: Set[Task] = set()
+        connection_task = create_task(self._read_requests(reader, writer, write_lock, request_tasks))
+        self._connection_tasks.add(connection_task)
+        try:
+            await connection_task
+        # Connections are cancelled on stop
+        except (Exception, CancelledError):
+            pass
+        finally:
+            self._connection_tasks.discard(connection_task)
+            for task in request_tasks:
+                task.cancel()
+            writer.close()
+
+    async def _read_requests(
+        self, reader: StreamReader, writer: StreamWriter, write_lock: Lock, request_tasks: Set[Task]
+    ):
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except (IncompleteReadError, LimitOverrunError, ConnectionError):
+                return
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self._logger.debug("Received an invalid control request, closing the connection")
+
+                return
+            task = create_task(self._handle_request(request, writer, write_lock))
+            request_tasks.add(task)
+            task.add_done_callback(request_tasks.discard)
+
+    async def _handle_request(self, request: Dict[str, Any], writer: StreamWriter, write_lock: Lock):
+        response: Dict[str, Any] = {"id": request.get("id")}
+        handler = self._handlers.get(request.get("command"))
+        if handler is None:
+            response["error"] = f"Unknown command: {request.get('command')}"
+        else:
+            try:
+                response["result"] = await handler(request.get("params", {}))
+            except Exception as e:
+                response["error"] = str(e)
+        async with write_lock:
+            writer.write(dict_to_json_str(response).encode("utf-8") + b"\n")
+            await writer.drain()
@@ -0,0 +1,77 @@
+from typing import Dict, Any
+
+from chia.daemon.client import DaemonProxy
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.rpc.harvester_rpc_client import HarvesterRpcClient
+from chia.rpc.wallet_rpc_client import WalletRpcClient
+from chia.util.ints import uint16
+from chia.util.ws_message import WsRpcMessage
+
+from foxy_gh_farmer.foundation.control.control_client import ControlClient
+
+
+class ControlledDaemonProxy(DaemonProxy):
+    """
+    A `DaemonProxy` which forwards all daemon requests through the daemon connection of a running farmer.
+    """
+
+    _control_client: ControlClient
+
+    def __init__(self, control_client: ControlClient):
+        super().__init__(uri="", ssl_context=None, heartbeat=0)
+        self._control_client = control_client
+
+    async def start(self) -> None:
+        pass
+
+    async def _get(self, request: WsRpcMessage) -> WsRpcMessage:
+        return await self._control_client.request("daemon", {"request": request})
+
+    async def close(self) -> None:
+        self._control_client.close()
+        await self._control_client.await_closed()
+
+
+class ControlledRpcClient:
+    """
+    Forwards all RPC requests through the RPC clients of a running farmer, must be mixed into a chia `RpcClient`.
+    """
+
+    service: str = ""
+    _control_client: ControlClient
+
+    def __init__(self, control_client: ControlClient):
+        self._control_client = control_client
+        self.url = ""
+        self.session = None
+        self.ssl_context = None
+        self.hostname = ""
+        self.port = uint16(0)
+        self.closing_task = None
+
+    async def fetch(self, path, request_json) -> Dict[str, Any]:
+        res_json = await self._control_client.request(
+            "rpc", {"service": self.service, "endpoint": path, "data": request_json}
+        )
+        if not res_json["success"]:
+            raise ValueError(res_json)
+
+        return res_json
+
+    def close(self) -> None:
+        self._control_client.close()
+
+    async def await_closed(self) -> None:
+        await self._control_client.await_closed()
+
+
+class ControlledFarmerRpcClient(ControlledRpcClient, FarmerRpcClient):
+    service = "farmer"
+
+
+class ControlledHarvesterRpcClient(ControlledRpcClient, HarvesterRpcClient):
+    service = "harvester"
+
+
+class ControlledWalletRpcClient(ControlledRpcClient, WalletRpcClient):
+    service = "wallet"
@@ -20,8 +20,10 @@ async def get_unlocked_daemon_proxy(
 
 async def get_daemon_proxy(root_path: Path, chia_config: Dict[str, Any]) -> DaemonProxy:
     daemon_proxy = await connect_to_daemon_and_validate(root_path, chia_config, quiet=True)
+    delay_seconds = 0.1
     while daemon_proxy is None:
-        await sleep(1)
+        await sleep(delay_seconds)
+        delay_seconds = min(delay_seconds * 2, 1)
         daemon_proxy = await connect_to_daemon_and_validate(root_path, chia_config, quiet=True)
 
     return daemon_proxy
@@ -0,0 +1,33 @@
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict
+
+_read_chunk_size = 2**20
+
+
+def file_sha256(path: Path) -> str:
+    digest = sha256()
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(_read_chunk_size)
+            if len(chunk) == 0:
+                break
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def parse_sha256_manifest(manifest: str) -> Dict[str, str]:
+    """
+    Parses a manifest in the `sha256sum` output format into a dict of file name to hex digest.
+    """
+    digests_by_file_name: Dict[str, str] = {}
+    for line in manifest.splitlines():
+        parts = line.strip().split(maxsplit=1)
+        if len(parts) != 2:
+            continue
+        digest, file_name = parts
+        # Binary mode entries are prefixed with an asterisk
+        digests_by_file_name[file_name.lstrip("*")] = digest.lower()
+
+    return digests_by_file_name
@@ -0,0 +1,69 @@
+from pathlib import Path
+from threading import Condition
+from typing import Optional, BinaryIO
+
+
+class ProgressiveFileReader:
+    """
+    A read-only file object over a file which is still being written. Reads block until the requested bytes were
+    written, which allows consuming a download (e.g. extracting it) on a worker thread while it is in progress.
+    """
+
+    _path: Path
+    _condition: Condition
+    _file: Optional[BinaryIO] = None
+    _position: int = 0
+    _available_bytes: int = 0
+    _is_complete: bool = False
+    _error: Optional[Exception] = None
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._condition = Condition()
+
+    def set_available_bytes(self, available_bytes: int):
+        with self._condition:
+            self._available_bytes = available_bytes
+            self._condition.notify_all()
+
+    def complete(self, path: Optional[Path] = None):
+        """
+        Marks the file as fully written, optionally with the path it was moved to.
+        """
+        with self._condition:
+            if path is not None:
+                self._path = path
+            self._is_complete = True
+            self._condition.notify_all()
+
+    def fail(self, error: Exception):
+        with self._condition:
+            self._error = error
+            self._condition.notify_all()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._error is not None or self._is_complete or self._available_bytes > self._position
+            )
+            if self._error is not None:
+                raise self._error
+            if self._file is None:
+                self._file = open(self._path, "rb")
+            if self._is_complete:
+                read_size = size
+            else:
+                read_size = self._available_bytes - self._position
+                if size >= 0:
+                    read_size = min(size, read_size)
+            self._file.seek(self._position)
+            data = self._file.read(read_size)
+            self._position += len(data)
+
+            return data
+
+    def close(self):
+        with self._condition:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
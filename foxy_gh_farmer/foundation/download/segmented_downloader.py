@@ -0,0 +1,280 @@
+import json
+import os
+from asyncio import gather, sleep, to_thread, Queue, QueueEmpty
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from ssl import SSLContext
+from time import perf_counter
+from typing import Optional, Callable, Set, Dict, Any, List, Tuple, BinaryIO
+
+from aiohttp import ClientSession
+
+from foxy_gh_farmer.foundation.download.checksum import file_sha256
+
+_one_mib_in_bytes = 2**20
+_chunk_size = _one_mib_in_bytes
+_max_segment_attempts = 5
+
+
+@dataclass
+class DownloadProgress:
+    downloaded_bytes: int
+    total_bytes: Optional[int]
+    resumed_bytes: int
+    elapsed_seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0
+
+        return (self.downloaded_bytes - self.resumed_bytes) / self.elapsed_seconds
+
+    def __str__(self) -> str:
+        downloaded_mib = self.downloaded_bytes / _one_mib_in_bytes
+        speed = f"{self.bytes_per_second / _one_mib_in_bytes:.2f} MiB/s"
+        if self.total_bytes is None or self.total_bytes == 0:
+            return f"{downloaded_mib:.2f} MiB, {speed}"
+        total_mib = self.total_bytes / _one_mib_in_bytes
+        percentage = (self.downloaded_bytes / self.total_bytes) * 100
+
+        return f"{downloaded_mib:.2f}/{total_mib:.2f} MiB, {percentage:.2f}%, {speed}"
+
+
+class SegmentedDownloader:
+    """
+    Downloads a file using concurrent HTTP range requests. Finished segments are recorded next to the partial file, so
+    an interrupted download resumes where it left off. Falls back to a single stream if the server does not support
+    range requests. The result is only moved into place after it matched the expected checksum, if one is given.
+    """
+
+    _session: ClientSession
+    _ssl_context: SSLContext
+    _connections: int
+    _segment_size: int
+    _logger = getLogger("segmented_downloader")
+
+    def __init__(
+        self,
+        session: ClientSession,
+        ssl_context: SSLContext,
+        connections: int = 4,
+        segment_size: int = 16 * _one_mib_in_bytes,
+    ):
+        self._session = session
+        self._ssl_context = ssl_context
+        self._connections = connections
+        self._segment_size = segment_size
+
+    async def download(
+        self,
+        url: str,
+        to_path: Path,
+        expected_sha256: Optional[str] = None,
+        on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+        on_bytes_available: Optional[Callable[[int], None]] = None,
+    ) -> DownloadProgress:
+        """
+        `on_bytes_available` is called with the length of the contiguous prefix of the partial file which was written
+        so far, which allows consuming the partial file while the download is in progress.
+        """
+        partial_path = self.get_partial_path(to_path)
+        state_path = to_path.with_name(f"{to_path.name}.part.json")
+        async with self._session.head(url, ssl=self._ssl_context, allow_redirects=True) as res:
+            res.raise_for_status()
+            content_length = res.headers.get("Content-Length")
+            total_bytes = int(content_length) if content_length is not None else None
+            supports_ranges = res.headers.get("Accept-Ranges", "").lower() == "bytes"
+            etag = res.headers.get("ETag")
+
+        if total_bytes is None or not supports_ranges:
+            progress = await self._download_single_stream(
+                url, partial_path, total_bytes, on_progress, on_bytes_available
+            )
+        else:
+            progress = await self._download_segmented(
+                url, partial_path, state_path, total_bytes, etag, on_progress, on_bytes_available
+            )
+        if expected_sha256 is not None:
+            actual_sha256 = await to_thread(file_sha256, partial_path)
+            if actual_sha256 != expected_sha256:
+                partial_path.unlink()
+                state_path.unlink(missing_ok=True)
+
+                raise RuntimeError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {actual_sha256}")
+        os.replace(partial_path, to_path)
+        state_path.unlink(missing_ok=True)
+
+        return progress
+
+    @staticmethod
+    def get_partial_path(to_path: Path) -> Path:
+        return to_path.with_name(f"{to_path.name}.part")
+
+    async def _download_single_stream(
+        self,
+        url: str,
+        partial_path: Path,
+        total_bytes: Optional[int],
+        on_progress: Optional[Callable[[DownloadProgress], None]],
+        on_bytes_available: Optional[Callable[[int], None]],
+    ) -> DownloadProgress:
+        progress = DownloadProgress(downloaded_bytes=0, total_bytes=total_bytes, resumed_bytes=0, elapsed_seconds=0)
+        started_at = perf_counter()
+        async with self._session.get(url, ssl=self._ssl_context) as res:
+            res.raise_for_status()
+            with open(partial_path, "wb") as file:
+                async for chunk in res.content.iter_chunked(_chunk_size):
+                    file.write(chunk)
+                    progress.downloaded_bytes += len(chunk)
+                    progress.elapsed_seconds = perf_counter() - started_at
+                    if on_progress is not None:
+                        on_progress(progress)
+                    if on_bytes_available is not None:
+                        file.flush()
+                        on_bytes_available(progress.downloaded_bytes)
+
+        return progress
+
+    async def _download_segmented(
+        self,
+        url: str,
+        partial_path: Path,
+        state_path: Path,
+        total_bytes: int,
+        etag: Optional[str],
+        on_progress: Optional[Callable[[DownloadProgress], None]],
+        on_bytes_available: Optional[Callable[[int], None]],
+    ) -> DownloadProgress:
+        segments: List[Tuple[int, int]] = [
+            (start, min(start + self._segment_size, total_bytes) - 1)
+            for start in range(0, total_bytes, self._segment_size)
+        ]
+        state: Dict[str, Any] = {
+            "url": url,
+            "total_bytes": total_bytes,
+            "etag": etag,
+            "segment_size": self._segment_size,
+        }
+        completed_segments = self._load_completed_segments(state_path, partial_path, state)
+        if len(completed_segments) == 0:
+            with open(partial_path, "wb") as file:
+                file.truncate(total_bytes)
+        else:
+            self._logger.info(
+                f"Resuming the download of {url} with {len(completed_segments)}/{len(segments)} segments already "
+                f"downloaded"
+            )
+
+        resumed_bytes = sum(segments[index][1] - segments[index][0] + 1 for index in completed_segments)
+        progress = DownloadProgress(
+            downloaded_bytes=resumed_bytes, total_bytes=total_bytes, resumed_bytes=resumed_bytes, elapsed_seconds=0
+        )
+        started_at = perf_counter()
+        pending_segments: Queue = Queue()
+        for index in range(len(segments)):
+            if index not in completed_segments:
+                pending_segments.put_nowait(index)
+        contiguous_segments = 0
+
+        def update_bytes_available():
+            nonlocal contiguous_segments
+            if on_bytes_available is None:
+                return
+            while contiguous_segments in completed_segments:
+                contiguous_segments += 1
+            if contiguous_segments > 0:
+                on_bytes_available(segments[contiguous_segments - 1][1] + 1)
+
+        update_bytes_available()
+
+        async def download_pending_segments():
+            with open(partial_path, "r+b") as file:
+                while True:
+                    try:
+                        index = pending_segments.get_nowait()
+                    except QueueEmpty:
+                        return
+                    await self._download_segment_with_retries(
+                        url, file, segments[index], progress, started_at, on_progress
+                    )
+                    # Only record the segment once its bytes are durable
+                    file.flush()
+                    os.fsync(file.fileno())
+                    completed_segments.add(index)
+                    self._save_state(state_path, state, completed_segments)
+                    update_bytes_available()
+
+        await gather(*[download_pending_segments() for _ in range(min(self._connections, pending_segments.qsize()))])
+
+        return progress
+
+    async def _download_segment_with_retries(
+        self,
+        url: str,
+        file: BinaryIO,
+        segment: Tuple[int, int],
+        progress: DownloadProgress,
+        started_at: float,
+        on_progress: Optional[Callable[[DownloadProgress], None]],
+    ):
+        attempt = 1
+        while True:
+            downloaded_bytes = 0
+            try:
+                start, end = segment
+                async with self._session.get(
+                    url, ssl=self._ssl_context, headers={"Range": f"bytes={start}-{end}"}
+                ) as res:
+                    res.raise_for_status()
+                    if res.status != 206:
+                        raise RuntimeError(
+                            f"Expected a partial response for bytes {start}-{end} but got status {res.status}"
+                        )
+                    file.seek(start)
+                    async for chunk in res.content.iter_chunked(_chunk_size):
+                        file.write(chunk)
+                        downloaded_bytes += len(chunk)
+                        progress.downloaded_bytes += len(chunk)
+                        progress.elapsed_seconds = perf_counter() - started_at
+                        if on_progress is not None:
+                            on_progress(progress)
+                if downloaded_bytes != end - start + 1:
+                    raise RuntimeError(f"Received {downloaded_bytes} bytes for bytes {start}-{end}")
+
+                return
+            except Exception as e:
+                progress.downloaded_bytes -= downloaded_bytes
+                if attempt >= _max_segment_attempts:
+                    raise
+                self._logger.warning(
+                    f"Downloading bytes {segment[0]}-{segment[1]} failed "
+                    f"(attempt {attempt}/{_max_segment_attempts}): {e}"
+                )
+                await sleep(2**attempt)
+                attempt += 1
+
+    def _load_completed_segments(
+        self, state_path: Path, partial_path: Path, expected_state: Dict[str, Any]
+    ) -> Set[int]:
+        if not state_path.exists() or not partial_path.exists():
+            return set()
+        try:
+            with open(state_path, "r") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return set()
+        if any(state.get(key) != value for key, value in expected_state.items()):
+            # The remote file changed or the segments differ, start from scratch
+            return set()
+        if partial_path.stat().st_size != expected_state["total_bytes"]:
+            return set()
+
+        return set(state.get("completed_segments", []))
+
+    def _save_state(self, state_path: Path, state: Dict[str, Any], completed_segments: Set[int]):
+        temp_state_path = state_path.with_name(f"{state_path.name}.tmp")
+        with open(temp_state_path, "w") as file:
+            json.dump({**state, "completed_segments": sorted(completed_segments)}, file)
+        os.replace(temp_state_path, state_path)
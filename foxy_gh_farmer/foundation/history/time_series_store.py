@@ -0,0 +1,130 @@
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_schema = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    series_id INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    resolution_seconds INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series_id, timestamp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_timestamp ON samples (timestamp);
+"""
+
+
+@dataclass(frozen=True)
+class TimeSeriesPoint:
+    timestamp: int
+    values: Dict[str, float]
+
+
+class TimeSeriesStore:
+    """
+    A compact on-disk store of numeric samples by series name. Samples older than `raw_retention_seconds` are
+    downsampled to averages over `downsample_resolution_seconds` and everything older than `retention_seconds` is
+    removed, so the store size stays bounded for long running farms.
+    """
+
+    _connection: sqlite3.Connection
+    _raw_retention_seconds: int
+    _retention_seconds: int
+    _downsample_resolution_seconds: int
+    _series_ids: Dict[str, int]
+
+    def __init__(
+        self,
+        database_path: Path,
+        raw_retention_seconds: int = 2 * 24 * 60 * 60,
+        retention_seconds: int = 30 * 24 * 60 * 60,
+        downsample_resolution_seconds: int = 60 * 60,
+    ):
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        # Writes may run on a worker thread, callers must not use the store concurrently
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_schema)
+        self._raw_retention_seconds = raw_retention_seconds
+        self._retention_seconds = retention_seconds
+        self._downsample_resolution_seconds = downsample_resolution_seconds
+        self._series_ids = {
+            name: series_id for series_id, name in self._connection.execute("SELECT id, name FROM series")
+        }
+
+    def close(self):
+        self._connection.close()
+
+    def append(self, timestamp: int, values: Dict[str, float]):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO samples (series_id, timestamp, resolution_seconds, value) VALUES (?, ?, 0, ?)",
+                [(self._get_series_id(name), timestamp, value) for name, value in values.items()],
+            )
+
+    def compact(self, now: int):
+        """
+        Downsamples the raw samples older than the raw retention and removes the samples older than the retention.
+        """
+        resolution = self._downsample_resolution_seconds
+        # Only downsample complete buckets, so a bucket is never averaged twice
+        downsample_before = (now - self._raw_retention_seconds) // resolution * resolution
+        with self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO samples (series_id, timestamp, resolution_seconds, value)
+                SELECT series_id, timestamp / ? * ?, ?, AVG(value) FROM samples
+                WHERE resolution_seconds = 0 AND timestamp < ?
+                GROUP BY series_id, timestamp / ?
+                """,
+                (resolution, resolution, resolution, downsample_before, resolution),
+            )
+            self._connection.execute(
+                "DELETE FROM samples WHERE resolution_seconds = 0 AND timestamp < ?",
+                (downsample_before,),
+            )
+            self._connection.execute("DELETE FROM samples WHERE timestamp < ?", (now - self._retention_seconds,))
+
+    def get_series_names(self, prefix: str = "") -> List[str]:
+        return sorted(name for name in self._series_ids.keys() if name.startswith(prefix))
+
+    def query(
+        self,
+        series_names: List[str],
+        since: int,
+        until: Optional[int] = None,
+        resolution_seconds: int = 60,
+    ) -> List[TimeSeriesPoint]:
+        """
+        Returns the averages of the given series per `resolution_seconds` bucket, ordered by time. Series without
+        samples in a bucket are absent from its values.
+        """
+        series_ids = {self._series_ids[name]: name for name in series_names if name in self._series_ids}
+        if len(series_ids) == 0:
+            return []
+        points: Dict[int, Dict[str, float]] = {}
+        for bucket, series_id, value in self._connection.execute(
+            f"""
+            SELECT timestamp / ? * ? AS bucket, series_id, AVG(value) FROM samples
+            WHERE series_id IN ({", ".join("?" * len(series_ids))}) AND timestamp >= ? AND timestamp <= ?
+            GROUP BY bucket, series_id
+            ORDER BY bucket
+            """,
+            (resolution_seconds, resolution_seconds, *series_ids.keys(), since, until if until is not None else 2**62),
+        ):
+            points.setdefault(bucket, {})[series_ids[series_id]] = value
+
+        return [TimeSeriesPoint(timestamp=timestamp, values=values) for timestamp, values in points.items()]
+
+    def _get_series_id(self, name: str) -> int:
+        series_id = self._series_ids.get(name)
+        if series_id is None:
+            series_id = self._connection.execute("INSERT INTO series (name) VALUES (?)", (name,)).lastrowid
+            self._series_ids[name] = series_id
+
+        return series_id
@@ -0,0 +1,100 @@
+from logging import Handler, LogRecord, StreamHandler
+from logging.handlers import QueueHandler
+from queue import Queue, Full, Empty
+from threading import Thread
+from typing import List, Optional
+
+
+class DroppingQueueHandler(QueueHandler):
+    dropped_records: int = 0
+
+    def enqueue(self, record: LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped_records += 1
+
+
+class QueuedLogEmitter:
+    """
+    Emits log records on a dedicated writer thread so slow handlers (e.g. a slow terminal or docker log driver) can not
+    stall the event loop. Records are enqueued via `queue_handler` and dropped when the bounded queue is full.
+    """
+
+    queue_handler: DroppingQueueHandler
+    written_records: int = 0
+    _queue: "Queue[Optional[LogRecord]]"
+    _handlers: List[Handler]
+    _batch_size: int
+    _thread: Optional[Thread] = None
+
+    def __init__(self, handlers: List[Handler], max_queue_size: int = 10000, batch_size: int = 500):
+        self._queue = Queue(maxsize=max_queue_size)
+        self._handlers = handlers
+        self._batch_size = batch_size
+        self.queue_handler = DroppingQueueHandler(self._queue)
+
+    @property
+    def dropped_records(self) -> int:
+        return self.queue_handler.dropped_records
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="queued_log_emitter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        is_stopped = False
+        while not is_stopped:
+            records: List[LogRecord] = []
+            record = self._queue.get()
+            while record is not None:
+                records.append(record)
+                if len(records) >= self._batch_size:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except Empty:
+                    break
+            is_stopped = record is None
+            if len(records) > 0:
+                self._emit(records)
+
+    def _emit(self, records: List[LogRecord]):
+        for handler in self._handlers:
+            if type(handler) is StreamHandler:
+                self._write_batch(handler, records)
+                continue
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self.written_records += len(records)
+
+    def _write_batch(self, handler: StreamHandler, records: List[LogRecord]):
+        lines = [
+            f"{handler.format(record)}{handler.terminator}"
+            for record in records
+            if record.levelno >= handler.level and handler.filter(record)
+        ]
+        if len(lines) == 0:
+            return
+        handler.acquire()
+        try:
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
@@ -0,0 +1,30 @@
+from bisect import bisect_left
+from typing import List, Tuple
+
+default_duration_buckets: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30)
+
+
+class Histogram:
+    buckets: Tuple[float, ...]
+    bucket_counts: List[int]
+    count: int = 0
+    sum: float = 0
+
+    def __init__(self, buckets: Tuple[float, ...] = default_duration_buckets):
+        self.buckets = buckets
+        # The last bucket counts the values above the largest bound (+Inf)
+        self.bucket_counts = [0] * (len(buckets) + 1)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_bucket_counts(self) -> List[Tuple[float, int]]:
+        cumulative_counts: List[Tuple[float, int]] = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            total += count
+            cumulative_counts.append((bound, total))
+
+        return cumulative_counts
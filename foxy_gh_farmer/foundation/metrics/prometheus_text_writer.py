@@ -0,0 +1,85 @@
+from typing import List, Dict, Optional, Union, Tuple
+
+from foxy_gh_farmer.foundation.metrics.histogram import Histogram
+
+prometheus_text_content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Dict[str, str]
+Number = Union[int, float]
+
+
+def _format_labels(labels: Optional[Labels]) -> str:
+    if labels is None or len(labels) == 0:
+        return ""
+    formatted_labels = ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items())
+
+    return f"{{{formatted_labels}}}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_number(value: Number) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusTextWriter:
+    """
+    Renders metrics in the Prometheus text exposition format.
+    """
+
+    _lines: List[str]
+
+    def __init__(self):
+        self._lines = []
+
+    def gauge(
+        self, name: str, help_text: str, value: Optional[Number], labels: Optional[Labels] = None
+    ) -> "PrometheusTextWriter":
+        return self.samples(name, help_text, "gauge", [] if value is None else [(labels, value)])
+
+    def counter(
+        self, name: str, help_text: str, value: Number, labels: Optional[Labels] = None
+    ) -> "PrometheusTextWriter":
+        return self.samples(name, help_text, "counter", [(labels, value)])
+
+    def samples(
+        self, name: str, help_text: str, metric_type: str, samples: List[Tuple[Optional[Labels], Number]]
+    ) -> "PrometheusTextWriter":
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+
+        return self
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram) -> "PrometheusTextWriter":
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} histogram")
+        for bound, count in histogram.cumulative_bucket_counts():
+            self._lines.append(f"{name}_bucket{_format_labels({'le': _format_number(bound)})} {count}")
+        self._lines.append(f"{name}_sum {_format_number(histogram.sum)}")
+        self._lines.append(f"{name}_count {histogram.count}")
+
+        return self
+
+    def summary(
+        self, name: str, help_text: str, quantiles: Dict[float, Optional[float]], count: int, total: float
+    ) -> "PrometheusTextWriter":
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} summary")
+        for quantile, value in quantiles.items():
+            if value is None:
+                continue
+            self._lines.append(f"{name}{_format_labels({'quantile': str(quantile)})} {_format_number(value)}")
+        self._lines.append(f"{name}_sum {_format_number(total)}")
+        self._lines.append(f"{name}_count {count}")
+
+        return self
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
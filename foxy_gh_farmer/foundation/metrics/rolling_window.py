@@ -0,0 +1,55 @@
+from collections import deque
+from time import monotonic
+from typing import Deque, Tuple, List, Optional, Dict
+
+
+class RollingWindow:
+    """
+    Keeps the values observed within the last `max_age_seconds`, bounded to `max_size` entries.
+    """
+
+    max_age_seconds: float
+    _entries: Deque[Tuple[float, float]]
+
+    def __init__(self, max_age_seconds: float = 3600, max_size: int = 100000):
+        self.max_age_seconds = max_age_seconds
+        self._entries = deque(maxlen=max_size)
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        self._entries.append((monotonic() if timestamp is None else timestamp, value))
+
+    def values(self, max_age_seconds: Optional[float] = None) -> List[float]:
+        self._evict_expired()
+        if max_age_seconds is None:
+            return [value for _, value in self._entries]
+        min_timestamp = monotonic() - max_age_seconds
+
+        return [value for timestamp, value in self._entries if timestamp >= min_timestamp]
+
+    def last_timestamp(self) -> Optional[float]:
+        if len(self._entries) == 0:
+            return None
+
+        return self._entries[-1][0]
+
+    def quantile(self, q: float, max_age_seconds: Optional[float] = None) -> Optional[float]:
+        return self.quantiles([q], max_age_seconds=max_age_seconds)[q]
+
+    def quantiles(self, qs: List[float], max_age_seconds: Optional[float] = None) -> Dict[float, Optional[float]]:
+        values = sorted(self.values(max_age_seconds=max_age_seconds))
+        if len(values) == 0:
+            return {q: None for q in qs}
+
+        return {q: values[min(len(values) - 1, max(0, round(q * (len(values) - 1))))] for q in qs}
+
+    def mean(self, max_age_seconds: Optional[float] = None) -> Optional[float]:
+        values = self.values(max_age_seconds=max_age_seconds)
+        if len(values) == 0:
+            return None
+
+        return sum(values) / len(values)
+
+    def _evict_expired(self):
+        min_timestamp = monotonic() - self.max_age_seconds
+        while len(self._entries) > 0 and self._entries[0][0] < min_timestamp:
+            self._entries.popleft()
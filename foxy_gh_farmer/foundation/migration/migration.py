@@ -27,5 +27,19 @@ class Migration:
     def date(self) -> str:
         ...
 
+    @property
+    def written_foxy_farmer_config_keys(self) -> List[str]:
+        """
+        The dotted key paths of the foxy-farmer config this migration might change.
+        """
+        return []
+
+    @property
+    def written_chia_config_keys(self) -> List[str]:
+        """
+        The dotted key paths of the chia config this migration might change.
+        """
+        return []
+
     def run(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any]) -> MigrationResult:
         ...
@@ -1,45 +1,142 @@
-from dataclasses import dataclass
+from copy import deepcopy
+from dataclasses import dataclass, field
+from hashlib import sha256
 from pathlib import Path
 from sys import stderr
-from typing import Dict, Any, List
-
-from yaml import safe_dump, safe_load
+from time import perf_counter, time
+from typing import Dict, Any, List, Set, Tuple, Optional
 
+from foxy_gh_farmer.foundation.config.yaml_file import load_cached_yaml, save_cached_yaml
 from foxy_gh_farmer.foundation.migration.migration import Migration, MigrationResult, aggregate_migration_results
 
+# The state files whose migrations all succeeded in this process, by the digest of the migration set
+_completed_migration_digests: Set[Tuple[Path, str]] = set()
+
 
 @dataclass(frozen=True)
 class MigrationManager:
+    """
+    Runs the migrations which did not succeed yet. The outcome and timing of every run migration is persisted, together
+    with a digest of the migration set once all of them succeeded, so later runs can skip reading the state. With
+    `dry_run` the migrations only change the passed configs and nothing is persisted.
+    """
     state_path: Path
     migrations: List[Migration]
+    # Chia config keys which are always overwritten afterwards, migrations should not change them
+    patched_chia_config_keys: Set[str] = field(default_factory=set)
+    dry_run: bool = False
+
+    @property
+    def digest(self) -> str:
+        return sha256("\n".join(migration.name for migration in self.migrations).encode()).hexdigest()
+
+    @property
+    def written_foxy_farmer_config_keys(self) -> Set[str]:
+        return {key for migration in self.migrations for key in migration.written_foxy_farmer_config_keys}
+
+    @property
+    def written_chia_config_keys(self) -> Set[str]:
+        return {key for migration in self.migrations for key in migration.written_chia_config_keys}
 
     def run_migrations(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any]) -> MigrationResult:
-        executed_migrations = self._load_migrations()
-        migrations_to_run = [m for m in self.migrations if executed_migrations.get(m.name) is not True]
-        if len(migrations_to_run) == 0:
+        digest = self.digest
+        if (self.state_path, digest) in _completed_migration_digests:
+            return aggregate_migration_results([])
+        state = self._load_state()
+        original_state = deepcopy(state)
+        if state.get("digest") == digest:
+            _completed_migration_digests.add((self.state_path, digest))
+
             return aggregate_migration_results([])
+        executed_migrations: Dict[str, Dict[str, Any]] = state["migrations"]
+        migrations_to_run = [
+            migration
+            for migration in sorted(self.migrations, key=lambda migration: migration.date)
+            if executed_migrations.get(migration.name, {}).get("succeeded") is not True
+        ]
         migration_results: List[MigrationResult] = []
+        failed_foxy_farmer_config_keys: Set[str] = set()
+        failed_chia_config_keys: Set[str] = set()
         for migration in migrations_to_run:
+            skip_reason = self._get_skip_reason(migration, failed_foxy_farmer_config_keys, failed_chia_config_keys)
+            if skip_reason is not None:
+                print(f"Skipping migration {migration.name}: {skip_reason}", file=stderr)
+                executed_migrations[migration.name] = {"succeeded": False, "error": skip_reason}
+                failed_foxy_farmer_config_keys.update(migration.written_foxy_farmer_config_keys)
+                failed_chia_config_keys.update(migration.written_chia_config_keys)
+
+                continue
             print(f"Running migration {migration.name}")
+            overwritten_keys = [
+                key for key in migration.written_chia_config_keys if key in self.patched_chia_config_keys
+            ]
+            if len(overwritten_keys) > 0:
+                print(
+                    f"The changes of migration {migration.name} to {', '.join(overwritten_keys)} are overwritten by "
+                    f"the config patch plan",
+                    file=stderr,
+                )
+            started_at = perf_counter()
+            error: Optional[str] = None
             try:
                 migration_results.append(migration.run(foxy_farmer_config=foxy_farmer_config, chia_config=chia_config))
             except Exception as e:
+                error = str(e)
                 print(f"Encountered an error while running migration {migration.name}: {e}", file=stderr)
-
-                break
-            executed_migrations[migration.name] = True
-        self._save_migrations(executed_migrations)
+                failed_foxy_farmer_config_keys.update(migration.written_foxy_farmer_config_keys)
+                failed_chia_config_keys.update(migration.written_chia_config_keys)
+            executed_migrations[migration.name] = {
+                "succeeded": error is None,
+                "ran_at": int(time()),
+                "duration_seconds": round(perf_counter() - started_at, 6),
+                "error": error,
+            }
+        is_complete = all(
+            executed_migrations.get(migration.name, {}).get("succeeded") is True for migration in self.migrations
+        )
+        state["digest"] = digest if is_complete else None
+        if self.dry_run:
+            return aggregate_migration_results(migration_results)
+        if state != original_state:
+            self._save_state(state)
+        if is_complete:
+            _completed_migration_digests.add((self.state_path, digest))
 
         return aggregate_migration_results(migration_results)
 
-    def _load_migrations(self) -> Dict[str, Any]:
+    def _get_skip_reason(
+        self,
+        migration: Migration,
+        failed_foxy_farmer_config_keys: Set[str],
+        failed_chia_config_keys: Set[str],
+    ) -> Optional[str]:
+        # Migrations changing the same keys as a failed one would operate on a config in an unexpected state
+        conflicting_keys = [
+            *(
+                f"foxy_farmer: {key}"
+                for key in migration.written_foxy_farmer_config_keys
+                if key in failed_foxy_farmer_config_keys
+            ),
+            *(f"chia: {key}" for key in migration.written_chia_config_keys if key in failed_chia_config_keys),
+        ]
+        if len(conflicting_keys) > 0:
+            return f"a previous migration changing {', '.join(conflicting_keys)} failed"
+
+        return None
+
+    def _load_state(self) -> Dict[str, Any]:
         if self.state_path.exists() is False:
-            self.state_path.parent.mkdir(parents=True, exist_ok=True)
-            self._save_migrations({})
-        with open(self.state_path, "r") as f:
-            config = safe_load(f)
-        return config
-
-    def _save_migrations(self, migrations: Dict[str, Any]):
-        with open(self.state_path, "w") as f:
-            safe_dump(migrations, f)
+            return {"digest": None, "migrations": {}}
+        state = load_cached_yaml(self.state_path) or {}
+        if "migrations" in state:
+            return state
+
+        # Previous versions only stored the names of the executed migrations
+        return {
+            "digest": None,
+            "migrations": {name: {"succeeded": succeeded is True} for name, succeeded in state.items()},
+        }
+
+    def _save_state(self, state: Dict[str, Any]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        save_cached_yaml(self.state_path, state)
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from foxy_gh_farmer.foundation.migration.migration import Migration, MigrationResult
 
@@ -8,6 +8,10 @@ class CopyPlotNftsMigration(Migration):
     def date(self) -> str:
         return "2024-01-25"
 
+    @property
+    def written_foxy_farmer_config_keys(self) -> List[str]:
+        return ["plot_nfts"]
+
     def run(self, foxy_farmer_config: Dict[str, Any], chia_config: Dict[str, Any]) -> MigrationResult:
         if foxy_farmer_config.get("plot_nfts") is not None:
             return MigrationResult()
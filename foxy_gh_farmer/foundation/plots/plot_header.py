@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+_magic = b"Proof of Space Plot"
+_plot_id_length = 32
+_compressed_plot_flag = 1
+# Large enough for every header field in front of the table pointers
+_max_header_length = 1024
+
+
+@dataclass(frozen=True)
+class PlotHeader:
+    plot_id: str
+    k_size: int
+    format_description: str
+    # None if the plot format is unknown
+    compression_level: Optional[int]
+
+
+def read_plot_header(path: Path) -> PlotHeader:
+    """
+    Parses the header of a plot file with a single small read, without touching the plot tables.
+    """
+    with open(path, "rb") as file:
+        header = file.read(_max_header_length)
+    if not header.startswith(_magic):
+        raise ValueError(f"Not a plot file: {path}")
+    offset = len(_magic)
+    plot_id = header[offset : offset + _plot_id_length]
+    offset += _plot_id_length
+    k_size = header[offset]
+    offset += 1
+    format_description_length = int.from_bytes(header[offset : offset + 2], "big")
+    offset += 2
+    format_description = header[offset : offset + format_description_length].decode("ascii", errors="replace")
+    offset += format_description_length
+    memo_length = int.from_bytes(header[offset : offset + 2], "big")
+    offset += 2 + memo_length
+    if len(plot_id) != _plot_id_length or offset > len(header):
+        raise ValueError(f"Truncated plot header: {path}")
+
+    compression_level: Optional[int] = None
+    if format_description == "v1.0":
+        compression_level = 0
+    elif format_description == "v2.0" and offset + 4 <= len(header):
+        flags = int.from_bytes(header[offset : offset + 4], "little")
+        offset += 4
+        compression_level = header[offset] if flags & _compressed_plot_flag and offset < len(header) else 0
+
+    return PlotHeader(
+        plot_id=plot_id.hex(),
+        k_size=k_size,
+        format_description=format_description,
+        compression_level=compression_level,
+    )
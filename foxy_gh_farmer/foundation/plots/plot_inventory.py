@@ -0,0 +1,354 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter, time
+from typing import List, Dict, Tuple, Optional, Set
+
+from foxy_gh_farmer.foundation.plots.plot_header import read_plot_header, PlotHeader
+
+_plot_file_extension = ".plot"
+# Files modified this shortly before they were indexed might still be copied into place, which does not change the
+# mtime of their directory, so they are stat'ed again on the next refresh
+_unsettled_plot_seconds = 10 * 60
+_schema = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent_path TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plots (
+    path TEXT PRIMARY KEY,
+    directory_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    plot_id TEXT,
+    k_size INTEGER,
+    compression_level INTEGER,
+    missing_since INTEGER,
+    indexed_at INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS plots_directory_path ON plots (directory_path);
+CREATE INDEX IF NOT EXISTS plots_plot_id ON plots (plot_id);
+"""
+
+
+@dataclass
+class PlotInventoryRefreshResult:
+    added_plots: int = 0
+    updated_plots: int = 0
+    removed_plots: int = 0
+    missing_plots: int = 0
+    restated_plots: int = 0
+    scanned_directories: int = 0
+    unchanged_directories: int = 0
+    unreadable_directories: List[str] = field(default_factory=list)
+    duration_seconds: float = 0
+
+
+@dataclass(frozen=True)
+class PlotGroupSummary:
+    k_size: Optional[int]
+    compression_level: Optional[int]
+    plot_count: int
+    total_size: int
+
+
+@dataclass(frozen=True)
+class InventoryPlot:
+    path: str
+    size: int
+    plot_id: Optional[str]
+    k_size: Optional[int]
+    compression_level: Optional[int]
+    missing_since: Optional[int]
+
+
+class PlotInventory:
+    """
+    An on-disk index of the plots in the plot directories. Directories are only listed again when their mtime changed
+    and plot headers are only read for new or changed files, so refreshing a large and mostly static farm is cheap.
+    Plots which were still being written or had an unreadable header are stat'ed again even if their directory did not
+    change, `full` lists all directories again. Plots of directories which became unreadable (e.g. a lost mount) are
+    kept and marked as missing.
+    """
+
+    _connection: sqlite3.Connection
+    _header_read_concurrency: int
+
+    def __init__(self, database_path: Path, header_read_concurrency: int = 8):
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(database_path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_schema)
+        # Indexes created before plots were re-stat'ed lack the indexed_at column
+        if "indexed_at" not in {row[1] for row in self._connection.execute("PRAGMA table_info(plots)")}:
+            self._connection.execute("ALTER TABLE plots ADD COLUMN indexed_at INTEGER NOT NULL DEFAULT 0")
+        self._header_read_concurrency = header_read_concurrency
+
+    def close(self):
+        self._connection.close()
+
+    def refresh(
+        self, plot_directories: List[str], recursive: bool = False, full: bool = False
+    ) -> PlotInventoryRefreshResult:
+        started_at = perf_counter()
+        result = PlotInventoryRefreshResult()
+        stored_directories: Dict[str, Tuple[Optional[str], int]] = {
+            path: (parent_path, mtime_ns)
+            for path, parent_path, mtime_ns in self._connection.execute(
+                "SELECT path, parent_path, mtime_ns FROM directories"
+            )
+        }
+        child_directories: Dict[str, List[str]] = {}
+        for path, (parent_path, _) in stored_directories.items():
+            if parent_path is not None:
+                child_directories.setdefault(parent_path, []).append(path)
+
+        visited_directories: Set[str] = set()
+        pending_directories: List[Tuple[str, Optional[str]]] = [
+            (os.path.abspath(directory), None) for directory in plot_directories
+        ]
+        with self._connection, ThreadPoolExecutor(max_workers=self._header_read_concurrency) as executor:
+            while len(pending_directories) > 0:
+                directory, parent_directory = pending_directories.pop()
+                if directory in visited_directories:
+                    continue
+                visited_directories.add(directory)
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    result.unreadable_directories.append(directory)
+                    result.missing_plots += self._mark_plots_missing(directory)
+
+                    continue
+                stored_directory = stored_directories.get(directory)
+                if not full and stored_directory is not None and stored_directory[1] == mtime_ns:
+                    result.unchanged_directories += 1
+                    self._restat_unsettled_plots(directory, executor, result)
+                    if recursive:
+                        pending_directories.extend((child, directory) for child in child_directories.get(directory, []))
+
+                    continue
+                try:
+                    plot_files, subdirectories = self._list_directory(directory)
+                except OSError:
+                    result.unreadable_directories.append(directory)
+                    result.missing_plots += self._mark_plots_missing(directory)
+
+                    continue
+                result.scanned_directories += 1
+                if recursive:
+                    pending_directories.extend((subdirectory, directory) for subdirectory in subdirectories)
+                self._update_plots(directory, plot_files, executor, result)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO directories (path, parent_path, mtime_ns) VALUES (?, ?, ?)",
+                    (directory, parent_directory, mtime_ns),
+                )
+
+            # Directories below an unreadable one could not be visited, their plots are missing as well
+            for directory in stored_directories.keys() - visited_directories:
+                is_below_unreadable_directory = any(
+                    directory.startswith(f"{unreadable_directory}{os.sep}")
+                    for unreadable_directory in result.unreadable_directories
+                )
+                if is_below_unreadable_directory:
+                    result.missing_plots += self._mark_plots_missing(directory)
+
+                    continue
+                # The directory was removed or is not configured anymore
+                result.removed_plots += self._connection.execute(
+                    "DELETE FROM plots WHERE directory_path = ?",
+                    (directory,),
+                ).rowcount
+                self._connection.execute("DELETE FROM directories WHERE path = ?", (directory,))
+        result.duration_seconds = perf_counter() - started_at
+
+        return result
+
+    def get_summary(self) -> List[PlotGroupSummary]:
+        return [
+            PlotGroupSummary(
+                k_size=k_size, compression_level=compression_level, plot_count=plot_count, total_size=total_size
+            )
+            for k_size, compression_level, plot_count, total_size in self._connection.execute("""
+                SELECT k_size, compression_level, COUNT(*), SUM(size) FROM plots
+                WHERE missing_since IS NULL AND plot_id IS NOT NULL
+                GROUP BY k_size, compression_level
+                ORDER BY k_size, compression_level
+            """)
+        ]
+
+    def get_duplicate_plots(self) -> Dict[str, List[str]]:
+        """
+        Returns the paths of all plots which exist more than once, by plot ID.
+        """
+        duplicate_plots: Dict[str, List[str]] = {}
+        for plot_id, path in self._connection.execute("""
+            SELECT plot_id, path FROM plots
+            WHERE missing_since IS NULL AND plot_id IN (
+                SELECT plot_id FROM plots
+                WHERE missing_since IS NULL AND plot_id IS NOT NULL
+                GROUP BY plot_id HAVING COUNT(*) > 1
+            )
+            ORDER BY plot_id, path
+        """):
+            duplicate_plots.setdefault(plot_id, []).append(path)
+
+        return duplicate_plots
+
+    def get_missing_plots(self) -> List[InventoryPlot]:
+        return self._get_plots("missing_since IS NOT NULL")
+
+    def get_invalid_plots(self) -> List[InventoryPlot]:
+        return self._get_plots("missing_since IS NULL AND plot_id IS NULL")
+
+    def forget_missing_plots(self) -> int:
+        with self._connection:
+            return self._connection.execute("DELETE FROM plots WHERE missing_since IS NOT NULL").rowcount
+
+    def _get_plots(self, condition: str) -> List[InventoryPlot]:
+        return [InventoryPlot(*row) for row in self._connection.execute(f"""
+                SELECT path, size, plot_id, k_size, compression_level, missing_since FROM plots
+                WHERE {condition}
+                ORDER BY path
+            """)]
+
+    def _list_directory(self, directory: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+        plot_files: Dict[str, Tuple[int, int]] = {}
+        subdirectories: List[str] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subdirectories.append(entry.path)
+                    elif entry.name.endswith(_plot_file_extension) and entry.is_file():
+                        stat = entry.stat()
+                        plot_files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+
+        return plot_files, subdirectories
+
+    def _update_plots(
+        self,
+        directory: str,
+        plot_files: Dict[str, Tuple[int, int]],
+        executor: ThreadPoolExecutor,
+        result: PlotInventoryRefreshResult,
+    ):
+        stored_plots: Dict[str, Tuple[int, int, Optional[int]]] = {
+            path: (size, mtime_ns, missing_since)
+            for path, size, mtime_ns, missing_since in self._connection.execute(
+                "SELECT path, size, mtime_ns, missing_since FROM plots WHERE directory_path = ?",
+                (directory,),
+            )
+        }
+        removed_paths = stored_plots.keys() - plot_files.keys()
+        if len(removed_paths) > 0:
+            self._connection.executemany("DELETE FROM plots WHERE path = ?", [(path,) for path in removed_paths])
+            result.removed_plots += len(removed_paths)
+        reappeared_paths = [
+            path
+            for path, (size, mtime_ns) in plot_files.items()
+            if path in stored_plots and stored_plots[path][:2] == (size, mtime_ns) and stored_plots[path][2] is not None
+        ]
+        if len(reappeared_paths) > 0:
+            self._connection.executemany(
+                "UPDATE plots SET missing_since = NULL WHERE path = ?", [(path,) for path in reappeared_paths]
+            )
+        changed_paths = [
+            path
+            for path, (size, mtime_ns) in plot_files.items()
+            if path not in stored_plots or stored_plots[path][:2] != (size, mtime_ns)
+        ]
+        self._store_plots(directory, changed_paths, plot_files, executor)
+        for path in changed_paths:
+            if path in stored_plots:
+                result.updated_plots += 1
+            else:
+                result.added_plots += 1
+
+    def _restat_unsettled_plots(self, directory: str, executor: ThreadPoolExecutor, result: PlotInventoryRefreshResult):
+        stored_plots: Dict[str, Tuple[int, int]] = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self._connection.execute(
+                """
+                SELECT path, size, mtime_ns FROM plots
+                WHERE directory_path = ? AND missing_since IS NULL
+                    AND (plot_id IS NULL OR mtime_ns >= (indexed_at - ?) * 1000000000)
+                """,
+                (directory, _unsettled_plot_seconds),
+            )
+        }
+        if len(stored_plots) == 0:
+            return
+        plot_files: Dict[str, Tuple[int, int]] = {}
+        for path, stat in zip(stored_plots.keys(), executor.map(_try_stat, stored_plots.keys())):
+            if stat is not None:
+                plot_files[path] = stat
+        result.restated_plots += len(plot_files)
+        changed_paths = [path for path, stat in plot_files.items() if stored_plots[path] != stat]
+        self._store_plots(directory, changed_paths, plot_files, executor)
+        result.updated_plots += len(changed_paths)
+        # Unchanged plots are settled once they were not modified for long enough
+        self._connection.executemany(
+            "UPDATE plots SET indexed_at = ? WHERE path = ?",
+            [(int(time()), path) for path in plot_files.keys() - set(changed_paths)],
+        )
+
+    def _store_plots(
+        self,
+        directory: str,
+        paths: List[str],
+        plot_files: Dict[str, Tuple[int, int]],
+        executor: ThreadPoolExecutor,
+    ):
+        indexed_at = int(time())
+        # Header reads are latency bound on network mounts, read them concurrently
+        for path, header in zip(paths, executor.map(_try_read_plot_header, paths)):
+            size, mtime_ns = plot_files[path]
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO plots (
+                    path, directory_path, size, mtime_ns, plot_id, k_size, compression_level, missing_since, indexed_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)
+                """,
+                (
+                    path,
+                    directory,
+                    size,
+                    mtime_ns,
+                    header.plot_id if header is not None else None,
+                    header.k_size if header is not None else None,
+                    header.compression_level if header is not None else None,
+                    indexed_at,
+                ),
+            )
+
+    def _mark_plots_missing(self, directory: str) -> int:
+        # Ensure the directory is listed again once it is readable, even if its mtime did not change
+        self._connection.execute("UPDATE directories SET mtime_ns = -1 WHERE path = ?", (directory,))
+
+        return self._connection.execute(
+            "UPDATE plots SET missing_since = ? WHERE directory_path = ? AND missing_since IS NULL",
+            (int(time()), directory),
+        ).rowcount
+
+
+def _try_stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _try_read_plot_header(path: str) -> Optional[PlotHeader]:
+    try:
+        return read_plot_header(Path(path))
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,283 @@
+from asyncio import (
+    start_server,
+    open_connection,
+    wait_for,
+    wait,
+    gather,
+    create_task,
+    current_task,
+    sleep,
+    StreamReader,
+    StreamWriter,
+    AbstractServer,
+    Task,
+    CancelledError,
+    TimeoutError,
+    FIRST_COMPLETED,
+)
+from dataclasses import dataclass
+from logging import getLogger
+from time import perf_counter
+from typing import List, Tuple, Optional, Dict, Set
+
+_latency_smoothing_factor = 0.3
+_read_size = 64 * 1024
+
+
+@dataclass
+class Backend:
+    host: str
+    port: int
+    is_healthy: bool = True
+    active_connections: int = 0
+    total_connections: int = 0
+    connect_errors: int = 0
+    health_check_errors: int = 0
+    consecutive_failures: int = 0
+    # Exponentially weighted moving averages, None until measured
+    connect_latency_seconds: Optional[float] = None
+    response_latency_seconds: Optional[float] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @property
+    def latency_seconds(self) -> Optional[float]:
+        if self.response_latency_seconds is not None:
+            return self.response_latency_seconds
+
+        return self.connect_latency_seconds
+
+
+class TcpLoadBalancer:
+    """
+    Forwards each accepted connection to the healthy backend with the lowest latency weighted by its in-flight
+    connections. The latency is the time until a backend answered the first bytes sent on a connection, or its connect
+    time while no connection was answered yet. Backends are ejected after `max_consecutive_failures` failed connects
+    or health checks and readmitted once a health check succeeds again.
+
+    Balancing happens per connection, not per request: all requests on a connection go to the backend it was forwarded
+    to. Connections to backends which are removed or ejected are closed, so clients reconnect and are balanced again.
+    """
+
+    _host: str
+    _port: int
+    _backends: Dict[Tuple[str, int], Backend]
+    _connect_timeout_seconds: float
+    _health_check_interval_seconds: float
+    _max_consecutive_failures: int
+    _server: Optional[AbstractServer] = None
+    _health_check_task: Optional[Task] = None
+    _connection_tasks: Set[Task]
+    _connection_tasks_by_backend: Dict[Tuple[str, int], Set[Task]]
+    _logger = getLogger("tcp_load_balancer")
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        backends: List[Tuple[str, int]],
+        connect_timeout_seconds: float = 5,
+        health_check_interval_seconds: float = 10,
+        max_consecutive_failures: int = 3,
+    ):
+        self._host = host
+        self._port = port
+        self._backends = {}
+        self._connect_timeout_seconds = connect_timeout_seconds
+        self._health_check_interval_seconds = health_check_interval_seconds
+        self._max_consecutive_failures = max_consecutive_failures
+        self._connection_tasks = set()
+        self._connection_tasks_by_backend = {}
+        self.set_backends(backends)
+
+    @property
+    def backends(self) -> List[Backend]:
+        return list(self._backends.values())
+
+    def set_backends(self, backends: List[Tuple[str, int]]):
+        """
+        Replaces the backends, keeping the stats of backends which remain. Connections to removed backends are closed.
+        """
+        for backend_key, backend in self._backends.items():
+            if backend_key not in backends:
+                self._close_connections(backend)
+        self._backends = {
+            (host, port): self._backends.get((host, port)) or Backend(host=host, port=port) for host, port in backends
+        }
+
+    async def start(self):
+        self._server = await start_server(self._handle_connection, host=self._host, port=self._port)
+        self._health_check_task = create_task(self._check_health_periodically())
+
+    async def stop(self):
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            try:
+                await self._health_check_task
+            except CancelledError:
+                pass
+            self._health_check_task = None
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._connection_tasks):
+                task.cancel()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, client_reader: StreamReader, client_writer: StreamWriter):
+        task = create_task(self._proxy_connection(client_reader, client_writer))
+        self._connection_tasks.add(task)
+        try:
+            await task
+        except CancelledError:
+            pass
+        finally:
+            self._connection_tasks.discard(task)
+
+    async def _proxy_connection(self, client_reader: StreamReader, client_writer: StreamWriter):
+        try:
+            connection = await self._connect_to_backend()
+            if connection is None:
+                self._logger.warning("No healthy backend available, closing the connection")
+
+                return
+            backend, backend_reader, backend_writer = connection
+            connection_task = current_task()
+            assert connection_task is not None
+            backend_connection_tasks = self._connection_tasks_by_backend.setdefault((backend.host, backend.port), set())
+            backend_connection_tasks.add(connection_task)
+            backend.active_connections += 1
+            backend.total_connections += 1
+            request_sent_at: List[float] = []
+            pipe_tasks = [
+                create_task(
+                    self._pipe(client_reader, backend_writer, backend, is_request=True, request_sent_at=request_sent_at)
+                ),
+                create_task(
+                    self._pipe(
+                        backend_reader, client_writer, backend, is_request=False, request_sent_at=request_sent_at
+                    )
+                ),
+            ]
+            try:
+                # Either side closing ends the connection, waiting for both would leak it when the other side is idle
+                await wait(pipe_tasks, return_when=FIRST_COMPLETED)
+            finally:
+                for task in pipe_tasks:
+                    task.cancel()
+                backend.active_connections -= 1
+                backend_writer.close()
+                backend_connection_tasks.discard(connection_task)
+        finally:
+            client_writer.close()
+
+    async def _connect_to_backend(self) -> Optional[Tuple[Backend, StreamReader, StreamWriter]]:
+        for backend in self._get_backends_by_score():
+            started_at = perf_counter()
+            try:
+                reader, writer = await wait_for(
+                    open_connection(backend.host, backend.port), timeout=self._connect_timeout_seconds
+                )
+            except (OSError, TimeoutError) as e:
+                backend.connect_errors += 1
+                self._record_failure(backend, f"connect failed: {str(e) or type(e).__name__}")
+
+                continue
+            self._record_success(backend, perf_counter() - started_at)
+
+            return backend, reader, writer
+
+        return None
+
+    def _get_backends_by_score(self) -> List[Backend]:
+        healthy_backends = [backend for backend in self._backends.values() if backend.is_healthy]
+        measured_latencies = [
+            backend.latency_seconds for backend in healthy_backends if backend.latency_seconds is not None
+        ]
+        # Unmeasured backends are assumed to be average, so they receive connections without being flooded
+        default_latency = sum(measured_latencies) / len(measured_latencies) if len(measured_latencies) > 0 else 0.001
+
+        return sorted(
+            healthy_backends,
+            key=lambda backend: (backend.latency_seconds or default_latency) * (backend.active_connections + 1),
+        )
+
+    async def _pipe(
+        self,
+        reader: StreamReader,
+        writer: StreamWriter,
+        backend: Backend,
+        is_request: bool,
+        request_sent_at: List[float],
+    ):
+        try:
+            while True:
+                data = await reader.read(_read_size)
+                if len(data) == 0:
+                    break
+                if is_request:
+                    if len(request_sent_at) == 0:
+                        request_sent_at.append(perf_counter())
+                    backend.bytes_sent += len(data)
+                else:
+                    if len(request_sent_at) == 1:
+                        backend.response_latency_seconds = _smooth(
+                            backend.response_latency_seconds, perf_counter() - request_sent_at[0]
+                        )
+                        # Only the first response of a connection is measured
+                        request_sent_at.append(0)
+                    backend.bytes_received += len(data)
+                writer.write(data)
+                await writer.drain()
+        except OSError:
+            pass
+
+    async def _check_health_periodically(self):
+        while True:
+            await gather(*[self._check_health(backend) for backend in self.backends])
+            await sleep(self._health_check_interval_seconds)
+
+    async def _check_health(self, backend: Backend):
+        started_at = perf_counter()
+        try:
+            _, writer = await wait_for(
+                open_connection(backend.host, backend.port), timeout=self._connect_timeout_seconds
+            )
+        except (OSError, TimeoutError) as e:
+            backend.health_check_errors += 1
+            self._record_failure(backend, f"health check failed: {str(e) or type(e).__name__}")
+
+            return
+        self._record_success(backend, perf_counter() - started_at)
+        writer.close()
+
+    def _record_success(self, backend: Backend, connect_latency_seconds: float):
+        backend.connect_latency_seconds = _smooth(backend.connect_latency_seconds, connect_latency_seconds)
+        backend.consecutive_failures = 0
+        if not backend.is_healthy:
+            backend.is_healthy = True
+            self._logger.info(f"Backend {backend.address} is healthy again")
+
+    def _record_failure(self, backend: Backend, reason: str):
+        backend.consecutive_failures += 1
+        if backend.is_healthy and backend.consecutive_failures >= self._max_consecutive_failures:
+            backend.is_healthy = False
+            self._logger.warning(
+                f"Ejected backend {backend.address} after {backend.consecutive_failures} failures, last {reason}"
+            )
+            self._close_connections(backend)
+
+    def _close_connections(self, backend: Backend):
+        for task in list(self._connection_tasks_by_backend.pop((backend.host, backend.port), set())):
+            task.cancel()
+
+
+def _smooth(average: Optional[float], value: float) -> float:
+    if average is None:
+        return value
+
+    return average + _latency_smoothing_factor * (value - average)
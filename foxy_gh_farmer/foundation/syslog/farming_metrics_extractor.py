@@ -0,0 +1,136 @@
+import re
+from typing import Optional, FrozenSet, Pattern, Callable, List, Tuple, Dict
+
+from foxy_gh_farmer.foundation.metrics.histogram import Histogram
+from foxy_gh_farmer.foundation.metrics.rolling_window import RollingWindow
+from foxy_gh_farmer.foundation.syslog.log_line_extractor import LogLineExtractor
+
+# See chia.protocols.pool_protocol.PoolErrorCode
+stale_partial_error_codes: FrozenSet[int] = frozenset({2})
+
+_eligible_plots_pattern: Pattern[bytes] = re.compile(
+    rb"(\d+) plots were eligible for farming \S+ Found (\d+) proofs\. Time: ([0-9.]+) s\. Total (\d+) plots"
+)
+# Chia logs the raw duration without a unit, eg. "took: 9.1234. This should be below 8 seconds"
+_slow_quality_lookup_pattern: Pattern[bytes] = re.compile(rb"Looking up qualities on (.+?) took: ([0-9]+(?:\.[0-9]+)?)")
+_recompute_pattern: Pattern[bytes] = re.compile(rb"[Rr]ecompute\S* took:? ([0-9.]+) s")
+_partial_error_pattern: Pattern[bytes] = re.compile(rb"Error in pooling: \((\d+),")
+
+
+class FarmingMetricsExtractor(LogLineExtractor):
+    """
+    Aggregates farming metrics (proof lookup times, eligible plots, partial outcomes and recompute timings) from the
+    harvester and farmer log lines sent by Gigahorse.
+    """
+
+    window_seconds: float
+    proof_lookup_time_histogram: Histogram
+    proof_lookup_times: RollingWindow
+    eligible_plots: RollingWindow
+    recompute_time_histogram: Histogram
+    recompute_times: RollingWindow
+    accepted_partials: RollingWindow
+    rejected_partials: RollingWindow
+    plot_count: Optional[int] = None
+    signage_points: int = 0
+    proofs_found: int = 0
+    slow_quality_lookups: int = 0
+    partials_submitted: int = 0
+    partials_accepted: int = 0
+    partials_rejected: int = 0
+    partials_stale: int = 0
+    partial_errors_by_code: Dict[int, int]
+    _rules: List[Tuple[bytes, Callable[[bytes], None]]]
+
+    def __init__(self, window_seconds: float = 3600):
+        self.window_seconds = window_seconds
+        self.proof_lookup_time_histogram = Histogram()
+        self.proof_lookup_times = RollingWindow(max_age_seconds=window_seconds)
+        self.eligible_plots = RollingWindow(max_age_seconds=window_seconds)
+        self.recompute_time_histogram = Histogram()
+        self.recompute_times = RollingWindow(max_age_seconds=window_seconds)
+        self.accepted_partials = RollingWindow(max_age_seconds=window_seconds)
+        self.rejected_partials = RollingWindow(max_age_seconds=window_seconds)
+        self.partial_errors_by_code = {}
+        # Cheap substring checks guard the more expensive regex matches
+        self._rules = [
+            (b"plots were eligible", self._process_eligible_plots),
+            (b"Looking up qualities", self._process_slow_quality_lookup),
+            (b"ecompute", self._process_recompute),
+            (b"Submitting partial", self._process_partial_submission),
+            (b"Pool response", self._process_partial_accepted),
+            (b"Error in pooling", self._process_partial_error),
+        ]
+
+    @property
+    def services(self) -> Optional[FrozenSet[bytes]]:
+        return frozenset({b"harvester", b"farmer"})
+
+    def process(self, service: bytes, message: bytes) -> None:
+        for keyword, process_fn in self._rules:
+            if keyword in message:
+                process_fn(message)
+
+                return
+
+    def partial_acceptance_rate(self) -> Optional[float]:
+        accepted = len(self.accepted_partials.values())
+        total = accepted + len(self.rejected_partials.values())
+        if total == 0:
+            return None
+
+        return accepted / total
+
+    def stale_ratio(self) -> Optional[float]:
+        rejected_codes = self.rejected_partials.values()
+        total = len(self.accepted_partials.values()) + len(rejected_codes)
+        if total == 0:
+            return None
+
+        return len([code for code in rejected_codes if code in stale_partial_error_codes]) / total
+
+    def _process_eligible_plots(self, message: bytes):
+        match = _eligible_plots_pattern.search(message)
+        if match is None:
+            return
+        eligible_plots, proofs_found, lookup_time, total_plots = match.groups()
+        lookup_time_seconds = float(lookup_time)
+        self.signage_points += 1
+        self.proofs_found += int(proofs_found)
+        self.plot_count = int(total_plots)
+        self.eligible_plots.add(int(eligible_plots))
+        self.proof_lookup_times.add(lookup_time_seconds)
+        self.proof_lookup_time_histogram.observe(lookup_time_seconds)
+
+    def _process_slow_quality_lookup(self, message: bytes):
+        if _slow_quality_lookup_pattern.search(message) is not None:
+            self.slow_quality_lookups += 1
+
+    def _process_recompute(self, message: bytes):
+        match = _recompute_pattern.search(message)
+        if match is None:
+            return
+        recompute_time_seconds = float(match.group(1))
+        self.recompute_times.add(recompute_time_seconds)
+        self.recompute_time_histogram.observe(recompute_time_seconds)
+
+    def _process_partial_submission(self, _: bytes):
+        self.partials_submitted += 1
+
+    def _process_partial_accepted(self, message: bytes):
+        # Rejected partials are logged as a pool response as well, followed by an "Error in pooling" line
+        if b"error_code" in message:
+            return
+        self.partials_accepted += 1
+        self.accepted_partials.add(1)
+
+    def _process_partial_error(self, message: bytes):
+        match = _partial_error_pattern.search(message)
+        if match is None:
+            return
+        error_code = int(match.group(1))
+        self.partials_rejected += 1
+        self.partial_errors_by_code[error_code] = self.partial_errors_by_code.get(error_code, 0) + 1
+        if error_code in stale_partial_error_codes:
+            self.partials_stale += 1
+        self.rejected_partials.add(error_code)
@@ -0,0 +1,12 @@
+from typing import Optional, FrozenSet
+
+
+class LogLineExtractor:
+    @property
+    def services(self) -> Optional[FrozenSet[bytes]]:
+        """
+        The services this extractor wants to receive lines from, `None` for all services.
+        """
+        return None
+
+    def process(self, service: bytes, message: bytes) -> None: ...
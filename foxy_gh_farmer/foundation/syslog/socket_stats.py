@@ -0,0 +1,27 @@
+from os import fstat
+from pathlib import Path
+from socket import socket
+from sys import platform
+from typing import Optional
+
+
+def read_udp_socket_drops(sock: socket) -> Optional[int]:
+    """
+    Reads the kernel drop counter of a UDP socket (e.g. because of a full receive buffer), only available on Linux.
+    """
+    if platform != "linux":
+        return None
+    inode = str(fstat(sock.fileno()).st_ino)
+    for proc_file_path in [Path("/proc/net/udp"), Path("/proc/net/udp6")]:
+        try:
+            with open(proc_file_path, "r") as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            columns = line.split()
+            # sl local_address rem_address st tx_queue:rx_queue tr:tm->when retrnsmt uid timeout inode ref pointer drops
+            if len(columns) >= 13 and columns[9] == inode:
+                return int(columns[12])
+
+    return None
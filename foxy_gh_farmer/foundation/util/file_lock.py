@@ -0,0 +1,25 @@
+from asyncio import sleep
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from filelock import FileLock, Timeout
+
+
+@asynccontextmanager
+async def acquire_file_lock(lock_path: Path, poll_interval_seconds: float = 0.5) -> AsyncIterator[None]:
+    """
+    Holds an inter-process lock on the given path, waiting for other holders without blocking the event loop.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock = FileLock(lock_path)
+    while True:
+        try:
+            lock.acquire(timeout=0)
+            break
+        except Timeout:
+            await sleep(poll_interval_seconds)
+    try:
+        yield
+    finally:
+        lock.release()
@@ -0,0 +1,117 @@
+import os
+from asyncio import get_running_loop, Future
+from logging import Logger
+from subprocess import Popen
+from threading import Thread
+from typing import Optional, IO, Callable, TypeVar
+
+from psutil import Process, NoSuchProcess
+
+T = TypeVar("T")
+
+
+async def wait_for_process_exit(process: Popen) -> int:
+    """
+    Waits for the process to exit without polling, using a pidfd where available and a blocking wait on a dedicated
+    daemon thread otherwise.
+    """
+    if not await _wait_for_pidfd(process.pid):
+        return await _wait_on_daemon_thread(process.wait, name=f"wait_for_exit_{process.pid}")
+
+    return process.wait()
+
+
+async def wait_for_pid_exit(pid: int):
+    if await _wait_for_pidfd(pid):
+        return
+    try:
+        process = Process(pid)
+    except NoSuchProcess:
+        return
+    await _wait_on_daemon_thread(process.wait, name=f"wait_for_exit_{pid}")
+
+
+async def _wait_on_daemon_thread(wait: Callable[[], T], name: str) -> T:
+    # A waiter which is cancelled keeps blocking until the process exits, running it in the default executor would
+    # use up its worker threads over time
+    loop = get_running_loop()
+    result: Future = loop.create_future()
+
+    def set_result(value: T):
+        if not result.done():
+            result.set_result(value)
+
+    def set_exception(exception: BaseException):
+        if not result.done():
+            result.set_exception(exception)
+
+    def run_wait():
+        try:
+            try:
+                value = wait()
+            except BaseException as e:
+                loop.call_soon_threadsafe(set_exception, e)
+            else:
+                loop.call_soon_threadsafe(set_result, value)
+        except RuntimeError:
+            # The event loop is already closed
+            pass
+
+    Thread(target=run_wait, name=name, daemon=True).start()
+
+    return await result
+
+
+async def _wait_for_pidfd(pid: int) -> bool:
+    pidfd: Optional[int] = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            # The process already exited or the kernel does not support pidfds
+            pidfd = None
+    if pidfd is None:
+        return False
+
+    loop = get_running_loop()
+    exited = loop.create_future()
+    try:
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+    finally:
+        os.close(pidfd)
+
+    return True
+
+
+def drain_process_output(process: Popen, logger: Logger):
+    """
+    Continuously reads the stdout and stderr pipes of the process on background threads and logs each line, so a full
+    pipe buffer can never block the process.
+    """
+    if process.stdout is not None:
+        Thread(
+            target=_log_lines, args=(process.stdout, logger, False), name=f"drain_stdout_{process.pid}", daemon=True
+        ).start()
+    if process.stderr is not None:
+        Thread(
+            target=_log_lines, args=(process.stderr, logger, True), name=f"drain_stderr_{process.pid}", daemon=True
+        ).start()
+
+
+def _log_lines(pipe: IO[str], logger: Logger, is_stderr: bool):
+    try:
+        for line in pipe:
+            line = line.rstrip()
+            if line == "":
+                continue
+            if is_stderr:
+                logger.warning(line)
+            else:
+                logger.info(line)
+    except (OSError, ValueError):
+        # The pipe was closed
+        pass
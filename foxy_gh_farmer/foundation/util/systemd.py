@@ -0,0 +1,23 @@
+import os
+import socket
+
+
+def notify_systemd(state: str) -> bool:
+    """
+    Sends a state like `READY=1` or `WATCHDOG=1` to the service manager, if running as a systemd notify service.
+    """
+    notify_socket_path = os.environ.get("NOTIFY_SOCKET")
+    if notify_socket_path is None or notify_socket_path == "" or not hasattr(socket, "AF_UNIX"):
+        return False
+    # Abstract namespace sockets are prefixed with an @
+    if notify_socket_path.startswith("@"):
+        notify_socket_path = f"\0{notify_socket_path[1:]}"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify_socket:
+            # Never block the event loop when the service manager does not keep up
+            notify_socket.setblocking(False)
+            notify_socket.sendto(state.encode("utf-8"), notify_socket_path)
+    except OSError:
+        return False
+
+    return True
@@ -5,7 +5,6 @@ from typing import List, Optional, Dict, Any
 from chia.rpc.wallet_rpc_client import WalletRpcClient
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.byte_types import hexstr_to_bytes
-from chia.util.config import load_config
 from chia.util.ints import uint64
 from chia.wallet.util.wallet_types import WalletType
 from yaspin import yaspin
@@ -13,7 +12,7 @@ from yaspin import yaspin
 from foxy_gh_farmer.foundation.pool.pool_api_client import PoolApiClient, POOL_URL
 from foxy_gh_farmer.foundation.util.hex import ensure_hex_prefix
 from foxy_gh_farmer.foundation.wallet.transaction import await_transaction_broadcasted
-
+from foxy_gh_farmer.util.chia_config import load_chia_config
 
 async def join_plot_nfts_to_pool(wallet_client: WalletRpcClient, plot_nfts: List[Dict[str, Any]], fee: uint64 = uint64(0)) -> List[str]:
     plot_nfts_by_launcher_id: Dict[bytes32, Dict[str, Any]] = {
@@ -75,7 +74,7 @@ async def await_launcher_pool_join_completion(root_path: Path, joined_launcher_i
 
 
 def get_plot_nft_not_pooling_with_foxy(root_path: Path, joined_launcher_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-    config = load_config(root_path, "config.yaml")
+    config = load_chia_config(root_path)
     if config["pool"].get("pool_list") is None:
         return []
 
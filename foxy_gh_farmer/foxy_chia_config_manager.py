@@ -1,19 +1,27 @@
+from copy import deepcopy
 from os import environ
 from pathlib import Path
 from shutil import copyfile
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 from sys import exit
 
 from chia.cmds.init_funcs import chia_init, check_keys
 from chia.cmds.keys_funcs import add_private_key_seed
-from chia.util.config import load_config, save_config
 from chia.util.default_root import DEFAULT_ROOT_PATH, DEFAULT_KEYS_ROOT_PATH
 
 from foxy_gh_farmer.constants import foxy_gigahorse_farming_gateway_port, eu1_foxy_gigahorse_farming_gateway_address, \
     eu3_foxy_gigahorse_farming_gateway_address
-from foxy_gh_farmer.foundation.config.config_patcher import ConfigPatcher
+from foxy_gh_farmer.foundation.config.config_patch_plan import (
+    ConfigPatchPlan,
+    ConfigPatchResult,
+    get_config_changes,
+    chia_config_name,
+    foxy_farmer_config_name,
+)
+from foxy_gh_farmer.foundation.config.yaml_file import serialize_yaml
 from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
 from foxy_gh_farmer.migration.make_migration_manager import make_migration_manager
+from foxy_gh_farmer.util.chia_config import load_chia_config, save_chia_config
 from foxy_gh_farmer.version import version
 
 
@@ -23,9 +31,16 @@ class FoxyChiaConfigManager:
     def __init__(self, root_path: Path):
         self._root_path = root_path
 
-    def ensure_foxy_config(self, config_path: Path):
+    def ensure_foxy_config(self, config_path: Path, dry_run: bool = False) -> ConfigPatchResult:
+        """
+        With `dry_run` nothing is written, the returned result lists the changes the migrations and the config patch
+        plan would make.
+        """
         foxy_chia_config_file_path = self._root_path / "config" / "config.yaml"
         is_first_install = foxy_chia_config_file_path.exists() is False
+        if is_first_install and dry_run:
+            print(f"The chia config in {self._root_path} does not exist yet, please run init without --dry-run first.")
+            exit(1)
         if is_first_install:
             chia_init(self._root_path, fix_ssl_permissions=True)
 
@@ -34,125 +49,92 @@ class FoxyChiaConfigManager:
         if is_first_install is True and chia_config_file_path.exists():
             copyfile(chia_config_file_path, self._root_path / "config" / "config.yaml")
 
-        if not DEFAULT_KEYS_ROOT_PATH.exists() and environ.get("CHIA_MNEMONIC") is not None:
+        if not dry_run and not DEFAULT_KEYS_ROOT_PATH.exists() and environ.get("CHIA_MNEMONIC") is not None:
             add_private_key_seed(environ["CHIA_MNEMONIC"].strip(), None)
             check_keys(self._root_path)
 
-        config = load_config(self._root_path, "config.yaml")
+        config = load_chia_config(self._root_path)
+        foxy_config_manager = FoxyConfigManager(config_path)
+        has_foxy_config = foxy_config_manager.has_config()
+        foxy_config = foxy_config_manager.load_config()
+        # Reconcile both configs in memory and only write each file once at the end, if its content changed
+        original_config_yaml = serialize_yaml(config)
+        original_foxy_config_yaml = serialize_yaml(foxy_config) if has_foxy_config else None
 
         # Ensure we always have the 'xch_target_address' key set
-        config_was_updated = False
         if "xch_target_address" not in config["farmer"]:
             config["farmer"]["xch_target_address"] = ""
-            config_was_updated = True
         if "xch_target_address" not in config["pool"]:
             config["pool"]["xch_target_address"] = ""
-            config_was_updated = True
 
-        foxy_config_manager = FoxyConfigManager(config_path)
-        has_foxy_config = foxy_config_manager.has_config()
-        foxy_config = foxy_config_manager.load_config()
-
-        foxy_config_was_updated = False
         # Init the foxy_gh_farmer config from the chia foxy config
         if has_foxy_config is False:
             foxy_config["plot_directories"] = config["harvester"]["plot_directories"]
             foxy_config["harvester_num_threads"] = config["harvester"]["num_threads"]
             foxy_config["farmer_reward_address"] = config["farmer"]["xch_target_address"]
             foxy_config["pool_payout_address"] = config["farmer"]["xch_target_address"]
-            foxy_config_was_updated = True
 
         if foxy_config["farmer_reward_address"] == "" and config["farmer"]["xch_target_address"] != "":
             foxy_config["farmer_reward_address"] = config["farmer"]["xch_target_address"]
-            foxy_config_was_updated = True
         if foxy_config["pool_payout_address"] == "" and config["farmer"]["xch_target_address"] != "":
             foxy_config["pool_payout_address"] = config["farmer"]["xch_target_address"]
-            foxy_config_was_updated = True
 
         if foxy_config.get("farmer_reward_address", "") == "" or foxy_config.get("pool_payout_address", "") == "":
-            if foxy_config_was_updated:
-                foxy_config_manager.save_config(foxy_config)
+            if not dry_run:
+                self._save_if_changed(foxy_config_manager.save_config, foxy_config, original_foxy_config_yaml)
             print(f"You are missing a 'farmer_reward_address' and/or 'pool_payout_address' in {config_path}, please update the config and run again.")
             exit(1)
 
-        migration_manager = make_migration_manager()
-        result = migration_manager.run_migrations(foxy_farmer_config=foxy_config, chia_config=config)
-
-        config_was_updated = config_was_updated or result.did_update_chia_config
-        foxy_config_was_updated = foxy_config_was_updated or result.did_update_foxy_farmer_config
-
-        if foxy_config_was_updated:
-            foxy_config_manager.save_config(foxy_config)
-
-        if config_was_updated:
-            save_config(self._root_path, "config.yaml", config)
-
-        config_patcher = ConfigPatcher(foxy_farmer_config=foxy_config, chia_config=config)
-        self.patch_configs(
-            config_patcher=config_patcher,
-            chia_config=config,
+        config_patch_plan = get_config_patch_plan()
+        migration_manager = make_migration_manager(
+            patched_chia_config_keys=config_patch_plan.written_chia_config_keys,
+            dry_run=dry_run,
+        )
+        pre_migration_foxy_config = deepcopy(foxy_config)
+        pre_migration_config = deepcopy(config)
+        migration_manager.run_migrations(foxy_farmer_config=foxy_config, chia_config=config)
+        migration_changes = [
+            *get_config_changes(
+                foxy_farmer_config_name,
+                migration_manager.written_foxy_farmer_config_keys,
+                pre_migration_foxy_config,
+                foxy_config,
+            ),
+            *get_config_changes(
+                chia_config_name,
+                migration_manager.written_chia_config_keys,
+                pre_migration_config,
+                config,
+            ),
+        ]
+
+        config_patch_result = config_patch_plan.apply(
             foxy_farmer_config=foxy_config,
+            chia_config=config,
+            previous_changes=migration_changes,
+        )
+        if dry_run:
+            return config_patch_result
+
+        self._save_if_changed(foxy_config_manager.save_config, foxy_config, original_foxy_config_yaml)
+        self._save_if_changed(
+            lambda chia_config, serialized: save_chia_config(self._root_path, chia_config, serialized=serialized),
+            config,
+            original_config_yaml,
         )
 
-        config_patcher_result = config_patcher.get_result()
-        if config_patcher_result.foxy_farmer_config_was_updated:
-            foxy_config_manager.save_config(foxy_config)
-
-        if config_patcher_result.chia_config_was_updated:
-            save_config(self._root_path, "config.yaml", config)
+        return config_patch_result
 
-    def patch_configs(
-            self,
-            config_patcher: ConfigPatcher,
-            chia_config: Dict[str, Any],
-            foxy_farmer_config: Dict[str, Any],
+    def _save_if_changed(
+        self,
+        save: Callable[[Dict[str, Any], str], None],
+        config: Dict[str, Any],
+        original_config_yaml: Optional[str],
     ):
-        (config_patcher
-         # Ensure different ports
-         .patch_value("daemon_port", foxy_farmer_config.get("chia_daemon_port", 55470))
-         .patch_value("farmer.port", foxy_farmer_config.get("chia_farmer_port", 28447))
-         .patch_value("farmer.rpc_port", foxy_farmer_config.get("chia_farmer_rpc_port", 28559))
-         .remove_config_key("harvester.farmer_peer")
-         .patch_value("harvester.farmer_peers", [{
-             "host": foxy_farmer_config.get("listen_host"),
-             "port": foxy_farmer_config.get("chia_farmer_port", 28447),
-         }])
-         .patch_value("harvester.rpc_port", foxy_farmer_config.get("chia_harvester_rpc_port", 28560))
-         .patch_value("wallet.rpc_port", foxy_farmer_config.get("chia_wallet_rpc_port", 29256))
-         # Ensure we connect to the gh farming gateway
-         .remove_config_key("farmer.full_node_peer")
-         .patch_value("farmer.full_node_peers", [{
-             "host": eu1_foxy_gigahorse_farming_gateway_address,
-             "port": foxy_gigahorse_farming_gateway_port,
-         }, {
-             "host": eu3_foxy_gigahorse_farming_gateway_address,
-             "port": foxy_gigahorse_farming_gateway_port,
-         }])
-         # Ensure the wallet does not try to connect to localhost
-         .remove_config_key("wallet.full_node_peer")
-         .remove_config_key("wallet.full_node_peers")
-         # Sync logging
-         .patch("log_level", "logging.log_level")
-         .patch_value("logging.log_stdout", False)
-         .patch_value("logging.log_syslog", True)
-         .patch_value("logging.log_syslog_host", "127.0.0.1")
-         .patch_value("logging.log_syslog_port", foxy_farmer_config.get("syslog_port", 11514))
-         .patch("listen_host", "self_hostname")
-         # Sync harvester
-         .patch("harvester_num_threads", "harvester.num_threads")
-         .patch("plot_directories", "harvester.plot_directories")
-         .patch("recursive_plot_scan", "harvester.recursive_plot_scan")
-         .patch("plot_refresh_interval_seconds", "harvester.plots_refresh_parameter.interval_seconds")
-         .patch("plot_refresh_batch_size", "harvester.plots_refresh_parameter.batch_size")
-         .patch("plot_refresh_batch_sleep_ms", "harvester.plots_refresh_parameter.batch_sleep_milliseconds")
-         # Sync reward and payout addresses
-         .patch("farmer_reward_address", "farmer.xch_target_address")
-         .patch("farmer_reward_address", "pool.xch_target_address")
-         .sync_pool_payout_address()
-         .patch_pool_list_closure(ensure_foxy_gh_farmer_client_path_in_pool_url)
-         # Ensure the wallet syncs with unknown peers
-         .patch_value("wallet.connect_to_unknown_peers", True)
-         )
+        config_yaml = serialize_yaml(config)
+        if config_yaml == original_config_yaml:
+            return
+        save(config, config_yaml)
 
 
 def ensure_foxy_gh_farmer_client_path_in_pool_url(pool: Dict[str, Any]) -> bool:
@@ -173,3 +155,79 @@ def ensure_foxy_gh_farmer_client_path_in_pool_url(pool: Dict[str, Any]) -> bool:
         return True
 
     return False
+
+
+def _foxy_farmer_config_value(key: str, default: Any = None) -> Callable[[Dict[str, Any]], Any]:
+    return lambda foxy_farmer_config: foxy_farmer_config.get(key, default)
+
+
+def _make_config_patch_plan() -> ConfigPatchPlan:
+    return (
+        ConfigPatchPlan()
+        # Ensure different ports
+        .patch_resolved_value("daemon_port", _foxy_farmer_config_value("chia_daemon_port", 55470))
+        .patch_resolved_value("farmer.port", _foxy_farmer_config_value("chia_farmer_port", 28447))
+        .patch_resolved_value("farmer.rpc_port", _foxy_farmer_config_value("chia_farmer_rpc_port", 28559))
+        .remove_config_key("harvester.farmer_peer")
+        .patch_resolved_value(
+            "harvester.farmer_peers",
+            lambda foxy_farmer_config: [
+                {
+                    "host": foxy_farmer_config.get("listen_host"),
+                    "port": foxy_farmer_config.get("chia_farmer_port", 28447),
+                }
+            ],
+        )
+        .patch_resolved_value("harvester.rpc_port", _foxy_farmer_config_value("chia_harvester_rpc_port", 28560))
+        .patch_resolved_value("wallet.rpc_port", _foxy_farmer_config_value("chia_wallet_rpc_port", 29256))
+        # Ensure we connect to the gh farming gateway
+        .remove_config_key("farmer.full_node_peer")
+        .patch_value(
+            "farmer.full_node_peers",
+            [
+                {
+                    "host": eu1_foxy_gigahorse_farming_gateway_address,
+                    "port": foxy_gigahorse_farming_gateway_port,
+                },
+                {
+                    "host": eu3_foxy_gigahorse_farming_gateway_address,
+                    "port": foxy_gigahorse_farming_gateway_port,
+                },
+            ],
+        )
+        # Ensure the wallet does not try to connect to localhost
+        .remove_config_key("wallet.full_node_peer")
+        .remove_config_key("wallet.full_node_peers")
+        # Sync logging
+        .patch("log_level", "logging.log_level")
+        .patch_value("logging.log_stdout", False)
+        .patch_value("logging.log_syslog", True)
+        .patch_value("logging.log_syslog_host", "127.0.0.1")
+        .patch_resolved_value("logging.log_syslog_port", _foxy_farmer_config_value("syslog_port", 11514))
+        .patch("listen_host", "self_hostname")
+        # Sync harvester
+        .patch("harvester_num_threads", "harvester.num_threads")
+        .patch("plot_directories", "harvester.plot_directories")
+        .patch("recursive_plot_scan", "harvester.recursive_plot_scan")
+        .patch("plot_refresh_interval_seconds", "harvester.plots_refresh_parameter.interval_seconds")
+        .patch("plot_refresh_batch_size", "harvester.plots_refresh_parameter.batch_size")
+        .patch("plot_refresh_batch_sleep_ms", "harvester.plots_refresh_parameter.batch_sleep_milliseconds")
+        # Sync reward and payout addresses
+        .patch("farmer_reward_address", "farmer.xch_target_address")
+        .patch("farmer_reward_address", "pool.xch_target_address")
+        .sync_pool_payout_address()
+        .patch_pool_list_closure(ensure_foxy_gh_farmer_client_path_in_pool_url)
+        # Ensure the wallet syncs with unknown peers
+        .patch_value("wallet.connect_to_unknown_peers", True)
+    )
+
+
+_config_patch_plan: Optional[ConfigPatchPlan] = None
+
+
+def get_config_patch_plan() -> ConfigPatchPlan:
+    global _config_patch_plan
+    if _config_patch_plan is None:
+        _config_patch_plan = _make_config_patch_plan()
+
+    return _config_patch_plan
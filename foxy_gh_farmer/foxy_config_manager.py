@@ -1,9 +1,10 @@
 from pathlib import Path
 from sys import stderr, exit
-from typing import Dict
+from typing import Dict, Optional
 
-from yaml import safe_dump, safe_load, MarkedYAMLError
+from yaml import MarkedYAMLError
 
+from foxy_gh_farmer.foundation.config.yaml_file import load_cached_yaml, save_cached_yaml
 
 def _get_default_config():
     return {
@@ -30,19 +31,20 @@ class FoxyConfigManager:
 
     def load_config(self):
         if self._file_path.exists() is False:
-            with open(self._file_path, "w") as f:
-                safe_dump(_get_default_config(), f)
-        with open(self._file_path, "r") as opened_config_file:
-            try:
-                config = safe_load(opened_config_file)
-            except MarkedYAMLError as e:
-                context: str = "" if e.problem_mark is None else f" (line={e.problem_mark.line + 1}, column={e.problem_mark.column + 1})"
-                print(f"Failed to parse {self._file_path}: {e.problem}{context}.", file=stderr)
-                print(f"Please make sure your config is properly formatted.", file=stderr)
-
-                exit(1)
+            return _get_default_config()
+        try:
+            config = load_cached_yaml(self._file_path)
+        except MarkedYAMLError as e:
+            context: str = (
+                ""
+                if e.problem_mark is None
+                else f" (line={e.problem_mark.line + 1}, column={e.problem_mark.column + 1})"
+            )
+            print(f"Failed to parse {self._file_path}: {e.problem}{context}.", file=stderr)
+            print(f"Please make sure your config is properly formatted.", file=stderr)
+
+            exit(1)
         return config
 
-    def save_config(self, config: Dict):
-        with open(self._file_path, "w") as f:
-            safe_dump(config, f)
+    def save_config(self, config: Dict, serialized: Optional[str] = None):
+        save_cached_yaml(self._file_path, config, serialized=serialized)
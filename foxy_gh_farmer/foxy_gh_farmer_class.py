@@ -1,22 +1,42 @@
-from asyncio import create_task, sleep, new_event_loop, get_running_loop
+from asyncio import (
+    create_task,
+    get_running_loop,
+    Event,
+    Task,
+    wait,
+    FIRST_COMPLETED,
+    run_coroutine_threadsafe,
+    CancelledError,
+)
 from functools import partial
 from logging import getLogger
 from pathlib import Path
 from signal import SIGINT, SIGTERM
 from sys import platform
+from time import perf_counter
 from types import FrameType
 from typing import Optional, List
 
-from chia.daemon.client import DaemonProxy
-from chia.util.config import load_config
 from sentry_sdk.sessions import auto_session_tracking
 
+from foxy_gh_farmer.binary_peer_server import BinaryPeerServer
+from foxy_gh_farmer.config_reloader import ConfigReloader
+from foxy_gh_farmer.daemon_supervisor import DaemonSupervisor
+from foxy_gh_farmer.farm_history_recorder import FarmHistoryRecorder
+from foxy_gh_farmer.farmer_control_server import FarmerControlServer
+from foxy_gh_farmer.foundation.alerting.alert_notifier import AlertNotifier
+from foxy_gh_farmer.foundation.proxy.tcp_load_balancer import TcpLoadBalancer
+from foxy_gh_farmer.foundation.syslog.farming_metrics_extractor import FarmingMetricsExtractor
+from foxy_gh_farmer.foundation.util.systemd import notify_systemd
 from foxy_gh_farmer.foxy_chia_config_manager import FoxyChiaConfigManager
 from foxy_gh_farmer.foxy_config_manager import FoxyConfigManager
 from foxy_gh_farmer.foxy_gh_farmer_logging import initialize_logging_with_stdout
-from foxy_gh_farmer.gigahorse_launcher import ensure_daemon_running_and_unlocked, async_start
+from foxy_gh_farmer.gigahorse_binary_manager import create_binary_manager
+from foxy_gh_farmer.health_monitor import HealthMonitor
+from foxy_gh_farmer.metrics_server import MetricsServer
+from foxy_gh_farmer.recompute_proxy import create_recompute_proxy
 from foxy_gh_farmer.syslog_server import SyslogServer
-from foxy_gh_farmer.util.daemon import shutdown_daemon
+from foxy_gh_farmer.util.chia_config import load_chia_config
 from foxy_gh_farmer.util.node_id import calculate_harvester_node_id_slug
 from foxy_gh_farmer.version import version
 
@@ -25,18 +45,23 @@ class FoxyGhFarmer:
     _foxy_root: Path
     _config_path: Path
     _logger = getLogger("foxy_gh_farmer")
-    _daemon_proxy: Optional[DaemonProxy] = None
-    _is_shut_down: bool = False
+    _daemon_supervisor: Optional[DaemonSupervisor] = None
+    _farming_metrics: FarmingMetricsExtractor
+    _stop_requested: Event
+    _is_shut_down: Event
 
     def __init__(self, foxy_root: Path, config_path: Path):
         self._foxy_root = foxy_root
         self._config_path = config_path
+        self._farming_metrics = FarmingMetricsExtractor()
+        self._stop_requested = Event()
+        self._is_shut_down = Event()
 
     async def start(self):
         foxy_chia_config_manager = FoxyChiaConfigManager(self._foxy_root)
         foxy_chia_config_manager.ensure_foxy_config(self._config_path)
 
-        config = load_config(self._foxy_root, "config.yaml")
+        config = load_chia_config(self._foxy_root)
         initialize_logging_with_stdout(
             logging_config=config["logging"],
             root_path=self._foxy_root,
@@ -47,34 +72,168 @@ class FoxyGhFarmer:
         foxy_config_manager = FoxyConfigManager(self._config_path)
         foxy_config = foxy_config_manager.load_config()
 
-        syslog_server = SyslogServer(logging_config=config["logging"])
+        syslog_server = SyslogServer(
+            logging_config=config["logging"],
+            queue_size=foxy_config.get("syslog_queue_size"),
+            extractors=[self._farming_metrics],
+            receive_buffer_size=foxy_config.get("syslog_receive_buffer_size", 8 * 2**20),
+        )
         syslog_task = create_task(syslog_server.run())
 
-        self._daemon_proxy, _ = await ensure_daemon_running_and_unlocked(self._foxy_root, config, foxy_config, quiet=True)
-        assert self._daemon_proxy is not None
+        recompute_proxy: Optional[TcpLoadBalancer] = None
+        health_monitor: Optional[HealthMonitor] = None
+        control_server: Optional[FarmerControlServer] = None
+        metrics_server: Optional[MetricsServer] = None
+        binary_peer_server: Optional[BinaryPeerServer] = None
+        farm_history_recorder: Optional[FarmHistoryRecorder] = None
+        config_reloader: Optional[ConfigReloader] = None
+        mark_release_used_task: Optional[Task] = None
+        try:
+            if foxy_config.get("recompute_proxy_port") is not None:
+                recompute_proxy = create_recompute_proxy(foxy_config)
+                await recompute_proxy.start()
+                self._logger.info(
+                    "Proxying recompute connections to: "
+                    f"{', '.join(backend.address for backend in recompute_proxy.backends)}"
+                )
+
+            services_to_start: List[str] = ["farmer-only"]
+            if foxy_config.get("enable_harvester") is True:
+                services_to_start.append("harvester")
+                self._logger.info(
+                    f"Harvester starting (id={calculate_harvester_node_id_slug(self._foxy_root, config)})"
+                )
+            daemon_supervisor = DaemonSupervisor(self._foxy_root, config, foxy_config, services_to_start)
+            # Set before starting so a daemon which started but whose services did not become ready is stopped again
+            self._daemon_supervisor = daemon_supervisor
+            await daemon_supervisor.start()
+
+            health_monitor = HealthMonitor(
+                root_path=self._foxy_root,
+                config=config,
+                farming_metrics=self._farming_metrics,
+                daemon_supervisor=daemon_supervisor,
+                notifier=AlertNotifier(
+                    webhook_url=foxy_config.get("alert_webhook_url"),
+                    command=foxy_config.get("alert_command"),
+                ),
+                # The proof lookups are only logged at the info level and only received when gigahorse logs to syslog
+                is_local_harvester_expected=(
+                    foxy_config.get("enable_harvester") is True
+                    and config["logging"]["log_level"] in ["DEBUG", "INFO"]
+                    and config["logging"].get("log_syslog") is True
+                ),
+                p95_threshold_seconds=foxy_config.get("proof_lookup_p95_threshold_seconds", 5),
+                window_seconds=foxy_config.get("proof_lookup_window_seconds", 600),
+                report_timeout_seconds=foxy_config.get("harvester_report_timeout_seconds", 120),
+            )
+            health_monitor.start()
+
+            control_server = FarmerControlServer(self._foxy_root, config, daemon_supervisor, health_monitor)
+            await control_server.start()
+
+            if foxy_config.get("metrics_port") is not None:
+                metrics_server = MetricsServer(
+                    host=foxy_config.get("metrics_host", "127.0.0.1"),
+                    port=foxy_config["metrics_port"],
+                    root_path=self._foxy_root,
+                    config=config,
+                    syslog_server=syslog_server,
+                    farming_metrics=self._farming_metrics,
+                    daemon_supervisor=daemon_supervisor,
+                    recompute_proxy=recompute_proxy,
+                )
+                await metrics_server.start()
+
+            binary_manager = create_binary_manager(foxy_config)
+            mark_release_used_task = create_task(binary_manager.mark_release_used_periodically())
+            if foxy_config.get("binary_peer_port") is not None:
+                binary_peer_server = BinaryPeerServer(
+                    host=foxy_config.get("binary_peer_host", "0.0.0.0"),
+                    port=foxy_config["binary_peer_port"],
+                    binary_manager=binary_manager,
+                )
+                await binary_peer_server.start()
 
-        services_to_start: List[str] = ["farmer-only"]
-        if foxy_config.get("enable_harvester") is True:
-            services_to_start.append("harvester")
-            self._logger.info(f"Harvester starting (id={calculate_harvester_node_id_slug(self._foxy_root, config)})")
-        await async_start(self._daemon_proxy, services_to_start)
+            if foxy_config.get("history_sample_interval_seconds", 60) > 0:
+                farm_history_recorder = FarmHistoryRecorder(
+                    root_path=self._foxy_root,
+                    config=config,
+                    farming_metrics=self._farming_metrics,
+                    sample_interval_seconds=foxy_config.get("history_sample_interval_seconds", 60),
+                    retention_days=foxy_config.get("history_retention_days", 30),
+                )
+                farm_history_recorder.start()
 
-        with auto_session_tracking(session_mode="application"):
-            while self._daemon_proxy is not None:
-                await sleep(1)
-        syslog_server.shutdown()
-        await syslog_task
-        self._is_shut_down = True
+            config_reloader = ConfigReloader(
+                self._foxy_root, self._config_path, foxy_config, daemon_supervisor, recompute_proxy
+            )
+            config_reloader.start()
+            notify_systemd("READY=1")
+
+            with auto_session_tracking(session_mode="application"):
+                await self._wait_for_stop(syslog_task)
+        finally:
+            # Also tear down whatever was already started when the startup failed
+            try:
+                await self._stop_daemon()
+                if config_reloader is not None:
+                    await config_reloader.stop()
+                if control_server is not None:
+                    await control_server.stop()
+                if health_monitor is not None:
+                    await health_monitor.stop()
+                if farm_history_recorder is not None:
+                    await farm_history_recorder.stop()
+                if binary_peer_server is not None:
+                    await binary_peer_server.stop()
+                if mark_release_used_task is not None:
+                    mark_release_used_task.cancel()
+                    try:
+                        await mark_release_used_task
+                    except CancelledError:
+                        pass
+                if metrics_server is not None:
+                    await metrics_server.stop()
+                if recompute_proxy is not None:
+                    await recompute_proxy.stop()
+                syslog_server.shutdown()
+                await syslog_task
+            finally:
+                self._is_shut_down.set()
+
+    async def _wait_for_stop(self, syslog_task: Task):
+        assert self._daemon_supervisor is not None and self._daemon_supervisor.supervise_task is not None
+        stop_requested_task = create_task(self._stop_requested.wait())
+        supervise_task = self._daemon_supervisor.supervise_task
+        done, _ = await wait([stop_requested_task, syslog_task, supervise_task], return_when=FIRST_COMPLETED)
+        stop_requested_task.cancel()
+        if stop_requested_task in done:
+            return
+        if supervise_task in done and not supervise_task.cancelled():
+            self._logger.error(f"The daemon supervisor stopped unexpectedly: {supervise_task.exception()}, exiting ...")
+        if syslog_task in done and not syslog_task.cancelled():
+            self._logger.error(f"The syslog server stopped unexpectedly: {syslog_task.exception()}, exiting ...")
+        await self._stop_daemon()
 
     async def stop(self):
-        if self._daemon_proxy is None:
+        if self._daemon_supervisor is None:
             return
         self._logger.info("Exiting ...")
-        await shutdown_daemon(self._daemon_proxy)
-        await self._daemon_proxy.close()
-        self._daemon_proxy = None
-        while self._is_shut_down is False:
-            await sleep(0.1)
+        notify_systemd("STOPPING=1")
+        stop_started_at = perf_counter()
+        # Request the stop first, stopping the daemon cancels the supervise task which would otherwise look unexpected
+        self._stop_requested.set()
+        await self._stop_daemon()
+        await self._is_shut_down.wait()
+        self._logger.info(f"Stopped in {perf_counter() - stop_started_at:.2f}s")
+
+    async def _stop_daemon(self):
+        daemon_supervisor = self._daemon_supervisor
+        if daemon_supervisor is None:
+            return
+        self._daemon_supervisor = None
+        await daemon_supervisor.stop()
 
     def _accept_signal(self, signal_number: int, stack_frame: Optional[FrameType] = None) -> None:
         create_task(self.stop())
@@ -83,10 +242,11 @@ class FoxyGhFarmer:
         if platform == "win32" or platform == "cygwin":
             from win32api import SetConsoleCtrlHandler
 
+            loop = get_running_loop()
+
             def on_exit(sig, func=None):
-                new_loop = new_event_loop()
-                new_loop.run_until_complete(new_loop.create_task(self.stop()))
-                new_loop.stop()
+                # Called on a separate thread, run the stop on the main loop and block until it is done
+                run_coroutine_threadsafe(self.stop(), loop).result()
 
             SetConsoleCtrlHandler(on_exit, True)
         else:
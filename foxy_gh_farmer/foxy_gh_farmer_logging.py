@@ -7,6 +7,10 @@ from colorlog import ColoredFormatter
 
 
 def add_stdout_handler(logger: Logger, logging_config: Dict):
+    logger.addHandler(make_stdout_handler(logging_config))
+
+
+def make_stdout_handler(logging_config: Dict) -> StreamHandler:
     service_name = "foxy_gh_farmer"
     file_name_length = 33 - len(service_name)
     log_date_format = "%Y-%m-%dT%H:%M:%S"
@@ -20,7 +24,8 @@ def add_stdout_handler(logger: Logger, logging_config: Dict):
         )
     )
     stdout_handler.setLevel(logging_config.get("log_level", default_log_level))
-    logger.addHandler(stdout_handler)
+
+    return stdout_handler
 
 
 def initialize_logging_with_stdout(logging_config: Dict, root_path: Path):
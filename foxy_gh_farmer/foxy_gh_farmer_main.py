@@ -4,10 +4,15 @@ import click
 from chia.cmds.keys import keys_cmd
 from chia.cmds.passphrase import passphrase_cmd
 
+from foxy_gh_farmer.cmds.binary_cache_gc import binary_cache_gc_cmd
 from foxy_gh_farmer.cmds.farm_summary import summary_cmd
 from foxy_gh_farmer.cmds.authenticate import authenticate_cmd
+from foxy_gh_farmer.cmds.harvester_plots import harvester_plots_cmd
+from foxy_gh_farmer.cmds.health import health_cmd
+from foxy_gh_farmer.cmds.history import history_cmd
 from foxy_gh_farmer.cmds.init import init_cmd
 from foxy_gh_farmer.cmds.join_pool import join_pool_cmd
+from foxy_gh_farmer.cmds.plots import plots_cmd
 from foxy_gh_farmer.error_reporting import close_sentry
 from foxy_gh_farmer.util.root_path import get_root_path
 from foxy_gh_farmer.version import version
@@ -67,6 +72,11 @@ cli.add_command(authenticate_cmd)
 cli.add_command(keys_cmd)
 cli.add_command(passphrase_cmd)
 cli.add_command(init_cmd)
+cli.add_command(binary_cache_gc_cmd)
+cli.add_command(plots_cmd)
+cli.add_command(harvester_plots_cmd)
+cli.add_command(history_cmd)
+cli.add_command(health_cmd)
 
 
 def main() -> None:
@@ -1,11 +1,15 @@
+import os
 import tarfile
+from asyncio import create_task, gather, sleep, to_thread
 from logging import getLogger
 from os.path import expanduser, join
 from pathlib import Path
 from platform import machine
+from shutil import rmtree
 from ssl import SSLContext
 from sys import platform
-from tempfile import TemporaryDirectory
+from time import time
+from typing import Optional, Callable, Tuple, List, Dict, Any
 from zipfile import ZipFile
 
 from aiohttp import ClientSession, ClientTimeout
@@ -14,10 +18,26 @@ from chia.ssl.create_ssl import get_mozilla_ca_crt
 from yaspin import yaspin
 from yaspin.core import Yaspin
 
+from foxy_gh_farmer.foundation.binary_cache.content_addressed_store import ContentAddressedStore
+from foxy_gh_farmer.foundation.download.checksum import parse_sha256_manifest
+from foxy_gh_farmer.foundation.download.progressive_file_reader import ProgressiveFileReader
+from foxy_gh_farmer.foundation.download.segmented_downloader import SegmentedDownloader, DownloadProgress
+from foxy_gh_farmer.foundation.util.file_lock import acquire_file_lock
+
 _gigahorse_release = "2.1.3.giga26"
 _gigahorse_release_archive_base = f"chia-gigahorse-farmer-{_gigahorse_release}"
 _gigahorse_archive_root_dir = "chia-gigahorse-farmer"
 _download_url_base = "https://downloads.foxypool.io/chia/gigahorse"
+_checksum_manifest_file_name = "sha256sums.txt"
+_download_connections = 4
+_objects_dir_name = "objects"
+_locks_dir_name = "locks"
+_archives_dir_name = "archives"
+_reserved_cache_dir_names = {_objects_dir_name, _locks_dir_name, _archives_dir_name}
+_store_lock_name = "store"
+_last_used_file_name = ".last-used"
+# Far below the granularity of days the gc removes unused releases at
+_mark_release_used_interval_seconds = 10 * 60
 
 
 class GigahorseBinaryManager:
@@ -25,24 +45,223 @@ class GigahorseBinaryManager:
     _ssl_context: SSLContext = ssl_context_for_root(get_mozilla_ca_crt())
     _logger = getLogger("binary_manager")
 
+    _peers: List[str]
+    _keep_archives: bool
+
+    def __init__(
+        self, cache_path: Optional[str] = None, peers: Optional[List[str]] = None, keep_archives: bool = False
+    ):
+        """
+        `peers` are base urls of other nodes serving their archives, which are tried before the upstream url. Verified
+        archives are only kept after extracting them if `keep_archives` is set, so they can be served to peers.
+        """
+        if cache_path is not None:
+            self._cache_path = Path(expanduser(cache_path)).resolve()
+        self._peers = peers if peers is not None else []
+        self._keep_archives = keep_archives
+
+    def get_archive_path(self, release: str, archive_file_name: str) -> Optional[Path]:
+        if Path(archive_file_name).name != archive_file_name or not archive_file_name.startswith(
+            f"chia-gigahorse-farmer-{release}-"
+        ):
+            return None
+        archive_path = self._cache_path / _archives_dir_name / archive_file_name
+        if not archive_path.is_file():
+            return None
+
+        return archive_path
+
     async def get_binary_directory_path(self) -> Path:
-        gigahorse_base_path = join(self._cache_path, _gigahorse_release)
+        gigahorse_base_path = Path(join(self._cache_path, _gigahorse_release))
         gigahorse_path = Path(join(gigahorse_base_path, _gigahorse_archive_root_dir))
-        if gigahorse_path.exists():
-            return gigahorse_path
-
-        with yaspin(text=f"Preparing to download Gigahorse {_gigahorse_release} ..") as spinner:
-            self._cache_path.mkdir(parents=True, exist_ok=True)
-            archive_file_name = self._get_archive_file_name()
-            with TemporaryDirectory() as temp_dir:
-                archive_path = join(temp_dir, archive_file_name)
-                await self._download_release(archive_path, spinner=spinner)
-                spinner.text = f"Extracting Gigahorse {_gigahorse_release} .."
-                self._extract_file(archive_path, gigahorse_base_path)
-        self._logger.info(f"✅ Downloaded Gigahorse {_gigahorse_release}")
+        if not gigahorse_path.exists():
+            with yaspin(text=f"Preparing to download Gigahorse {_gigahorse_release} ..") as spinner:
+                # Only one process sharing this cache downloads the release, the others wait for it
+                async with acquire_file_lock(self._get_lock_path(_gigahorse_release)):
+                    if not gigahorse_path.exists():
+                        await self._install_release(gigahorse_base_path, spinner=spinner)
+                        self._logger.info(f"✅ Downloaded Gigahorse {_gigahorse_release}")
+        self._mark_release_used(gigahorse_base_path)
 
         return gigahorse_path
 
+    async def mark_release_used_periodically(self):
+        """
+        Keeps marking the current release as used while running, so the gc of another instance sharing the cache does
+        not remove it.
+        """
+        gigahorse_base_path = self._cache_path / _gigahorse_release
+        while True:
+            await sleep(_mark_release_used_interval_seconds)
+            if gigahorse_base_path.exists():
+                self._mark_release_used(gigahorse_base_path)
+
+    async def collect_garbage(self, max_unused_seconds: float) -> Tuple[List[str], int]:
+        """
+        Removes all releases except the current one which were not used for the given duration and all stored files
+        which are no longer linked from any release. Returns the removed releases and the freed bytes.
+        """
+        removed_releases: List[str] = []
+        if not self._cache_path.exists():
+            return removed_releases, 0
+        for release_path in self._cache_path.iterdir():
+            if (
+                not release_path.is_dir()
+                or release_path.name in _reserved_cache_dir_names
+                or release_path.name.endswith(".staging")
+            ):
+                continue
+            release = release_path.name
+            if (
+                release == _gigahorse_release
+                or time() - self._get_release_last_used_at(release_path) < max_unused_seconds
+            ):
+                continue
+            async with acquire_file_lock(self._get_lock_path(release)):
+                # The release might have been used or removed while waiting for the lock
+                if (
+                    not release_path.exists()
+                    or time() - self._get_release_last_used_at(release_path) < max_unused_seconds
+                ):
+                    continue
+                await to_thread(rmtree, release_path)
+                for archive_path in (self._cache_path / _archives_dir_name).glob(f"chia-gigahorse-farmer-{release}-*"):
+                    archive_path.unlink()
+            removed_releases.append(release)
+        async with acquire_file_lock(self._get_lock_path(_store_lock_name)):
+            freed_bytes = await to_thread(self._get_store().prune)
+
+        return removed_releases, freed_bytes
+
+    async def _install_release(self, gigahorse_base_path: Path, spinner: Yaspin):
+        self._cache_path.mkdir(parents=True, exist_ok=True)
+        # Keep the (partial) archive in the cache, so interrupted downloads can be resumed
+        archive_path = self._cache_path / self._get_archive_file_name()
+        kept_archive_path = self._cache_path / _archives_dir_name / self._get_archive_file_name()
+        # Extract into a staging directory first, so a crash never leaves a partially extracted release behind
+        staging_path = self._cache_path / f"{_gigahorse_release}.staging"
+        if staging_path.exists():
+            rmtree(staging_path)
+        try:
+            if kept_archive_path.exists():
+                archive_path = kept_archive_path
+            if archive_path.exists():
+                spinner.text = f"Extracting Gigahorse {_gigahorse_release} .."
+                await to_thread(self._extract_file, str(archive_path), str(staging_path))
+            else:
+                await self._download_and_extract_from_any_source(archive_path, staging_path, spinner=spinner)
+            spinner.text = f"Deduplicating Gigahorse {_gigahorse_release} .."
+            async with acquire_file_lock(self._get_lock_path(_store_lock_name)):
+                saved_bytes = await to_thread(self._get_store().deduplicate, staging_path)
+            if saved_bytes > 0:
+                self._logger.info(f"Saved {saved_bytes / 2 ** 20:.2f} MiB by sharing files with other releases")
+            if gigahorse_base_path.exists():
+                # Left behind by an interrupted extraction of an older version
+                rmtree(gigahorse_base_path)
+            os.replace(staging_path, gigahorse_base_path)
+        finally:
+            if staging_path.exists():
+                rmtree(staging_path, ignore_errors=True)
+        if archive_path == kept_archive_path:
+            return
+        if self._keep_archives:
+            kept_archive_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(archive_path, kept_archive_path)
+        else:
+            archive_path.unlink(missing_ok=True)
+
+    async def _download_and_extract_from_any_source(self, archive_path: Path, staging_path: Path, spinner: Yaspin):
+        expected_sha256 = await self._get_expected_archive_sha256()
+        download_urls = [self._get_release_download_url()]
+        # Archives from peers can only be trusted if they can be verified against the upstream manifest
+        if expected_sha256 is not None:
+            download_urls = [
+                f"{peer.rstrip('/')}/gigahorse/{_gigahorse_release}/{self._get_archive_file_name()}"
+                for peer in self._peers
+            ] + download_urls
+        for index, download_url in enumerate(download_urls):
+            is_upstream = index == len(download_urls) - 1
+            try:
+                if archive_path.name.endswith(".tar.gz"):
+                    await self._download_and_extract_release(
+                        download_url, archive_path, staging_path, expected_sha256, is_upstream, spinner=spinner
+                    )
+                else:
+                    await self._download_release(
+                        download_url, archive_path, expected_sha256, is_upstream, spinner=spinner
+                    )
+                    spinner.text = f"Extracting Gigahorse {_gigahorse_release} .."
+                    await to_thread(self._extract_file, str(archive_path), str(staging_path))
+
+                return
+            except Exception as e:
+                if is_upstream:
+                    raise
+                self._logger.warning(
+                    f"Downloading Gigahorse {_gigahorse_release} from {download_url} failed, trying the next "
+                    f"source: {e}"
+                )
+                if staging_path.exists():
+                    rmtree(staging_path)
+
+    def _mark_release_used(self, gigahorse_base_path: Path):
+        try:
+            (gigahorse_base_path / _last_used_file_name).touch()
+        except OSError as e:
+            self._logger.debug(f"Could not mark {gigahorse_base_path.name} as used: {e}")
+
+    def _get_release_last_used_at(self, release_path: Path) -> float:
+        last_used_path = release_path / _last_used_file_name
+        if last_used_path.exists():
+            return last_used_path.stat().st_mtime
+
+        return release_path.stat().st_mtime
+
+    def _get_store(self) -> ContentAddressedStore:
+        return ContentAddressedStore(self._cache_path / _objects_dir_name)
+
+    def _get_lock_path(self, name: str) -> Path:
+        return self._cache_path / _locks_dir_name / f"{name}.lock"
+
+    async def _download_and_extract_release(
+        self,
+        download_url: str,
+        archive_path: Path,
+        staging_path: Path,
+        expected_sha256: Optional[str],
+        is_upstream: bool,
+        spinner: Yaspin,
+    ):
+        """
+        Unpacks the tarball while it is being downloaded.
+        """
+        archive_reader = ProgressiveFileReader(SegmentedDownloader.get_partial_path(archive_path))
+        extraction_task = create_task(to_thread(self._extract_tar_stream, archive_reader, str(staging_path)))
+        try:
+            await self._download_release(
+                download_url,
+                archive_path,
+                expected_sha256,
+                is_upstream,
+                spinner=spinner,
+                on_bytes_available=archive_reader.set_available_bytes,
+            )
+        except BaseException:
+            archive_reader.fail(RuntimeError("The download of the archive failed"))
+            await gather(extraction_task, return_exceptions=True)
+
+            raise
+        archive_reader.complete(archive_path)
+        spinner.text = f"Extracting Gigahorse {_gigahorse_release} .."
+        await extraction_task
+
+    def _extract_tar_stream(self, archive_reader: ProgressiveFileReader, destination_path: str):
+        try:
+            with tarfile.open(fileobj=archive_reader, mode="r|gz") as file:
+                file.extractall(destination_path)
+        finally:
+            archive_reader.close()
+
     def _extract_file(self, archive_file_path: str, destination_path: str):
         if archive_file_path.endswith(".zip"):
             with ZipFile(archive_file_path, 'r') as zip_ref:
@@ -58,20 +277,63 @@ class GigahorseBinaryManager:
 
         raise RuntimeError(f"Can not extract {archive_file_path}, unsupported extension")
 
-    async def _download_release(self, to_path: str, spinner: Yaspin):
-        one_mib_in_bytes = 2 ** 20
-        chunk_size = 5 * one_mib_in_bytes
-        downloaded_size_mib = 0
-        async with ClientSession(timeout=ClientTimeout(total=15 * 60, connect=60)) as client:
-            async with client.get(self._get_release_download_url(), ssl=self._ssl_context) as res:
-                total_bytes = int(res.headers.get('content-length'))
-                total_mib = total_bytes / one_mib_in_bytes
-                with open(to_path, 'wb') as fd:
-                    async for chunk in res.content.iter_chunked(chunk_size):
-                        fd.write(chunk)
-                        downloaded_size_mib += len(chunk) / one_mib_in_bytes
-                        percentage = (downloaded_size_mib / total_mib) * 100
-                        spinner.text = f"Downloading Gigahorse {_gigahorse_release} ({downloaded_size_mib:.2f}/{total_mib:.2f} MiB, {percentage:.2f}%) .."
+    async def _download_release(
+        self,
+        download_url: str,
+        to_path: Path,
+        expected_sha256: Optional[str],
+        is_upstream: bool,
+        spinner: Yaspin,
+        on_bytes_available: Optional[Callable[[int], None]] = None,
+    ):
+        # Peers are on the LAN, fail fast to fall back to the next source
+        timeout = (
+            ClientTimeout(total=None, connect=60, sock_read=60)
+            if is_upstream
+            else ClientTimeout(total=None, connect=5, sock_read=15)
+        )
+        # Archives must be stored as is, even if a server declares them as gzip encoded
+        async with ClientSession(timeout=timeout, auto_decompress=False) as client:
+            downloader = SegmentedDownloader(client, self._ssl_context, connections=_download_connections)
+
+            def update_spinner(progress: DownloadProgress):
+                spinner.text = f"Downloading Gigahorse {_gigahorse_release} ({progress}) .."
+
+            progress = await downloader.download(
+                download_url,
+                to_path,
+                expected_sha256=expected_sha256,
+                on_progress=update_spinner,
+                on_bytes_available=on_bytes_available,
+            )
+        self._logger.info(
+            f"Downloaded {(progress.downloaded_bytes - progress.resumed_bytes) / 2 ** 20:.2f} MiB from "
+            f"{download_url} in {progress.elapsed_seconds:.1f}s ({progress.bytes_per_second / 2 ** 20:.2f} MiB/s)"
+        )
+
+    async def _get_expected_archive_sha256(self) -> Optional[str]:
+        manifest_url = f"{_download_url_base}/{_gigahorse_release}/{_checksum_manifest_file_name}"
+        try:
+            async with ClientSession(timeout=ClientTimeout(total=60)) as client:
+                async with client.get(manifest_url, ssl=self._ssl_context) as res:
+                    res.raise_for_status()
+                    manifest = await res.text()
+        except Exception as e:
+            # Without a manifest the upstream archive is still downloaded over TLS, only archives from peers are not
+            # trusted
+            self._logger.warning(
+                f"Could not fetch the checksum manifest of Gigahorse {_gigahorse_release}, skipping verification: {e}"
+            )
+
+            return None
+        expected_sha256 = parse_sha256_manifest(manifest).get(self._get_archive_file_name())
+        if expected_sha256 is None:
+            raise RuntimeError(
+                f"The checksum manifest of Gigahorse {_gigahorse_release} does not contain "
+                f"{self._get_archive_file_name()}"
+            )
+
+        return expected_sha256
 
     def _get_release_download_url(self):
         return f"{_download_url_base}/{_gigahorse_release}/{self._get_archive_file_name()}"
@@ -83,3 +345,11 @@ class GigahorseBinaryManager:
             return f"{_gigahorse_release_archive_base}-aarch64.tar.gz"
 
         return f"{_gigahorse_release_archive_base}-x86_64.tar.gz"
+
+
+def create_binary_manager(foxy_config: Dict[str, Any]) -> GigahorseBinaryManager:
+    return GigahorseBinaryManager(
+        cache_path=foxy_config.get("binary_cache_path"),
+        peers=foxy_config.get("binary_peers"),
+        keep_archives=foxy_config.get("binary_peer_port") is not None,
+    )
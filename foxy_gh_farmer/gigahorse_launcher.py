@@ -1,21 +1,43 @@
 import os
 import subprocess
 import sys
+from asyncio import gather, sleep
+from logging import getLogger
 from os.path import join
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from time import perf_counter
+from typing import Dict, Any, Optional, List, Tuple, Type
 
 from chia.daemon.client import DaemonProxy, connect_to_daemon_and_validate
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.rpc.harvester_rpc_client import HarvesterRpcClient
+from chia.rpc.rpc_client import RpcClient
+from chia.rpc.wallet_rpc_client import WalletRpcClient
+from chia.util.ints import uint16
 from chia.util.service_groups import services_for_groups
 
 from foxy_gh_farmer.foundation.daemon.daemon_proxy import ensure_daemon_keyring_is_unlocked, get_daemon_proxy
-from foxy_gh_farmer.gigahorse_binary_manager import GigahorseBinaryManager
+from foxy_gh_farmer.foundation.util.process import drain_process_output
+from foxy_gh_farmer.gigahorse_binary_manager import create_binary_manager
+from foxy_gh_farmer.recompute_proxy import get_recompute_proxy_address
 from foxy_gh_farmer.util.daemon import shutdown_daemon
+from foxy_gh_farmer.util.farmer_control import get_running_farmer_daemon_proxy
+
+_logger = getLogger("gigahorse_launcher")
+_rpc_clients_by_service: Dict[str, Tuple[str, Type[RpcClient]]] = {
+    "chia_farmer": ("farmer", FarmerRpcClient),
+    "chia_harvester": ("harvester", HarvesterRpcClient),
+    "chia_wallet": ("wallet", WalletRpcClient),
+}
 
 
 async def launch_start_daemon(root_path: Path, foxy_config: Dict[str, Any]) -> subprocess.Popen:
     os.environ["CHIA_ROOT"] = str(root_path)
-    if foxy_config.get("recompute_hosts") is not None:
+    recompute_proxy_address = get_recompute_proxy_address(foxy_config)
+    if recompute_proxy_address is not None:
+        # The proxy spreads the connections over the recompute hosts, which can change without restarting gigahorse
+        os.environ["CHIAPOS_RECOMPUTE_HOST"] = recompute_proxy_address
+    elif foxy_config.get("recompute_hosts") is not None:
         if isinstance(foxy_config["recompute_hosts"], str):
             os.environ["CHIAPOS_RECOMPUTE_HOST"] = foxy_config["recompute_hosts"]
         elif isinstance(foxy_config["recompute_hosts"], list) and len(foxy_config["recompute_hosts"]) > 0:
@@ -45,7 +67,7 @@ async def launch_start_daemon(root_path: Path, foxy_config: Dict[str, Any]) -> s
         creationflags = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW
         chia_binary_name = "chia.exe"
 
-    binary_manager = GigahorseBinaryManager()
+    binary_manager = create_binary_manager(foxy_config)
     gigahorse_path = await binary_manager.get_binary_directory_path()
 
     process = subprocess.Popen(
@@ -66,43 +88,113 @@ async def ensure_daemon_running_and_unlocked(
     foxy_config: Dict[str, Any],
     quiet: bool = False,
 ) -> Tuple[Optional[DaemonProxy], bool]:
-    did_start_daemon = False
+    running_farmer_daemon_proxy = await get_running_farmer_daemon_proxy(root_path)
+    if running_farmer_daemon_proxy is not None:
+        return running_farmer_daemon_proxy, False
+
+    daemon_proxy, daemon_process = await ensure_daemon_process_running_and_unlocked(
+        root_path, config, foxy_config, quiet=quiet
+    )
+
+    return daemon_proxy, daemon_process is not None
+
+
+async def ensure_daemon_process_running_and_unlocked(
+    root_path: Path,
+    config: Dict[str, Any],
+    foxy_config: Dict[str, Any],
+    quiet: bool = False,
+) -> Tuple[Optional[DaemonProxy], Optional[subprocess.Popen]]:
+    process: Optional[subprocess.Popen] = None
     daemon_proxy = await connect_to_daemon_and_validate(root_path, config, quiet=True)
     if daemon_proxy is None:
         if not quiet:
             print("Starting daemon")
         # launch a daemon
+        spawn_started_at = perf_counter()
         process = await launch_start_daemon(root_path, foxy_config)
-        did_start_daemon = True
         if process.stdout:
             process.stdout.readline()
+        drain_process_output(process, getLogger("daemon"))
         daemon_proxy = await get_daemon_proxy(root_path, config)
+        _logger.info(f"Daemon spawned in {perf_counter() - spawn_started_at:.2f}s")
     if daemon_proxy:
         try:
+            unlock_started_at = perf_counter()
             await ensure_daemon_keyring_is_unlocked(daemon_proxy)
+            _logger.info(f"Keyring unlocked in {perf_counter() - unlock_started_at:.2f}s")
         except KeyboardInterrupt:
-            if did_start_daemon:
+            if process is not None:
                 await shutdown_daemon(daemon_proxy, quiet=quiet)
             await daemon_proxy.close()
 
             raise
 
-        return daemon_proxy, did_start_daemon
-    return None, did_start_daemon
+        return daemon_proxy, process
+    return None, process
 
 
 async def async_start(daemon_proxy: DaemonProxy, group: List[str]) -> None:
-    for service in services_for_groups(group):
-        if await daemon_proxy.is_running(service_name=service):
-            continue
-        print(f"{service}: ", end="", flush=True)
-        msg = await daemon_proxy.start_service(service_name=service)
-        success = msg and msg["data"]["success"]
-
-        if success is True:
-            print("started")
-        else:
-            error = "no response"
-            if msg:
-                error = msg["data"]["error"]
-            print(f"{service} failed to start. Error: {error}")
+    started_at = perf_counter()
+    await gather(*[_start_service(daemon_proxy, service) for service in services_for_groups(group)])
+    _logger.info(f"Services started in {perf_counter() - started_at:.2f}s")
+
+
+async def _start_service(daemon_proxy: DaemonProxy, service: str):
+    if await daemon_proxy.is_running(service_name=service):
+        return
+    msg = await daemon_proxy.start_service(service_name=service)
+    success = msg and msg["data"]["success"]
+
+    if success is True:
+        print(f"{service}: started")
+    else:
+        error = "no response"
+        if msg:
+            error = msg["data"]["error"]
+        print(f"{service} failed to start. Error: {error}")
+
+
+async def await_services_ready(
+    root_path: Path,
+    config: Dict[str, Any],
+    group: List[str],
+    timeout_seconds: float = 120,
+) -> bool:
+    started_at = perf_counter()
+    services = [service for service in services_for_groups(group) if service in _rpc_clients_by_service]
+    results = await gather(
+        *[_await_service_ready(root_path, config, service, timeout_seconds=timeout_seconds) for service in services]
+    )
+    _logger.info(f"Service RPCs ready in {perf_counter() - started_at:.2f}s")
+
+    return all(results)
+
+
+async def _await_service_ready(root_path: Path, config: Dict[str, Any], service: str, timeout_seconds: float) -> bool:
+    config_section, rpc_client_class = _rpc_clients_by_service[service]
+    rpc_client = await rpc_client_class.create(
+        config["self_hostname"],
+        uint16(config[config_section]["rpc_port"]),
+        root_path,
+        config,
+    )
+    started_at = perf_counter()
+    delay_seconds = 0.1
+    try:
+        while True:
+            try:
+                await rpc_client.healthz()
+                _logger.info(f"{service}: ready after {perf_counter() - started_at:.2f}s")
+
+                return True
+            except Exception:
+                if perf_counter() - started_at + delay_seconds > timeout_seconds:
+                    _logger.warning(f"{service}: RPC not ready after {timeout_seconds:.0f}s")
+
+                    return False
+                await sleep(delay_seconds)
+                delay_seconds = min(delay_seconds * 2, 5)
+    finally:
+        rpc_client.close()
+        await rpc_client.await_closed()
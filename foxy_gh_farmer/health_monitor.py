@@ -0,0 +1,252 @@
+from asyncio import create_task, sleep, wait_for, Task, CancelledError, TimeoutError
+from logging import getLogger
+from pathlib import Path
+from time import monotonic, time
+from typing import Dict, Any, Optional, Tuple, List, Set
+
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.util.ints import uint16
+
+from foxy_gh_farmer.daemon_supervisor import DaemonSupervisor
+from foxy_gh_farmer.foundation.alerting.alert_notifier import Alert, AlertNotifier
+from foxy_gh_farmer.foundation.syslog.farming_metrics_extractor import FarmingMetricsExtractor
+from foxy_gh_farmer.foundation.util.systemd import notify_systemd
+
+local_harvester_subject = "local"
+slow_proof_lookups_alert_name = "slow_proof_lookups"
+harvester_not_reporting_alert_name = "harvester_not_reporting"
+farmer_unreachable_alert_name = "farmer_unreachable"
+# Harvesters which were removed on purpose should not be reported forever
+_forget_disconnected_harvester_after_seconds = 24 * 60 * 60
+# Restarting the farmer does not bring back a remote harvester, so a lasting disconnect is only reported
+_disconnected_harvester_unhealthy_seconds = 10 * 60
+
+
+class HealthMonitor:
+    """
+    Checks the proof lookup latency SLO of the local harvester against the lookups reported in its logs, and whether
+    the local harvester keeps reporting and remote harvesters stay connected. Alerts which start or stop firing are
+    passed to the notifier and the current alerts are reported to `health` checks.
+    """
+
+    _root_path: Path
+    _config: Dict[str, Any]
+    _farming_metrics: FarmingMetricsExtractor
+    _daemon_supervisor: DaemonSupervisor
+    _notifier: AlertNotifier
+    _p95_threshold_seconds: float
+    _window_seconds: float
+    _report_timeout_seconds: float
+    _min_samples: int
+    _check_interval_seconds: float
+    _is_local_harvester_expected: bool
+    _started_at: float
+    _firing_alerts: Dict[Tuple[str, str], Tuple[Alert, int]]
+    # The host and last seen time of every harvester which connected since startup, by node ID
+    _known_harvesters: Dict[str, Tuple[str, float]]
+    _farmer_rpc_client: Optional[FarmerRpcClient] = None
+    _check_task: Optional[Task] = None
+    _watchdog_task: Optional[Task] = None
+    _notification_tasks: Set[Task]
+    _logger = getLogger("health_monitor")
+
+    def __init__(
+        self,
+        root_path: Path,
+        config: Dict[str, Any],
+        farming_metrics: FarmingMetricsExtractor,
+        daemon_supervisor: DaemonSupervisor,
+        notifier: AlertNotifier,
+        is_local_harvester_expected: bool,
+        p95_threshold_seconds: float = 5,
+        window_seconds: float = 600,
+        report_timeout_seconds: float = 120,
+        min_samples: int = 10,
+        check_interval_seconds: float = 15,
+    ):
+        self._root_path = root_path
+        self._config = config
+        self._farming_metrics = farming_metrics
+        self._daemon_supervisor = daemon_supervisor
+        self._notifier = notifier
+        self._is_local_harvester_expected = is_local_harvester_expected
+        self._p95_threshold_seconds = p95_threshold_seconds
+        self._window_seconds = window_seconds
+        self._report_timeout_seconds = report_timeout_seconds
+        self._min_samples = min_samples
+        self._check_interval_seconds = check_interval_seconds
+        self._started_at = monotonic()
+        self._firing_alerts = {}
+        self._known_harvesters = {}
+        self._notification_tasks = set()
+
+    def start(self):
+        self._started_at = monotonic()
+        self._check_task = create_task(self._check_periodically())
+        self._watchdog_task = create_task(self._notify_watchdog_periodically())
+
+    async def stop(self):
+        for task in [self._watchdog_task, self._check_task, *self._notification_tasks]:
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except CancelledError:
+                pass
+        self._watchdog_task = None
+        self._check_task = None
+        self._notification_tasks.clear()
+        if self._farmer_rpc_client is not None:
+            self._farmer_rpc_client.close()
+            await self._farmer_rpc_client.await_closed()
+            self._farmer_rpc_client = None
+
+    def get_health(self) -> Dict[str, Any]:
+        is_daemon_running = self._daemon_supervisor.daemon_proxy is not None
+
+        return {
+            "healthy": is_daemon_running and not any(alert.is_unhealthy for alert, _ in self._firing_alerts.values()),
+            "daemon_running": is_daemon_running,
+            "alerts": [
+                {
+                    "alert": alert.name,
+                    "subject": alert.subject,
+                    "message": alert.message,
+                    "is_unhealthy": alert.is_unhealthy,
+                    "since": since,
+                }
+                for alert, since in self._firing_alerts.values()
+            ],
+        }
+
+    async def _check_periodically(self):
+        while True:
+            await sleep(self._check_interval_seconds)
+            try:
+                await wait_for(self._check(), timeout=self._check_interval_seconds)
+            except CancelledError:
+                raise
+            except TimeoutError:
+                self._logger.warning(f"Checking the farm health took longer than {self._check_interval_seconds}s")
+            except Exception as e:
+                self._logger.warning(f"Could not check the farm health: {e}")
+
+    async def _notify_watchdog_periodically(self):
+        # The watchdog only tracks whether foxy-gh-farmer and its daemon supervisor are alive, slow health checks,
+        # alerts and daemon restarts, which can back off for minutes, must not cause restarts
+        while True:
+            await sleep(self._check_interval_seconds)
+            if self._daemon_supervisor.is_supervising:
+                notify_systemd("WATCHDOG=1")
+
+    async def _check(self):
+        alerts: List[Alert] = []
+        if self._is_local_harvester_expected:
+            alerts.extend(self._check_local_harvester())
+        alerts.extend(await self._check_harvester_connections())
+        self._update_firing_alerts(alerts)
+
+    def _check_local_harvester(self) -> List[Alert]:
+        alerts: List[Alert] = []
+        proof_lookup_times = self._farming_metrics.proof_lookup_times
+        last_reported_at = proof_lookup_times.last_timestamp()
+        seconds_since_last_report = monotonic() - max(last_reported_at or 0, self._started_at)
+        if seconds_since_last_report > self._report_timeout_seconds:
+            alerts.append(
+                Alert(
+                    name=harvester_not_reporting_alert_name,
+                    subject=local_harvester_subject,
+                    message=f"The local harvester did not report a proof lookup for {seconds_since_last_report:.0f}s",
+                )
+            )
+        lookup_times = proof_lookup_times.values(max_age_seconds=self._window_seconds)
+        if len(lookup_times) >= self._min_samples:
+            p95 = proof_lookup_times.quantile(0.95, max_age_seconds=self._window_seconds)
+            if p95 is not None and p95 > self._p95_threshold_seconds:
+                alerts.append(
+                    Alert(
+                        name=slow_proof_lookups_alert_name,
+                        subject=local_harvester_subject,
+                        message=(
+                            f"The p95 of the last {len(lookup_times)} proof lookups of the local harvester is "
+                            f"{p95:.2f}s, above the threshold of {self._p95_threshold_seconds:.2f}s"
+                        ),
+                    )
+                )
+
+        return alerts
+
+    async def _check_harvester_connections(self) -> List[Alert]:
+        try:
+            if self._farmer_rpc_client is None:
+                self._farmer_rpc_client = await FarmerRpcClient.create(
+                    self._config["self_hostname"],
+                    uint16(self._config["farmer"]["rpc_port"]),
+                    self._root_path,
+                    self._config,
+                )
+            harvesters_summary = await self._farmer_rpc_client.get_harvesters_summary()
+        except CancelledError:
+            raise
+        except Exception as e:
+            # Without a response the harvester connections are unknown, keep their alerts as they are
+            alerts = [
+                alert
+                for (name, subject), (alert, _) in self._firing_alerts.items()
+                if name == harvester_not_reporting_alert_name and subject != local_harvester_subject
+            ]
+            alerts.append(
+                Alert(
+                    name=farmer_unreachable_alert_name,
+                    subject="farmer",
+                    message=f"Could not fetch the harvesters from the farmer: {e}",
+                )
+            )
+
+            return alerts
+        now = monotonic()
+        for harvester in harvesters_summary["harvesters"]:
+            self._known_harvesters[harvester["connection"]["node_id"]] = (harvester["connection"]["host"], now)
+        self._known_harvesters = {
+            node_id: (host, last_seen_at)
+            for node_id, (host, last_seen_at) in self._known_harvesters.items()
+            if now - last_seen_at <= _forget_disconnected_harvester_after_seconds
+        }
+
+        return [
+            Alert(
+                name=harvester_not_reporting_alert_name,
+                subject=node_id,
+                message=(
+                    f"The harvester {host} ({node_id[:8]}...) disconnected from the farmer "
+                    f"{now - last_seen_at:.0f}s ago"
+                ),
+                is_unhealthy=now - last_seen_at <= _disconnected_harvester_unhealthy_seconds,
+            )
+            for node_id, (host, last_seen_at) in self._known_harvesters.items()
+            if last_seen_at != now
+        ]
+
+    def _update_firing_alerts(self, alerts: List[Alert]):
+        alerts_by_key = {(alert.name, alert.subject): alert for alert in alerts}
+        for key, (alert, _) in list(self._firing_alerts.items()):
+            if key in alerts_by_key:
+                continue
+            del self._firing_alerts[key]
+            self._logger.info(f"Resolved the {alert.name} alert of {alert.subject}")
+            self._notify(alert, is_firing=False)
+        for key, alert in alerts_by_key.items():
+            firing_alert = self._firing_alerts.get(key)
+            # Keep the message up to date without notifying again
+            self._firing_alerts[key] = (alert, firing_alert[1] if firing_alert is not None else int(time()))
+            if firing_alert is not None:
+                continue
+            self._logger.warning(alert.message)
+            self._notify(alert, is_firing=True)
+
+    def _notify(self, alert: Alert, is_firing: bool):
+        # Slow webhooks or commands must not delay the next check
+        task = create_task(self._notifier.notify(alert, is_firing=is_firing))
+        self._notification_tasks.add(task)
+        task.add_done_callback(self._notification_tasks.discard)
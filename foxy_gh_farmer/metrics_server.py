@@ -0,0 +1,378 @@
+from asyncio import create_task, sleep, Task, CancelledError
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from aiohttp import web
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.util.ints import uint16
+from psutil import Process, NoSuchProcess
+
+from foxy_gh_farmer.daemon_supervisor import DaemonSupervisor
+from foxy_gh_farmer.foundation.metrics.prometheus_text_writer import PrometheusTextWriter, prometheus_text_content_type
+from foxy_gh_farmer.foundation.proxy.tcp_load_balancer import TcpLoadBalancer
+from foxy_gh_farmer.foundation.syslog.farming_metrics_extractor import FarmingMetricsExtractor
+from foxy_gh_farmer.syslog_server import SyslogServer
+
+_proof_lookup_time_quantiles = [0.5, 0.9, 0.95, 0.99]
+
+
+class MetricsServer:
+    """
+    Serves a Prometheus compatible `/metrics` endpoint. Scrapes only render cached values, the process stats and
+    harvester summaries are refreshed in the background.
+    """
+
+    _host: str
+    _port: int
+    _root_path: Path
+    _config: Dict[str, Any]
+    _syslog_server: SyslogServer
+    _farming_metrics: FarmingMetricsExtractor
+    _daemon_supervisor: DaemonSupervisor
+    _recompute_proxy: Optional[TcpLoadBalancer]
+    _update_interval_seconds: float
+    _process: Process
+    _process_stats: Dict[str, float]
+    _harvesters: List[Dict[str, Any]]
+    _syslog_socket_drops: Optional[int] = None
+    _farmer_rpc_client: Optional[FarmerRpcClient] = None
+    _runner: Optional[web.AppRunner] = None
+    _update_task: Optional[Task] = None
+    _logger = getLogger("metrics_server")
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        root_path: Path,
+        config: Dict[str, Any],
+        syslog_server: SyslogServer,
+        farming_metrics: FarmingMetricsExtractor,
+        daemon_supervisor: DaemonSupervisor,
+        recompute_proxy: Optional[TcpLoadBalancer] = None,
+        update_interval_seconds: float = 15,
+    ):
+        self._host = host
+        self._port = port
+        self._root_path = root_path
+        self._config = config
+        self._syslog_server = syslog_server
+        self._farming_metrics = farming_metrics
+        self._daemon_supervisor = daemon_supervisor
+        self._recompute_proxy = recompute_proxy
+        self._update_interval_seconds = update_interval_seconds
+        self._process = Process()
+        self._process_stats = {}
+        self._harvesters = []
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self._host, port=self._port).start()
+        self._update_task = create_task(self._update_periodically())
+        self._logger.info(f"Serving metrics on http://{self._host}:{self._port}/metrics")
+
+    async def stop(self):
+        if self._update_task is not None:
+            self._update_task.cancel()
+            try:
+                await self._update_task
+            except CancelledError:
+                pass
+            self._update_task = None
+        if self._farmer_rpc_client is not None:
+            self._farmer_rpc_client.close()
+            await self._farmer_rpc_client.await_closed()
+            self._farmer_rpc_client = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _update_periodically(self):
+        while True:
+            try:
+                self._update_process_stats()
+                self._syslog_socket_drops = self._syslog_server.read_socket_drops()
+                await self._update_harvesters()
+            except CancelledError:
+                raise
+            except Exception as e:
+                self._logger.warning(f"Could not update the metrics: {e}")
+            await sleep(self._update_interval_seconds)
+
+    def _update_process_stats(self):
+        process_stats: Dict[str, float] = {
+            "cpu_seconds": 0,
+            "rss_bytes": 0,
+            "children_cpu_seconds": 0,
+            "children_rss_bytes": 0,
+        }
+        with self._process.oneshot():
+            cpu_times = self._process.cpu_times()
+            process_stats["cpu_seconds"] = cpu_times.user + cpu_times.system
+            process_stats["rss_bytes"] = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                with child.oneshot():
+                    cpu_times = child.cpu_times()
+                    process_stats["children_cpu_seconds"] += cpu_times.user + cpu_times.system
+                    process_stats["children_rss_bytes"] += child.memory_info().rss
+            except NoSuchProcess:
+                continue
+        self._process_stats = process_stats
+
+    async def _update_harvesters(self):
+        try:
+            if self._farmer_rpc_client is None:
+                self._farmer_rpc_client = await FarmerRpcClient.create(
+                    self._config["self_hostname"],
+                    uint16(self._config["farmer"]["rpc_port"]),
+                    self._root_path,
+                    self._config,
+                )
+            harvesters_summary = await self._farmer_rpc_client.get_harvesters_summary()
+            self._harvesters = harvesters_summary["harvesters"]
+        except Exception as e:
+            self._logger.debug(f"Could not update the harvester summary: {e}")
+
+    async def _handle_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(body=self._render_metrics(), headers={"Content-Type": prometheus_text_content_type})
+
+    def _render_metrics(self) -> str:
+        writer = PrometheusTextWriter()
+        if len(self._process_stats) > 0:
+            (
+                writer.counter(
+                    "process_cpu_seconds_total",
+                    "Total user and system CPU time spent in seconds",
+                    self._process_stats["cpu_seconds"],
+                )
+                .gauge(
+                    "process_resident_memory_bytes", "Resident memory size in bytes", self._process_stats["rss_bytes"]
+                )
+                .counter(
+                    "foxy_gh_farmer_gigahorse_cpu_seconds_total",
+                    "Total CPU time spent by the gigahorse processes in seconds",
+                    self._process_stats["children_cpu_seconds"],
+                )
+                .gauge(
+                    "foxy_gh_farmer_gigahorse_resident_memory_bytes",
+                    "Resident memory size of the gigahorse processes in bytes",
+                    self._process_stats["children_rss_bytes"],
+                )
+            )
+
+        (
+            writer.counter(
+                "foxy_gh_farmer_daemon_restarts_total",
+                "Daemon restarts after unexpected exits",
+                self._daemon_supervisor.daemon_restarts,
+            )
+            .counter(
+                "foxy_gh_farmer_service_restarts_total",
+                "Service restarts after unexpected exits",
+                self._daemon_supervisor.service_restarts,
+            )
+            .counter(
+                "foxy_gh_farmer_downtime_seconds_total",
+                "Time spent restarting the daemon or services",
+                self._daemon_supervisor.downtime_seconds,
+            )
+        )
+
+        syslog_server = self._syslog_server
+        (
+            writer.counter(
+                "foxy_gh_farmer_syslog_datagrams_total",
+                "Syslog messages received from gigahorse",
+                syslog_server.received_datagrams,
+            )
+            .counter(
+                "foxy_gh_farmer_syslog_parse_errors_total",
+                "Syslog messages which could not be parsed",
+                syslog_server.parse_errors,
+            )
+            .samples(
+                "foxy_gh_farmer_log_lines_total",
+                "Log lines received per gigahorse service",
+                "counter",
+                [
+                    ({"service": service.decode("ascii")}, count)
+                    for service, count in syslog_server.lines_by_service.items()
+                ],
+            )
+        )
+        if self._syslog_socket_drops is not None:
+            writer.counter(
+                "foxy_gh_farmer_syslog_socket_drops_total",
+                "Syslog datagrams dropped by the kernel",
+                self._syslog_socket_drops,
+            )
+        if syslog_server.log_emitter is not None:
+            (
+                writer.counter(
+                    "foxy_gh_farmer_log_records_dropped_total",
+                    "Log records dropped because the log queue was full",
+                    syslog_server.log_emitter.dropped_records,
+                ).gauge(
+                    "foxy_gh_farmer_log_queue_depth",
+                    "Log records waiting to be written",
+                    syslog_server.log_emitter.queue_depth,
+                )
+            )
+
+        farming_metrics = self._farming_metrics
+        proof_lookup_times = farming_metrics.proof_lookup_times.values()
+        (
+            writer.histogram(
+                "foxy_gh_farmer_proof_lookup_seconds",
+                "Proof lookup durations reported by the local harvester",
+                farming_metrics.proof_lookup_time_histogram,
+            )
+            .summary(
+                "foxy_gh_farmer_proof_lookup_window_seconds",
+                f"Proof lookup duration quantiles over the last {farming_metrics.window_seconds:.0f} seconds",
+                farming_metrics.proof_lookup_times.quantiles(_proof_lookup_time_quantiles),
+                count=len(proof_lookup_times),
+                total=sum(proof_lookup_times),
+            )
+            .histogram(
+                "foxy_gh_farmer_recompute_seconds",
+                "Recompute durations reported by the local harvester",
+                farming_metrics.recompute_time_histogram,
+            )
+            .gauge(
+                "foxy_gh_farmer_local_harvester_plots",
+                "Plots reported by the local harvester logs",
+                farming_metrics.plot_count,
+            )
+            .gauge(
+                "foxy_gh_farmer_eligible_plots_mean",
+                "Mean eligible plots per signage point over the window",
+                farming_metrics.eligible_plots.mean(),
+            )
+            .counter(
+                "foxy_gh_farmer_signage_points_total",
+                "Signage points processed by the local harvester",
+                farming_metrics.signage_points,
+            )
+            .counter(
+                "foxy_gh_farmer_proofs_found_total", "Proofs found by the local harvester", farming_metrics.proofs_found
+            )
+            .counter(
+                "foxy_gh_farmer_slow_quality_lookups_total",
+                "Quality lookups which took longer than 8 seconds",
+                farming_metrics.slow_quality_lookups,
+            )
+            .counter(
+                "foxy_gh_farmer_partials_submitted_total",
+                "Partials submitted to the pool",
+                farming_metrics.partials_submitted,
+            )
+            .counter(
+                "foxy_gh_farmer_partials_accepted_total",
+                "Partials accepted by the pool",
+                farming_metrics.partials_accepted,
+            )
+            .counter(
+                "foxy_gh_farmer_partials_stale_total",
+                "Partials rejected by the pool for being too late",
+                farming_metrics.partials_stale,
+            )
+            .samples(
+                "foxy_gh_farmer_partials_rejected_total",
+                "Partials rejected by the pool per error code",
+                "counter",
+                [
+                    ({"error_code": str(error_code)}, count)
+                    for error_code, count in farming_metrics.partial_errors_by_code.items()
+                ],
+            )
+            .gauge(
+                "foxy_gh_farmer_partial_acceptance_ratio",
+                "Ratio of accepted partials over the window",
+                farming_metrics.partial_acceptance_rate(),
+            )
+            .gauge(
+                "foxy_gh_farmer_partial_stale_ratio",
+                "Ratio of stale partials over the window",
+                farming_metrics.stale_ratio(),
+            )
+        )
+
+        harvester_plot_samples = []
+        harvester_effective_size_samples = []
+        for harvester in self._harvesters:
+            labels = {"node_id": harvester["connection"]["node_id"][:8], "host": harvester["connection"]["host"]}
+            harvester_plot_samples.append((labels, harvester["plots"]))
+            harvester_effective_size_samples.append((labels, harvester["total_effective_plot_size"]))
+        (
+            writer.samples(
+                "foxy_gh_farmer_harvester_plots", "Plots per connected harvester", "gauge", harvester_plot_samples
+            ).samples(
+                "foxy_gh_farmer_harvester_effective_plot_size_bytes",
+                "Effective plot size per connected harvester",
+                "gauge",
+                harvester_effective_size_samples,
+            )
+        )
+
+        if self._recompute_proxy is not None:
+            backends = [({"host": backend.address}, backend) for backend in self._recompute_proxy.backends]
+            (
+                writer.samples(
+                    "foxy_gh_farmer_recompute_host_up",
+                    "Whether the recompute host is healthy",
+                    "gauge",
+                    [(labels, 1 if backend.is_healthy else 0) for labels, backend in backends],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_active_connections",
+                    "Connections currently proxied to the recompute host",
+                    "gauge",
+                    [(labels, backend.active_connections) for labels, backend in backends],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_connections_total",
+                    "Connections proxied to the recompute host",
+                    "counter",
+                    [(labels, backend.total_connections) for labels, backend in backends],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_connect_errors_total",
+                    "Failed connects to the recompute host",
+                    "counter",
+                    [(labels, backend.connect_errors) for labels, backend in backends],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_health_check_errors_total",
+                    "Failed health checks of the recompute host",
+                    "counter",
+                    [(labels, backend.health_check_errors) for labels, backend in backends],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_connect_latency_seconds",
+                    "Smoothed connect latency of the recompute host",
+                    "gauge",
+                    [
+                        (labels, backend.connect_latency_seconds)
+                        for labels, backend in backends
+                        if backend.connect_latency_seconds is not None
+                    ],
+                )
+                .samples(
+                    "foxy_gh_farmer_recompute_host_response_latency_seconds",
+                    "Smoothed latency until the recompute host answered a connection",
+                    "gauge",
+                    [
+                        (labels, backend.response_latency_seconds)
+                        for labels, backend in backends
+                        if backend.response_latency_seconds is not None
+                    ],
+                )
+            )
+
+        return writer.render()
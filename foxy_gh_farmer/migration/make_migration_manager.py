@@ -1,16 +1,22 @@
 from os.path import expanduser
 from pathlib import Path
+from typing import Set, Optional
 
 from foxy_gh_farmer.foundation.migration.migration_manager import MigrationManager
 from foxy_gh_farmer.foundation.migration.migrations.copy_plot_nfts import CopyPlotNftsMigration
 from foxy_gh_farmer.foundation.migration.migrations.farmer_api_url import FarmerApiUrlMigration
 
 
-def make_migration_manager() -> MigrationManager:
+def make_migration_manager(
+    patched_chia_config_keys: Optional[Set[str]] = None,
+    dry_run: bool = False,
+) -> MigrationManager:
     return MigrationManager(
         state_path=Path(expanduser("~/.foxy-gh-farmer/migrations.yaml")).resolve(),
         migrations=[
             CopyPlotNftsMigration(),
             FarmerApiUrlMigration(),
         ],
+        patched_chia_config_keys=patched_chia_config_keys or set(),
+        dry_run=dry_run,
     )
@@ -0,0 +1,51 @@
+from typing import Dict, Any, List, Tuple, Optional
+
+from foxy_gh_farmer.foundation.proxy.tcp_load_balancer import TcpLoadBalancer
+
+# The default port of the gigahorse chia_recompute_server
+default_recompute_port = 11989
+
+
+def get_recompute_hosts(foxy_config: Dict[str, Any]) -> List[str]:
+    recompute_hosts = foxy_config.get("recompute_hosts")
+    if isinstance(recompute_hosts, str):
+        return [host.strip() for host in recompute_hosts.split(",") if host.strip() != ""]
+    if isinstance(recompute_hosts, list):
+        return [str(host) for host in recompute_hosts]
+
+    return []
+
+
+def parse_recompute_host(recompute_host: str) -> Tuple[str, int]:
+    host, separator, port = recompute_host.rpartition(":")
+    # A bare IPv6 address or a host without a port
+    if separator == "" or ":" in host and not host.endswith("]"):
+        return recompute_host.strip("[]"), default_recompute_port
+
+    return host.strip("[]"), int(port)
+
+
+def get_recompute_proxy_address(foxy_config: Dict[str, Any]) -> Optional[str]:
+    """
+    The address gigahorse connects to instead of the recompute hosts when the recompute proxy is enabled.
+    """
+    if foxy_config.get("recompute_proxy_port") is None:
+        return None
+    host = foxy_config.get("recompute_proxy_host", "127.0.0.1")
+    if host in ["0.0.0.0", "::"]:
+        host = "127.0.0.1"
+
+    return f"{host}:{foxy_config['recompute_proxy_port']}"
+
+
+def create_recompute_proxy(foxy_config: Dict[str, Any]) -> TcpLoadBalancer:
+    recompute_hosts = get_recompute_hosts(foxy_config)
+    if len(recompute_hosts) == 0:
+        raise RuntimeError("The recompute_proxy_port is set but there are no recompute_hosts to proxy to")
+
+    return TcpLoadBalancer(
+        host=foxy_config.get("recompute_proxy_host", "127.0.0.1"),
+        port=foxy_config["recompute_proxy_port"],
+        backends=[parse_recompute_host(host) for host in recompute_hosts],
+        health_check_interval_seconds=foxy_config.get("recompute_health_check_interval", 10),
+    )
@@ -1,12 +1,13 @@
-import aioudp
-
-from asyncio import sleep
-from logging import getLogger
-from typing import Dict, Any
-from pyparsing import Word, alphas, Suppress, nums, Regex
-
-from foxy_gh_farmer.foxy_gh_farmer_logging import add_stdout_handler
+import re
+from asyncio import Event, to_thread, DatagramProtocol, get_running_loop
+from logging import getLogger, Logger
+from socket import socket, AF_INET, SOCK_DGRAM, SOL_SOCKET, SO_RCVBUF
+from typing import Dict, Any, Pattern, Optional, Tuple, List, Callable
 
+from foxy_gh_farmer.foundation.logging.queued_log_emitter import QueuedLogEmitter
+from foxy_gh_farmer.foundation.syslog.log_line_extractor import LogLineExtractor
+from foxy_gh_farmer.foundation.syslog.socket_stats import read_udp_socket_drops
+from foxy_gh_farmer.foxy_gh_farmer_logging import add_stdout_handler, make_stdout_handler
 
 def map_priority_to_log_level(priority: int) -> int:
     level = priority - 8
@@ -24,54 +25,150 @@ def map_priority_to_log_level(priority: int) -> int:
     return 0
 
 
-class Parser(object):
-    def __init__(self):
-        ints = Word(nums)
-
-        # priority
-        priority = Suppress("<") + ints + Suppress(">")
-
-        # service
-        hostname = Word(alphas + nums + "_" + "-" + ".")
+class SyslogParseError(ValueError):
+    pass
 
-        # message
-        message = Regex("(.|\n)*\x00")
 
-        # pattern build
-        self.__pattern = priority + hostname + message
+class Parser:
+    # <priority>service message\x00, matching what Gigahorse sends via its SysLogHandler
+    _pattern: Pattern[bytes] = re.compile(
+        rb"[ \t\r\n]*<[ \t\r\n]*([0-9]+)[ \t\r\n]*>[ \t\r\n]*([A-Za-z0-9_.\-]+)[ \t\r\n]*(.*)\x00", re.DOTALL
+    )
 
-    def parse(self, line):
-        parsed = self.__pattern.parseString(line)
-        priority = int(parsed[0])
+    def parse(self, line: bytes) -> Dict[str, Any]:
+        log_level, service, message = self.parse_raw(line)
 
         return {
-            "log_level": map_priority_to_log_level(priority),
-            "service": parsed[1],
-            "message": parsed[2].rstrip("\x00"),
+            "log_level": log_level,
+            "service": service.decode("ascii"),
+            "message": decode_message(message),
         }
 
+    def parse_raw(self, line: bytes) -> Tuple[int, bytes, bytes]:
+        match = self._pattern.match(line)
+        if match is None:
+            raise SyslogParseError(f"Unable to parse syslog line: {line[:100]!r}")
+        priority, service, message = match.groups()
+
+        return map_priority_to_log_level(int(priority)), service, message
+
+
+def decode_message(message: bytes) -> str:
+    return message.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+
+class SyslogDatagramProtocol(DatagramProtocol):
+    _handle_message: Callable[[bytes], None]
+
+    def __init__(self, handle_message: Callable[[bytes], None]):
+        self._handle_message = handle_message
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self._handle_message(data)
+
 
 class SyslogServer:
+    """
+    Receives the syslog datagrams of gigahorse and re-logs them. The receive buffer is enlarged to absorb bursts.
+    """
     _parser: Parser = Parser()
     _logging_config: Dict[str, Any]
-    _is_shut_down: bool = False
-
-    def __init__(self, logging_config: Dict[str, Any]):
+    _receive_buffer_size: int
+    _udp_socket: Optional[socket] = None
+    _log_emitter: Optional[QueuedLogEmitter] = None
+    _loggers: Dict[bytes, Logger]
+    _extractors: List[LogLineExtractor]
+    _extractors_by_service: Dict[bytes, List[LogLineExtractor]]
+    _logger = getLogger("syslog_server")
+    _shutdown_requested: Event
+    received_datagrams: int = 0
+    parse_errors: int = 0
+    lines_by_service: Dict[bytes, int]
+
+    def __init__(
+        self,
+        logging_config: Dict[str, Any],
+        queue_size: Optional[int] = None,
+        extractors: Optional[List[LogLineExtractor]] = None,
+        receive_buffer_size: int = 8 * 2**20,
+    ):
         self._logging_config = logging_config
-
-    async def _handle_connection(self, connection):
-        async for message in connection:
-            parsed = self._parser.parse(bytes.decode(message.strip()))
-            logger = getLogger(parsed["service"])
-            logger.propagate = False
-            if not logger.hasHandlers():
+        self._receive_buffer_size = receive_buffer_size
+        self._shutdown_requested = Event()
+        self._loggers = {}
+        self._extractors = extractors if extractors is not None else []
+        self._extractors_by_service = {}
+        self.lines_by_service = {}
+        if queue_size is not None:
+            self._log_emitter = QueuedLogEmitter(
+                handlers=[make_stdout_handler(logging_config=logging_config)],
+                max_queue_size=queue_size,
+            )
+
+    @property
+    def log_emitter(self) -> Optional[QueuedLogEmitter]:
+        return self._log_emitter
+
+    def read_socket_drops(self) -> Optional[int]:
+        if self._udp_socket is None:
+            return None
+
+        return read_udp_socket_drops(self._udp_socket)
+
+    def _handle_message(self, message: bytes):
+        self.received_datagrams += 1
+        try:
+            log_level, service, raw_message = self._parser.parse_raw(message.strip())
+        except SyslogParseError:
+            self.parse_errors += 1
+            return
+        self.lines_by_service[service] = self.lines_by_service.get(service, 0) + 1
+        extractors = self._extractors_by_service.get(service)
+        if extractors is None:
+            extractors = [e for e in self._extractors if e.services is None or service in e.services]
+            self._extractors_by_service[service] = extractors
+        for extractor in extractors:
+            extractor.process(service, raw_message)
+        logger = self._loggers.get(service)
+        if logger is None:
+            logger = self._make_logger(service.decode("ascii"))
+            self._loggers[service] = logger
+        if not logger.isEnabledFor(log_level):
+            return
+        logger.log(log_level, decode_message(raw_message))
+
+    def _make_logger(self, service: str) -> Logger:
+        logger = getLogger(service)
+        logger.propagate = False
+        if not logger.hasHandlers():
+            if self._log_emitter is not None:
+                logger.addHandler(self._log_emitter.queue_handler)
+            else:
                 add_stdout_handler(logger, logging_config=self._logging_config)
-            logger.log(parsed["log_level"], parsed["message"])
+
+        return logger
 
     async def run(self):
-        async with aioudp.serve("127.0.0.1", self._logging_config["log_syslog_port"], self._handle_connection):
-            while self._is_shut_down is False:
-                await sleep(1)
+        if self._log_emitter is not None:
+            self._log_emitter.start()
+        try:
+            udp_socket = socket(AF_INET, SOCK_DGRAM)
+            udp_socket.setsockopt(SOL_SOCKET, SO_RCVBUF, self._receive_buffer_size)
+            udp_socket.bind(("127.0.0.1", self._logging_config["log_syslog_port"]))
+            self._logger.debug(f"Syslog receive buffer size: {udp_socket.getsockopt(SOL_SOCKET, SO_RCVBUF)} bytes")
+            transport, _ = await get_running_loop().create_datagram_endpoint(
+                lambda: SyslogDatagramProtocol(self._handle_message),
+                sock=udp_socket,
+            )
+            self._udp_socket = udp_socket
+            try:
+                await self._shutdown_requested.wait()
+            finally:
+                transport.close()
+                self._udp_socket = None
+        finally:
+            if self._log_emitter is not None:
+                await to_thread(self._log_emitter.stop)
 
     def shutdown(self):
-        self._is_shut_down = True
+        self._shutdown_requested.set()
@@ -0,0 +1,31 @@
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from chia.util.config import config_path_for_filename, load_config, lock_config
+
+from foxy_gh_farmer.foundation.config.yaml_file import load_cached_yaml, save_cached_yaml
+
+_config_file_name = "config.yaml"
+
+
+def load_chia_config(root_path: Path) -> Dict[str, Any]:
+    """
+    Loads the chia config.yaml like chia's `load_config`, but only parses it again when it changed.
+    """
+    path = config_path_for_filename(root_path, _config_file_name)
+    if not path.is_file():
+        # Let chia report the missing config and exit
+        return load_config(root_path, _config_file_name)
+    with lock_config(root_path, _config_file_name):
+        config = load_cached_yaml(path)
+    if config is None:
+        # Fall back to chia, which retries reading the config
+        return load_config(root_path, _config_file_name)
+
+    return config
+
+
+def save_chia_config(root_path: Path, config: Dict[str, Any], serialized: Optional[str] = None):
+    path = config_path_for_filename(root_path, _config_file_name)
+    with lock_config(root_path, _config_file_name):
+        save_cached_yaml(path, config, serialized=serialized)
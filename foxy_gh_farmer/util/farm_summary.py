@@ -0,0 +1,74 @@
+from asyncio import gather
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple
+
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.util.network import is_localhost
+
+
+@dataclass(frozen=True)
+class HarvesterSummary:
+    node_id: str
+    host: str
+    is_local: bool
+    is_syncing: bool
+    plot_files_processed: int
+    plot_files_total: int
+    plots: int
+    total_plot_size: int
+    total_effective_plot_size: int
+
+    @property
+    def state(self) -> Tuple[bool, int, int, int, int, int]:
+        """
+        The values which change when the harvester synced or its plots changed.
+        """
+        return (
+            self.is_syncing,
+            self.plot_files_processed,
+            self.plot_files_total,
+            self.plots,
+            self.total_plot_size,
+            self.total_effective_plot_size,
+        )
+
+
+@dataclass
+class FarmSummary:
+    harvesters: List[HarvesterSummary] = field(default_factory=list)
+    connections: List[Dict[str, Any]] = field(default_factory=list)
+    total_plots: int = 0
+    total_plot_size: int = 0
+    total_effective_plot_size: int = 0
+
+
+async def fetch_farm_summary(farmer_client: FarmerRpcClient, include_connections: bool = True) -> FarmSummary:
+    if include_connections:
+        harvesters_summary, connections = await gather(
+            farmer_client.get_harvesters_summary(),
+            farmer_client.get_connections(),
+        )
+    else:
+        harvesters_summary, connections = await farmer_client.get_harvesters_summary(), []
+    farm_summary = FarmSummary(connections=connections)
+    for harvester in harvesters_summary["harvesters"]:
+        syncing = harvester["syncing"]
+        harvester_summary = HarvesterSummary(
+            node_id=harvester["connection"]["node_id"],
+            host=harvester["connection"]["host"],
+            is_local=is_localhost(harvester["connection"]["host"]),
+            is_syncing=syncing is not None and syncing["initial"],
+            plot_files_processed=syncing["plot_files_processed"] if syncing is not None else 0,
+            plot_files_total=syncing["plot_files_total"] if syncing is not None else 0,
+            plots=harvester["plots"],
+            total_plot_size=harvester["total_plot_size"],
+            total_effective_plot_size=harvester["total_effective_plot_size"],
+        )
+        farm_summary.harvesters.append(harvester_summary)
+        if harvester_summary.is_syncing:
+            continue
+        farm_summary.total_plots += harvester_summary.plots
+        farm_summary.total_plot_size += harvester_summary.total_plot_size
+        farm_summary.total_effective_plot_size += harvester_summary.total_effective_plot_size
+
+    return farm_summary
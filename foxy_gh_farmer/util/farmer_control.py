@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Dict, Any, Optional, Type, TypeVar
+
+from chia.cmds.cmds_util import node_config_section_names
+from chia.rpc.farmer_rpc_client import FarmerRpcClient
+from chia.rpc.harvester_rpc_client import HarvesterRpcClient
+from chia.rpc.rpc_client import RpcClient
+from chia.rpc.wallet_rpc_client import WalletRpcClient
+from chia.util.ints import uint16
+
+from foxy_gh_farmer.foundation.control.control_client import ControlClient
+from foxy_gh_farmer.foundation.control.controlled_clients import (
+    ControlledFarmerRpcClient,
+    ControlledHarvesterRpcClient,
+    ControlledWalletRpcClient,
+    ControlledDaemonProxy,
+)
+
+_T_RpcClient = TypeVar("_T_RpcClient", bound=RpcClient)
+_controlled_rpc_clients: Dict[Type[RpcClient], Type[RpcClient]] = {
+    FarmerRpcClient: ControlledFarmerRpcClient,
+    HarvesterRpcClient: ControlledHarvesterRpcClient,
+    WalletRpcClient: ControlledWalletRpcClient,
+}
+rpc_client_classes_by_config_section: Dict[str, Type[RpcClient]] = {
+    "farmer": FarmerRpcClient,
+    "harvester": HarvesterRpcClient,
+    "wallet": WalletRpcClient,
+}
+
+
+def get_control_socket_path(root_path: Path) -> Path:
+    return root_path / "foxy-gh-farmer.sock"
+
+
+async def connect_to_running_farmer(root_path: Path) -> Optional[ControlClient]:
+    return await ControlClient.connect(get_control_socket_path(root_path))
+
+
+async def get_running_farmer_daemon_proxy(root_path: Path) -> Optional[ControlledDaemonProxy]:
+    control_client = await connect_to_running_farmer(root_path)
+    if control_client is None:
+        return None
+
+    return ControlledDaemonProxy(control_client)
+
+
+async def create_service_rpc_client(
+    client_class: Type[_T_RpcClient], root_path: Path, config: Dict[str, Any]
+) -> _T_RpcClient:
+    """
+    Creates an RPC client which reuses the connection of the running farmer if there is one, or connects directly to
+    the service otherwise.
+    """
+    control_client = await connect_to_running_farmer(root_path)
+    if control_client is not None:
+        return _controlled_rpc_clients[client_class](control_client)
+
+    return await client_class.create(
+        config["self_hostname"],
+        uint16(config[node_config_section_names[client_class]]["rpc_port"]),
+        root_path,
+        config,
+    )
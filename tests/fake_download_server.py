@@ -0,0 +1,70 @@
+import re
+from typing import Dict, List, Optional, Tuple, Callable
+
+from aiohttp import web
+
+
+class FakeDownloadServer:
+    """
+    Serves in-memory files over HTTP like the download server does, with optional range request support and injectable
+    failures.
+    """
+
+    files: Dict[str, bytes]
+    statuses: Dict[str, int]
+    supports_ranges: bool
+    # Range requests for which this returns true are answered with a server error
+    fail_range: Optional[Callable[[int, int], bool]] = None
+    requests: List[Tuple[str, str, Optional[str]]]
+    port: int = 0
+    _runner: Optional[web.AppRunner] = None
+
+    def __init__(self, files: Optional[Dict[str, bytes]] = None, supports_ranges: bool = True):
+        self.files = files if files is not None else {}
+        self.statuses = {}
+        self.supports_ranges = supports_ranges
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle_request)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host="127.0.0.1", port=0)
+        await site.start()
+        assert site._server is not None
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_request(self, request: web.Request) -> web.StreamResponse:
+        range_header = request.headers.get("Range")
+        self.requests.append((request.method, request.path, range_header))
+        status = self.statuses.get(request.path)
+        if status is not None:
+            return web.Response(status=status)
+        data = self.files.get(request.path)
+        if data is None:
+            raise web.HTTPNotFound()
+        headers = {"Content-Type": "application/octet-stream"}
+        if self.supports_ranges:
+            headers["Accept-Ranges"] = "bytes"
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", range_header or "")
+        if match is None or not self.supports_ranges:
+            return web.Response(body=data, headers=headers)
+        start, end = int(match.group(1)), int(match.group(2))
+        if self.fail_range is not None and self.fail_range(start, end):
+            return web.Response(status=500)
+
+        return web.Response(
+            status=206,
+            body=data[start : end + 1],
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(data)}"},
+        )
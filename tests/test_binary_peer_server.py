@@ -0,0 +1,134 @@
+import io
+import tarfile
+from asyncio import run
+from hashlib import sha256
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+from aiohttp import ClientSession
+
+from fake_download_server import FakeDownloadServer
+from foxy_gh_farmer import gigahorse_binary_manager
+from foxy_gh_farmer.binary_peer_server import BinaryPeerServer
+from foxy_gh_farmer.gigahorse_binary_manager import GigahorseBinaryManager
+
+_release = gigahorse_binary_manager._gigahorse_release
+_archive_file_name = f"{gigahorse_binary_manager._gigahorse_release_archive_base}-x86_64.tar.gz"
+_archive_path = f"/{_release}/{_archive_file_name}"
+
+
+def _create_release_archive() -> bytes:
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as file:
+        content = b"#!/bin/sh\n"
+        info = tarfile.TarInfo(f"{gigahorse_binary_manager._gigahorse_archive_root_dir}/chia")
+        info.size = len(content)
+        info.mode = 0o755
+        file.addfile(info, io.BytesIO(content))
+
+    return archive.getvalue()
+
+
+_archive = _create_release_archive()
+
+
+@pytest.fixture(autouse=True)
+def tarball_release(monkeypatch):
+    # The tests install the release from a tarball, also on platforms which would download a zip
+    monkeypatch.setattr(GigahorseBinaryManager, "_get_archive_file_name", lambda _: _archive_file_name)
+
+
+async def _start_upstream(monkeypatch) -> FakeDownloadServer:
+    upstream = FakeDownloadServer(
+        {
+            _archive_path: _archive,
+            f"/{_release}/sha256sums.txt": f"{sha256(_archive).hexdigest()}  {_archive_file_name}\n".encode(),
+        }
+    )
+    await upstream.start()
+    monkeypatch.setattr(gigahorse_binary_manager, "_download_url_base", upstream.url)
+
+    return upstream
+
+
+async def _start_peer(cache_path: Path, upstream: FakeDownloadServer) -> Tuple[BinaryPeerServer, str]:
+    """
+    Installs the release into the cache of a node which keeps its archives and serves them to peers.
+    """
+    binary_manager = GigahorseBinaryManager(cache_path=str(cache_path), keep_archives=True)
+    await binary_manager.get_binary_directory_path()
+    peer_server = BinaryPeerServer(host="127.0.0.1", port=0, binary_manager=binary_manager)
+    await peer_server.start()
+    assert peer_server._runner is not None
+    upstream.requests.clear()
+
+    return peer_server, f"http://127.0.0.1:{peer_server._runner.addresses[0][1]}"
+
+
+def _count_upstream_archive_requests(upstream: FakeDownloadServer) -> int:
+    return sum(1 for _, path, _ in upstream.requests if path == _archive_path)
+
+
+def test_serves_kept_archives_with_range_support(tmp_path: Path, monkeypatch):
+    async def run_test():
+        upstream = await _start_upstream(monkeypatch)
+        peer_server, peer_url = await _start_peer(tmp_path, upstream)
+        try:
+            async with ClientSession(auto_decompress=False) as client:
+                async with client.get(f"{peer_url}/gigahorse{_archive_path}") as res:
+                    assert res.status == 200
+                    assert await res.read() == _archive
+                async with client.get(f"{peer_url}/gigahorse{_archive_path}", headers={"Range": "bytes=0-9"}) as res:
+                    assert res.status == 206
+                    assert await res.read() == _archive[:10]
+                for path in [
+                    f"/gigahorse/{_release}/unknown.tar.gz",
+                    f"/gigahorse/{_release}/..%2F{_release}%2Fchia-gigahorse-farmer%2Fchia",
+                    f"/gigahorse/other-release/{_archive_file_name}",
+                ]:
+                    async with client.get(f"{peer_url}{path}") as res:
+                        assert res.status == 404
+        finally:
+            await peer_server.stop()
+            await upstream.stop()
+
+    run(run_test())
+
+
+def test_fetches_the_release_from_a_peer(tmp_path: Path, monkeypatch):
+    async def run_test():
+        upstream = await _start_upstream(monkeypatch)
+        peer_server, peer_url = await _start_peer(tmp_path / "peer", upstream)
+        try:
+            binary_manager = GigahorseBinaryManager(cache_path=str(tmp_path / "node"), peers=[peer_url])
+            binary_path = await binary_manager.get_binary_directory_path()
+        finally:
+            await peer_server.stop()
+            await upstream.stop()
+
+        assert (binary_path / "chia").read_bytes() == b"#!/bin/sh\n"
+        assert _count_upstream_archive_requests(upstream) == 0
+
+    run(run_test())
+
+
+def test_rejects_a_peer_archive_with_a_checksum_mismatch(tmp_path: Path, monkeypatch, caplog):
+    async def run_test():
+        upstream = await _start_upstream(monkeypatch)
+        peer_server, peer_url = await _start_peer(tmp_path / "peer", upstream)
+        (tmp_path / "peer" / "archives" / _archive_file_name).write_bytes(_archive + b"tampered")
+        try:
+            binary_manager = GigahorseBinaryManager(cache_path=str(tmp_path / "node"), peers=[peer_url])
+            binary_path = await binary_manager.get_binary_directory_path()
+        finally:
+            await peer_server.stop()
+            await upstream.stop()
+
+        assert (binary_path / "chia").read_bytes() == b"#!/bin/sh\n"
+        # The release was only installed after downloading the archive from upstream again
+        assert f"{peer_url}/gigahorse{_archive_path} failed" in caplog.text
+        assert "Checksum mismatch" in caplog.text
+        assert _count_upstream_archive_requests(upstream) > 0
+
+    run(run_test())
@@ -0,0 +1,285 @@
+import io
+import os
+import tarfile
+from asyncio import run
+from hashlib import sha256
+from pathlib import Path
+from ssl import create_default_context
+from threading import Thread
+from typing import List
+
+import pytest
+from aiohttp import ClientSession
+
+from fake_download_server import FakeDownloadServer
+from foxy_gh_farmer import gigahorse_binary_manager
+from foxy_gh_farmer.foundation.download import segmented_downloader
+from foxy_gh_farmer.foundation.download.progressive_file_reader import ProgressiveFileReader
+from foxy_gh_farmer.foundation.download.segmented_downloader import SegmentedDownloader
+from foxy_gh_farmer.gigahorse_binary_manager import GigahorseBinaryManager
+
+_data = os.urandom(10 * 1024 + 123)
+_segment_size = 1024
+
+
+@pytest.fixture(autouse=True)
+def skip_retry_backoff(monkeypatch):
+    async def no_sleep(_seconds: float):
+        pass
+
+    monkeypatch.setattr(segmented_downloader, "sleep", no_sleep)
+
+
+async def _download(server: FakeDownloadServer, to_path: Path, **kwargs):
+    async with ClientSession() as session:
+        downloader = SegmentedDownloader(session, create_default_context(), connections=3, segment_size=_segment_size)
+
+        return await downloader.download(f"{server.url}/file", to_path, **kwargs)
+
+
+def _range_requests(server: FakeDownloadServer) -> List[str]:
+    return [range_header for method, _, range_header in server.requests if method == "GET" and range_header is not None]
+
+
+def test_downloads_in_segments_and_reports_the_available_bytes(tmp_path: Path):
+    async def run_test():
+        server = FakeDownloadServer({"/file": _data})
+        await server.start()
+        available_bytes: List[int] = []
+        try:
+            progress = await _download(
+                server,
+                tmp_path / "file",
+                expected_sha256=sha256(_data).hexdigest(),
+                on_bytes_available=available_bytes.append,
+            )
+        finally:
+            await server.stop()
+
+        assert (tmp_path / "file").read_bytes() == _data
+        assert progress.downloaded_bytes == len(_data)
+        assert len(_range_requests(server)) == 11
+        assert available_bytes == sorted(available_bytes) and available_bytes[-1] == len(_data)
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["file"]
+
+    run(run_test())
+
+
+def test_falls_back_to_a_single_stream_without_range_support(tmp_path: Path):
+    async def run_test():
+        server = FakeDownloadServer({"/file": _data}, supports_ranges=False)
+        await server.start()
+        try:
+            await _download(server, tmp_path / "file", expected_sha256=sha256(_data).hexdigest())
+        finally:
+            await server.stop()
+
+        assert (tmp_path / "file").read_bytes() == _data
+        assert len(_range_requests(server)) == 0
+
+    run(run_test())
+
+
+def test_resumes_an_interrupted_download(tmp_path: Path):
+    async def run_test():
+        server = FakeDownloadServer({"/file": _data})
+        server.fail_range = lambda start, _: start >= 5 * _segment_size
+        await server.start()
+        try:
+            with pytest.raises(Exception):
+                await _download(server, tmp_path / "file")
+            assert not (tmp_path / "file").exists()
+            assert (tmp_path / "file.part.json").exists()
+
+            server.fail_range = None
+            server.requests.clear()
+            progress = await _download(server, tmp_path / "file", expected_sha256=sha256(_data).hexdigest())
+        finally:
+            await server.stop()
+
+        assert (tmp_path / "file").read_bytes() == _data
+        assert progress.resumed_bytes == 5 * _segment_size
+        assert len(_range_requests(server)) == 6
+
+    run(run_test())
+
+
+def test_rejects_a_download_with_a_checksum_mismatch(tmp_path: Path):
+    async def run_test():
+        server = FakeDownloadServer({"/file": _data})
+        await server.start()
+        try:
+            with pytest.raises(RuntimeError, match="Checksum mismatch"):
+                await _download(server, tmp_path / "file", expected_sha256=sha256(b"other").hexdigest())
+        finally:
+            await server.stop()
+
+        assert list(tmp_path.iterdir()) == []
+
+    run(run_test())
+
+
+def test_progressive_file_reader_blocks_until_bytes_are_written(tmp_path: Path):
+    path = tmp_path / "file.part"
+    path.write_bytes(b"")
+    reader = ProgressiveFileReader(path)
+    read_data: List[bytes] = []
+
+    def read_all():
+        while True:
+            data = reader.read(100)
+            if len(data) == 0:
+                return
+            read_data.append(data)
+
+    read_thread = Thread(target=read_all)
+    read_thread.start()
+    with open(path, "r+b") as file:
+        for start in range(0, len(_data), 1000):
+            file.write(_data[start : start + 1000])
+            file.flush()
+            reader.set_available_bytes(min(start + 1000, len(_data)))
+    os.replace(path, tmp_path / "file")
+    reader.complete(tmp_path / "file")
+    read_thread.join(timeout=5)
+    reader.close()
+
+    assert not read_thread.is_alive()
+    assert b"".join(read_data) == _data
+
+
+def test_progressive_file_reader_raises_the_failure(tmp_path: Path):
+    path = tmp_path / "file.part"
+    path.write_bytes(b"")
+    reader = ProgressiveFileReader(path)
+    reader.fail(RuntimeError("The download failed"))
+
+    with pytest.raises(RuntimeError, match="The download failed"):
+        reader.read()
+
+
+def _create_release_archive() -> bytes:
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as file:
+        content = b"#!/bin/sh\n"
+        info = tarfile.TarInfo(f"{gigahorse_binary_manager._gigahorse_archive_root_dir}/chia")
+        info.size = len(content)
+        info.mode = 0o755
+        file.addfile(info, io.BytesIO(content))
+
+    return archive.getvalue()
+
+
+def _release_path(file_name: str) -> str:
+    return f"/{gigahorse_binary_manager._gigahorse_release}/{file_name}"
+
+
+@pytest.fixture
+def release_archive(monkeypatch):
+    # The tests install the release from a tarball, also on platforms which would download a zip
+    archive_file_name = f"{gigahorse_binary_manager._gigahorse_release_archive_base}-x86_64.tar.gz"
+    monkeypatch.setattr(GigahorseBinaryManager, "_get_archive_file_name", lambda _: archive_file_name)
+
+    return archive_file_name, _create_release_archive()
+
+
+def _create_upstream(archive_file_name: str, archive: bytes) -> FakeDownloadServer:
+    return FakeDownloadServer(
+        {
+            _release_path(archive_file_name): archive,
+            _release_path("sha256sums.txt"): f"{sha256(archive).hexdigest()}  {archive_file_name}\n".encode(),
+        }
+    )
+
+
+def _requested_paths(server: FakeDownloadServer) -> List[str]:
+    return [path for _, path, _ in server.requests]
+
+
+def test_installs_the_release_verified_against_the_manifest(tmp_path: Path, monkeypatch, release_archive):
+    archive_file_name, archive = release_archive
+
+    async def run_test():
+        upstream = _create_upstream(archive_file_name, archive)
+        await upstream.start()
+        monkeypatch.setattr(gigahorse_binary_manager, "_download_url_base", upstream.url)
+        try:
+            binary_path = await GigahorseBinaryManager(cache_path=str(tmp_path)).get_binary_directory_path()
+        finally:
+            await upstream.stop()
+
+        assert (binary_path / "chia").read_bytes() == b"#!/bin/sh\n"
+        assert _release_path("sha256sums.txt") in _requested_paths(upstream)
+
+    run(run_test())
+
+
+def test_does_not_install_an_archive_which_does_not_match_the_manifest(tmp_path: Path, monkeypatch, release_archive):
+    archive_file_name, archive = release_archive
+
+    async def run_test():
+        upstream = _create_upstream(archive_file_name, archive)
+        upstream.files[_release_path(archive_file_name)] = _create_release_archive() + b"tampered"
+        await upstream.start()
+        monkeypatch.setattr(gigahorse_binary_manager, "_download_url_base", upstream.url)
+        try:
+            with pytest.raises(RuntimeError, match="Checksum mismatch"):
+                await GigahorseBinaryManager(cache_path=str(tmp_path)).get_binary_directory_path()
+        finally:
+            await upstream.stop()
+
+        assert not (tmp_path / gigahorse_binary_manager._gigahorse_release).exists()
+
+    run(run_test())
+
+
+@pytest.mark.parametrize("manifest_status", [403, 404, 503])
+def test_skips_the_verification_and_peers_without_a_manifest(
+    tmp_path: Path, monkeypatch, release_archive, manifest_status: int
+):
+    archive_file_name, archive = release_archive
+
+    async def run_test():
+        upstream = _create_upstream(archive_file_name, archive)
+        upstream.statuses[_release_path("sha256sums.txt")] = manifest_status
+        peer = FakeDownloadServer({_release_path(archive_file_name): archive})
+        await upstream.start()
+        await peer.start()
+        monkeypatch.setattr(gigahorse_binary_manager, "_download_url_base", upstream.url)
+        try:
+            binary_manager = GigahorseBinaryManager(cache_path=str(tmp_path), peers=[peer.url])
+            binary_path = await binary_manager.get_binary_directory_path()
+        finally:
+            await upstream.stop()
+            await peer.stop()
+
+        assert (binary_path / "chia").exists()
+        # Archives of peers can not be verified without the manifest
+        assert peer.requests == []
+        assert _release_path(archive_file_name) in _requested_paths(upstream)
+
+    run(run_test())
+
+
+def test_falls_back_to_the_next_source(tmp_path: Path, monkeypatch, release_archive):
+    archive_file_name, archive = release_archive
+
+    async def run_test():
+        upstream = _create_upstream(archive_file_name, archive)
+        failing_peer = FakeDownloadServer()
+        failing_peer.statuses[f"/gigahorse{_release_path(archive_file_name)}"] = 500
+        await upstream.start()
+        await failing_peer.start()
+        monkeypatch.setattr(gigahorse_binary_manager, "_download_url_base", upstream.url)
+        try:
+            binary_manager = GigahorseBinaryManager(cache_path=str(tmp_path), peers=[failing_peer.url])
+            binary_path = await binary_manager.get_binary_directory_path()
+        finally:
+            await upstream.stop()
+            await failing_peer.stop()
+
+        assert (binary_path / "chia").exists()
+        assert len(failing_peer.requests) > 0
+        assert _release_path(archive_file_name) in _requested_paths(upstream)
+
+    run(run_test())
@@ -0,0 +1,229 @@
+from asyncio import run, start_server, open_connection, sleep, wait_for, StreamReader, StreamWriter, AbstractServer
+from typing import List, Tuple, Optional, Set
+
+from foxy_gh_farmer.foundation.proxy.tcp_load_balancer import TcpLoadBalancer
+
+
+class FakeBackend:
+    """
+    Answers every line with its name, after an optional delay.
+    """
+
+    name: bytes
+    delay_seconds: float
+    port: int = 0
+    _server: Optional[AbstractServer] = None
+    _writers: Set[StreamWriter]
+
+    def __init__(self, name: str, delay_seconds: float = 0):
+        self.name = name.encode()
+        self.delay_seconds = delay_seconds
+        self._writers = set()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return "127.0.0.1", self.port
+
+    async def start(self):
+        self._server = await start_server(self._handle_connection, host="127.0.0.1", port=self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        self._writers.add(writer)
+        try:
+            while len(await reader.readline()) > 0:
+                await sleep(self.delay_seconds)
+                writer.write(self.name + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def _start_balancer(backends: List[FakeBackend], **kwargs) -> Tuple[TcpLoadBalancer, int]:
+    for backend in backends:
+        await backend.start()
+    balancer = TcpLoadBalancer(
+        host="127.0.0.1",
+        port=0,
+        backends=[backend.address for backend in backends],
+        connect_timeout_seconds=1,
+        **kwargs,
+    )
+    await balancer.start()
+    assert balancer._server is not None
+
+    return balancer, balancer._server.sockets[0].getsockname()[1]
+
+
+async def _request(port: int) -> bytes:
+    reader, writer = await open_connection("127.0.0.1", port)
+    try:
+        writer.write(b"ping\n")
+        await writer.drain()
+
+        return (await wait_for(reader.readline(), timeout=5)).strip()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def test_prefers_the_backend_with_the_lowest_latency():
+    async def run_test():
+        fast_backend = FakeBackend("fast")
+        slow_backend = FakeBackend("slow", delay_seconds=0.05)
+        balancer, port = await _start_balancer([fast_backend, slow_backend])
+        try:
+            responses = [await _request(port) for _ in range(10)]
+            backends = {backend.port: backend for backend in balancer.backends}
+        finally:
+            await balancer.stop()
+            await fast_backend.stop()
+            await slow_backend.stop()
+
+        # Once the first responses were measured the fast backend wins every sequential request
+        assert responses[-5:] == [b"fast"] * 5
+        assert backends[fast_backend.port].total_connections > backends[slow_backend.port].total_connections
+
+    run(run_test())
+
+
+def test_ejects_and_readmits_a_failing_backend():
+    async def run_test():
+        healthy_backend = FakeBackend("healthy")
+        failing_backend = FakeBackend("failing")
+        balancer, port = await _start_balancer(
+            [healthy_backend, failing_backend],
+            health_check_interval_seconds=0.05,
+            max_consecutive_failures=2,
+        )
+        try:
+            await failing_backend.stop()
+            await sleep(0.3)
+            backends = {backend.port: backend for backend in balancer.backends}
+            assert backends[failing_backend.port].is_healthy is False
+            assert backends[healthy_backend.port].is_healthy is True
+            assert {await _request(port) for _ in range(5)} == {b"healthy"}
+
+            await failing_backend.start()
+            await sleep(0.3)
+            assert backends[failing_backend.port].is_healthy is True
+        finally:
+            await balancer.stop()
+            await healthy_backend.stop()
+            await failing_backend.stop()
+
+    run(run_test())
+
+
+def test_set_backends_keeps_the_stats_of_remaining_backends():
+    async def run_test():
+        first_backend = FakeBackend("first")
+        second_backend = FakeBackend("second")
+        await second_backend.start()
+        balancer, port = await _start_balancer([first_backend])
+        try:
+            assert await _request(port) == b"first"
+            first_stats = balancer.backends[0]
+            assert first_stats.total_connections == 1
+
+            balancer.set_backends([second_backend.address, first_backend.address])
+            assert balancer.backends[1] is first_stats
+            assert len(balancer.backends) == 2
+
+            balancer.set_backends([second_backend.address])
+            assert [await _request(port) for _ in range(3)] == [b"second"] * 3
+        finally:
+            await balancer.stop()
+            await first_backend.stop()
+            await second_backend.stop()
+
+    run(run_test())
+
+
+def test_closes_the_connection_when_the_backend_closes():
+    async def run_test():
+        backend = FakeBackend("backend")
+        balancer, port = await _start_balancer([backend])
+        try:
+            reader, writer = await open_connection("127.0.0.1", port)
+            writer.write(b"ping\n")
+            await writer.drain()
+            assert (await wait_for(reader.readline(), timeout=5)).strip() == b"backend"
+            # Closing the backend side must end the connection even though the client stays idle
+            await backend.stop()
+            for connection_task in list(balancer._connection_tasks):
+                await wait_for(connection_task, timeout=5)
+            assert await wait_for(reader.read(), timeout=5) == b""
+            assert balancer.backends[0].active_connections == 0
+            writer.close()
+        finally:
+            await balancer.stop()
+            await backend.stop()
+
+    run(run_test())
+
+
+async def _open_proxied_connection(port: int) -> Tuple[StreamReader, StreamWriter, bytes]:
+    reader, writer = await open_connection("127.0.0.1", port)
+    writer.write(b"ping\n")
+    await writer.drain()
+
+    return reader, writer, (await wait_for(reader.readline(), timeout=5)).strip()
+
+
+def test_closes_connections_to_removed_backends():
+    async def run_test():
+        removed_backend = FakeBackend("removed")
+        remaining_backend = FakeBackend("remaining")
+        await remaining_backend.start()
+        balancer, port = await _start_balancer([removed_backend])
+        try:
+            reader, writer, response = await _open_proxied_connection(port)
+            assert response == b"removed"
+
+            balancer.set_backends([remaining_backend.address])
+            # The client notices the closed connection and reconnects to a remaining backend
+            assert await wait_for(reader.read(), timeout=5) == b""
+            writer.close()
+            assert await _request(port) == b"remaining"
+        finally:
+            await balancer.stop()
+            await removed_backend.stop()
+            await remaining_backend.stop()
+
+    run(run_test())
+
+
+def test_closes_connections_to_ejected_backends():
+    async def run_test():
+        backend = FakeBackend("backend")
+        balancer, port = await _start_balancer(
+            [backend], health_check_interval_seconds=0.05, max_consecutive_failures=2
+        )
+        try:
+            reader, writer, response = await _open_proxied_connection(port)
+            assert response == b"backend"
+
+            # Stop accepting new connections while the proxied one stays open, like an unreachable host
+            assert backend._server is not None
+            backend._server.close()
+            assert await wait_for(reader.read(), timeout=5) == b""
+            assert balancer.backends[0].is_healthy is False
+            writer.close()
+        finally:
+            await balancer.stop()
+            await backend.stop()
+
+    run(run_test())